@@ -0,0 +1,170 @@
+import itertools
+import threading
+
+DEGRADED = ("Warning", "Critical")
+
+
+class _OpenAlert:
+    __slots__ = ("alert", "critical_streak", "healthy_streak")
+
+    def __init__(self, alert):
+        self.alert = alert
+        self.critical_streak = 0
+        self.healthy_streak = 0
+
+
+class AlertEngine:
+    """
+    Turns Warning/Critical predictions into alerts, with at most one open alert
+    per machine.
+
+    The first degraded reading of a machine opens an alert at its severity;
+    later degraded readings are folded into it (counters, last reading, last
+    seen), so a machine reporting every second raises one alert, not one per
+    reading. A Warning alert escalates to Critical after escalate_after
+    consecutive Critical readings and never steps back down; it is resolved
+    after clear_after consecutive healthy readings, and the machine's next
+    degraded reading opens a new alert. Readings without a machine id cannot
+    be told apart, so each degraded one opens an alert of its own that is
+    never updated or resolved.
+
+    Alert ids come from next_id (a store's next_alert_id(), which hands out
+    ids no other process sharing the store gets), so they are never reused
+    when old alerts are evicted or deleted. Open alerts are indexed by machine
+    and by id: every observe(), acknowledge() and forget() is O(1), however
+    many machines are degraded at once.
+
+    The engine only keeps state; the caller stores what observe() returns and
+    hands stored open alerts back to restore() on startup. That state lives in
+    one process: with several workers, each deduplicates the readings it
+    serves, so a machine whose readings reach two workers can have an open
+    alert from each.
+    """
+
+    def __init__(self, escalate_after=1, clear_after=3, next_id=None):
+        if escalate_after < 1 or clear_after < 1:
+            raise ValueError("escalate_after and clear_after must be at least 1")
+        self.escalate_after = escalate_after
+        self.clear_after = clear_after
+        self._next_id = next_id or itertools.count(1).__next__
+        self._open = {}  # machine_id -> _OpenAlert
+        self._machine_of = {}  # open alert id -> machine_id
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._open)
+
+    def observe(self, machine_id, sensor_data, prediction):
+        """
+        Fold one prediction into the machine's alert state.
+        Returns (event, alert): event is "opened", "updated", "escalated" or
+        "resolved" with the alert dict concerned, or (None, None) if there is
+        no alert to store.
+        """
+        status = prediction["health_status"]
+        timestamp = prediction["timestamp"]
+        with self._lock:
+            if machine_id is None:
+                if status not in DEGRADED:
+                    return None, None
+                return "opened", self._new_alert(None, sensor_data, prediction)
+
+            state = self._open.get(machine_id)
+
+            if status not in DEGRADED:
+                if state is None:
+                    return None, None
+                state.critical_streak = 0
+                state.healthy_streak += 1
+                if state.healthy_streak < self.clear_after:
+                    return None, None
+                del self._open[machine_id]
+                del self._machine_of[state.alert["id"]]
+                state.alert.update(status="resolved", resolved_at=timestamp)
+                return "resolved", state.alert
+
+            if state is None:
+                alert = self._new_alert(machine_id, sensor_data, prediction)
+                self._open[machine_id] = _OpenAlert(alert)
+                self._machine_of[alert["id"]] = machine_id
+                return "opened", alert
+
+            alert = state.alert
+            state.healthy_streak = 0
+            alert["count"] += 1
+            alert["warning_count" if status == "Warning" else "critical_count"] += 1
+            alert.update(sensor_data=sensor_data, root_cause=prediction["root_cause"], last_seen=timestamp)
+
+            if status == "Critical" and alert["severity"] == "Warning":
+                state.critical_streak += 1
+                if state.critical_streak >= self.escalate_after:
+                    alert.update(severity="Critical", message=self._message(prediction), acknowledged=False)
+                    return "escalated", alert
+            else:
+                state.critical_streak = 0
+            return "updated", alert
+
+    def acknowledge(self, alert_id, timestamp):
+        """Mark an open alert acknowledged; returns it, or None if no open alert has this id."""
+        with self._lock:
+            machine_id = self._machine_of.get(alert_id)
+            if machine_id is None:
+                return None
+            alert = self._open[machine_id].alert
+            alert.update(acknowledged=True, acknowledged_at=timestamp)
+            return alert
+
+    def forget(self, alert_id):
+        """Drop an open alert (e.g. deleted by the user); its machine's next degraded reading opens a new one."""
+        with self._lock:
+            machine_id = self._machine_of.pop(alert_id, None)
+            if machine_id is not None:
+                del self._open[machine_id]
+
+    def restore(self, alerts):
+        """
+        Index stored open alerts (e.g. after a restart) so their machines'
+        readings keep updating them; given in id order, a machine's newest wins.
+        Streaks start again from zero.
+        """
+        with self._lock:
+            for alert in alerts:
+                machine_id = alert.get("machine_id")
+                if alert.get("status", "open") != "open" or machine_id is None:
+                    continue
+                previous = self._open.get(machine_id)
+                if previous is not None:
+                    del self._machine_of[previous.alert["id"]]
+                self._open[machine_id] = _OpenAlert(alert)
+                self._machine_of[alert["id"]] = machine_id
+
+    def clear(self):
+        """Forget every open alert; ids keep counting up."""
+        with self._lock:
+            self._open.clear()
+            self._machine_of.clear()
+
+    def _new_alert(self, machine_id, sensor_data, prediction):
+        status = prediction["health_status"]
+        timestamp = prediction["timestamp"]
+        return {
+            "id": self._next_id(),
+            "machine_id": machine_id,
+            "severity": status,
+            "message": self._message(prediction),
+            "timestamp": timestamp,
+            "sensor_data": sensor_data,
+            "status": "open",
+            "acknowledged": False,
+            "root_cause": prediction["root_cause"],
+            "count": 1,
+            "warning_count": int(status == "Warning"),
+            "critical_count": int(status == "Critical"),
+            "last_seen": timestamp,
+            "resolved_at": None,
+            "acknowledged_at": None,
+        }
+
+    @staticmethod
+    def _message(prediction):
+        return f"{prediction['health_status']}: {prediction['root_cause']} - {prediction['recommendation']}"
@@ -0,0 +1 @@
+"""Performance benchmarks for the predictive maintenance model and API."""
@@ -0,0 +1,6 @@
+"""python -m benchmarks: run the standard benchmark suite (see benchmarks/suite.py)."""
+import sys
+
+from benchmarks.suite import main_
+
+sys.exit(main_())
@@ -0,0 +1,100 @@
+"""Minimal in-process ASGI client: drives the FastAPI app without sockets or extra dependencies."""
+import asyncio
+import json
+
+
+async def request(app, method, path, body=None, headers=()):
+    """Send one HTTP request to app; returns (status, headers, body bytes)."""
+    path, _, query = path.partition("?")
+    payload = b"" if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode())
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+        ] + [(k.lower().encode(), v.encode()) for k, v in headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    body_sent = False
+    done = asyncio.Event()
+    response = {"status": None, "headers": [], "body": []}
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    await app(scope, receive, send)
+    done.set()
+    return response["status"], response["headers"], b"".join(response["body"])
+
+
+async def request_json(app, method, path, body=None, headers=()):
+    status, _, content = await request(app, method, path, body, headers)
+    return status, json.loads(content) if content else None
+
+
+async def stream(app, path, on_chunk, stop):
+    """
+    GET a streaming endpoint of app, calling on_chunk(bytes) for every body
+    chunk until stop (an asyncio.Event) is set; the client then disconnects.
+    Returns the response status.
+    """
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"accept", b"text/event-stream")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    status = None
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await stop.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body"):
+            on_chunk(message["body"])
+
+    await app(scope, receive, send)
+    return status
@@ -0,0 +1,41 @@
+import time
+
+import numpy as np
+
+from model import PredictiveMaintenanceAIOnly
+
+
+def add_model_args(parser):
+    """Options shared by every benchmark that needs a trained model."""
+    parser.add_argument("--n-samples", type=int, default=30000,
+                        help="synthetic training rows (default: 30000, same as the API)")
+    parser.add_argument("--quick", action="store_true",
+                        help="train 30-tree forests on 5000 rows for a fast smoke run")
+
+
+def build_model(args):
+    """Train a PredictiveMaintenanceAIOnly the way the API does (or a small one with --quick)."""
+    model = PredictiveMaintenanceAIOnly()
+    n_samples = args.n_samples
+    if args.quick:
+        n_samples = min(n_samples, 5000)
+        for forest in (model.fault_model, model.severity_model, model.rul_model):
+            forest.set_params(n_estimators=30)
+
+    start = time.perf_counter()
+    model.train(n_samples=n_samples)
+    print(f"trained on {n_samples} rows in {time.perf_counter() - start:.1f}s")
+    return model
+
+
+def sample_readings(model, n, seed=0):
+    """Draw n realistic readings (as dicts) from a fresh synthetic dataset."""
+    df = model.generate_synthetic_dataset(n_samples=max(n, 1))
+    rows = df[model.feature_cols].sample(n=n, replace=n > len(df), random_state=seed)
+    return rows.to_dict("records")
+
+
+def percentiles(samples_s):
+    """p50/p99 of a list of durations in seconds, reported in milliseconds."""
+    arr = np.asarray(samples_s) * 1000.0
+    return {"p50_ms": float(np.percentile(arr, 50)), "p99_ms": float(np.percentile(arr, 99))}
@@ -0,0 +1,57 @@
+"""
+Throughput of PredictiveMaintenanceAIOnly.predict_batch vs a loop of predict().
+
+    python -m benchmarks.bench_batch [--quick] [--sizes 1 100 10000]
+"""
+import argparse
+import time
+
+from benchmarks._common import add_model_args, build_model, sample_readings
+
+# The single-row loop is extrapolated from at most this many calls
+MAX_LOOP_CALLS = 200
+
+
+def run(model, sizes, repeats=3):
+    rows = []
+    for size in sizes:
+        readings = sample_readings(model, size)
+
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.predict_batch(readings)
+            best = min(best, time.perf_counter() - start)
+        batch_rate = size / best
+
+        n_loop = min(size, MAX_LOOP_CALLS)
+        start = time.perf_counter()
+        for reading in readings[:n_loop]:
+            model.predict(reading)
+        loop_rate = n_loop / (time.perf_counter() - start)
+
+        rows.append({
+            "batch_size": size,
+            "batch_rows_per_s": batch_rate,
+            "loop_rows_per_s": loop_rate,
+            "speedup": batch_rate / loop_rate,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_model_args(parser)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10000])
+    args = parser.parse_args()
+
+    model = build_model(args)
+
+    print(f"{'batch':>8} {'batch rows/s':>14} {'loop rows/s':>14} {'speedup':>9}")
+    for row in run(model, args.sizes):
+        print(f"{row['batch_size']:>8} {row['batch_rows_per_s']:>14.1f} "
+              f"{row['loop_rows_per_s']:>14.1f} {row['speedup']:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
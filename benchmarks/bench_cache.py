@@ -0,0 +1,105 @@
+"""
+Prediction cache on a replay of synthetic_sensor_data_with_vibration.csv
+through POST /predict: no cache, then the cache with exact keys and at
+several precisions, each replayed twice (the second pass is what idle
+machines resending the same readings look like).
+
+    python -m benchmarks.bench_cache [--quick] [--passes 2]
+
+Agreement is the share of responses whose health status and root cause match
+the uncached run; coarse precisions trade it for hit rate.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import pandas as pd
+
+from benchmarks._asgi import request_json
+from benchmarks._common import add_model_args, build_model, percentiles
+from bulk_ingest import map_columns
+from prediction_cache import FINE_PRECISION, PredictionCache
+
+import main
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "synthetic_sensor_data_with_vibration.csv")
+
+SETTINGS = [
+    ("off", None),
+    ("exact", {}),
+    ("fine", FINE_PRECISION),
+    ("coarse", {"temperature": 1.0, "vibration": 0.1, "pressure": 1.0, "rpm": 10.0}),
+    ("very coarse", {"temperature": 5.0, "vibration": 0.5, "pressure": 5.0, "rpm": 50.0}),
+]
+
+
+def replay_readings(model):
+    X = map_columns(pd.read_csv(CSV_PATH), model.feature_cols)
+    return [dict(zip(model.feature_cols, row)) for row in X.tolist()]
+
+
+async def replay(readings):
+    latencies, outcomes = [], []
+    for reading in readings:
+        start = time.perf_counter()
+        status, body = await request_json(main.app, "POST", "/predict", reading)
+        latencies.append(time.perf_counter() - start)
+        outcomes.append((body["health_status"], body["root_cause"]) if status == 200 else None)
+    return latencies, outcomes
+
+
+async def run(model, passes):
+    main.model = model
+    await main.startup_event()
+    readings = replay_readings(model)
+
+    results = []
+    reference = None
+    for name, precision in SETTINGS:
+        main.prediction_cache = PredictionCache(
+            max_entries=0 if precision is None else 10000, ttl_seconds=3600, precision=precision
+        )
+        for n in range(1, passes + 1):
+            cache = main.prediction_cache
+            hits, lookups = cache.hits, cache.hits + cache.misses
+            started = time.perf_counter()
+            latencies, outcomes = await replay(readings)
+            elapsed = time.perf_counter() - started
+            if reference is None:
+                reference = outcomes
+            lookups = cache.hits + cache.misses - lookups
+            results.append({
+                "setting": name,
+                "pass": n,
+                "per_s": len(readings) / elapsed,
+                **percentiles(latencies),
+                "hit_rate": (cache.hits - hits) / lookups if lookups else 0.0,
+                "entries": cache.stats()["entries"],
+                "agreement": sum(a == b for a, b in zip(outcomes, reference)) / len(reference),
+            })
+            main.store.clear()
+    main.inference_pool.shutdown()
+    return len(readings), results
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_model_args(parser)
+    parser.add_argument("--passes", type=int, default=2)
+    args = parser.parse_args()
+
+    model = build_model(args)
+    n, results = asyncio.run(run(model, args.passes))
+
+    print(f"{n} readings per pass")
+    print(f"{'cache':>12} {'pass':>5} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'hit rate':>9} "
+          f"{'entries':>8} {'agreement':>10}")
+    for r in results:
+        print(f"{r['setting']:>12} {r['pass']:>5} {r['per_s']:>8.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+              f"{r['hit_rate']:>9.1%} {r['entries']:>8} {r['agreement']:>10.1%}")
+
+
+if __name__ == "__main__":
+    main_()
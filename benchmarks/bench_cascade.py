@@ -0,0 +1,129 @@
+"""
+Cascade inference (cascade.ScreeningStage in front of the full model) on
+healthy/faulty mixes: how many readings the screen clears, how many of those
+the full model would not have called healthy (false clears), and throughput
+vs the full model alone, in batches and one reading at a time.
+
+    python -m benchmarks.bench_cascade [--quick | --artifact PATH] [--mixes 0.5 0.8 0.95 0.99]
+
+"Healthy" is the full model's label (severity and fault type both healthy),
+so a mix's share is of readings the full model calls healthy. The screen is
+calibrated for each mix's share, as an operator would set
+CASCADE_HEALTHY_SHARE for their fleet.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks._common import add_model_args, build_model, percentiles
+from cascade import ScreeningStage, full_model_healthy
+from model import PredictiveMaintenanceAIOnly
+
+
+def labelled_pool(model, n, seed):
+    """n fresh readings and whether the full model calls each one healthy."""
+    cols = PredictiveMaintenanceAIOnly._simulate(np.random.default_rng(seed), n, 1000)
+    X = np.column_stack([cols[c] for c in model.feature_cols]).astype(float)
+    return X, full_model_healthy(model._predict_columns(X))
+
+
+def mix(X, healthy, share, n, rng):
+    n_healthy = int(round(n * share))
+    rows = np.concatenate([
+        rng.choice(np.nonzero(healthy)[0], n_healthy),
+        rng.choice(np.nonzero(~healthy)[0], n - n_healthy),
+    ])
+    rng.shuffle(rows)
+    return X[rows], healthy[rows]
+
+
+def throughput(model, X, batch_size):
+    start = time.perf_counter()
+    for i in range(0, len(X), batch_size):
+        model.predict_columns(X[i:i + batch_size])
+    return len(X) / (time.perf_counter() - start)
+
+
+def single_latency(model, X):
+    model.predict_batch(X[:1])
+    durations = []
+    for row in X:
+        start = time.perf_counter()
+        model.predict_batch(row[np.newaxis])
+        durations.append(time.perf_counter() - start)
+    return percentiles(durations)["p50_ms"]
+
+
+def run(model, mixes, max_false_clear, max_faulty_cleared, n_readings, batch_size, n_single):
+    X_pool, healthy_pool = labelled_pool(model, max(4 * n_readings, 20000), seed=2)
+    rng = np.random.default_rng(3)
+    rows = []
+    for share in mixes:
+        X, healthy = mix(X_pool, healthy_pool, share, n_readings, rng)
+
+        model.screen = None
+        full_rate = throughput(model, X, batch_size)
+        full_ms = single_latency(model, X[:n_single])
+
+        start = time.perf_counter()
+        screen = ScreeningStage.fit(model, max_false_clear=max_false_clear,
+                                    max_faulty_cleared=max_faulty_cleared, healthy_share=share)
+        fit_s = time.perf_counter() - start
+        cleared = screen.scores(X) >= screen.threshold
+        model.screen = screen
+        cascade_rate = throughput(model, X, batch_size)
+        cascade_ms = single_latency(model, X[:n_single])
+        model.screen = None
+
+        rows.append({
+            "healthy_share": share,
+            "cleared": cleared.mean(),
+            "false_clear": (~healthy[cleared]).mean() if cleared.any() else 0.0,
+            "faulty_cleared": cleared[~healthy].mean() if (~healthy).any() else 0.0,
+            "calibrated_false_clear": screen.calibration["false_clear_rate"],
+            "full_rows_s": full_rate,
+            "cascade_rows_s": cascade_rate,
+            "full_ms": full_ms,
+            "cascade_ms": cascade_ms,
+            "fit_s": fit_s,
+        })
+    return rows
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_model_args(parser)
+    parser.add_argument("--artifact", help="load this saved model instead of training one")
+    parser.add_argument("--mixes", type=float, nargs="+", default=[0.5, 0.8, 0.95, 0.99],
+                        help="shares of healthy readings to test")
+    parser.add_argument("--max-false-clear", type=float, default=0.01)
+    parser.add_argument("--max-faulty-cleared", type=float, default=0.05)
+    parser.add_argument("--readings", type=int, default=10000, help="readings per mix")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--single", type=int, default=300, help="readings timed one at a time")
+    args = parser.parse_args()
+
+    if args.artifact:
+        model = PredictiveMaintenanceAIOnly()
+        if not model.load(args.artifact):
+            raise SystemExit(f"Could not load {args.artifact}")
+    else:
+        model = build_model(args)
+
+    rows = run(model, args.mixes, args.max_false_clear, args.max_faulty_cleared,
+               args.readings, args.batch_size, args.single)
+    print(f"max false-clear rate {args.max_false_clear:.1%}, max faulty cleared {args.max_faulty_cleared:.1%}, "
+          f"batches of {args.batch_size}")
+    print(f"{'healthy':>8} {'cleared':>8} {'false':>7} {'faulty':>8} {'full':>9} {'cascade':>9} "
+          f"{'speedup':>8} {'full':>8} {'cascade':>8} {'fit':>6}")
+    print(f"{'share':>8} {'':>8} {'clears':>7} {'cleared':>8} {'rows/s':>9} {'rows/s':>9} "
+          f"{'':>8} {'p50 ms':>8} {'p50 ms':>8} {'s':>6}")
+    for r in rows:
+        print(f"{r['healthy_share']:>8.0%} {r['cleared']:>8.1%} {r['false_clear']:>7.2%} {r['faulty_cleared']:>8.2%} "
+              f"{r['full_rows_s']:>9.0f} {r['cascade_rows_s']:>9.0f} {r['cascade_rows_s'] / r['full_rows_s']:>7.2f}x "
+              f"{r['full_ms']:>8.2f} {r['cascade_ms']:>8.2f} {r['fit_s']:>6.1f}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,126 @@
+"""
+Compressed model profiles (compression.PROFILES) against the full model:
+held-out fault/severity accuracy, agreement with the full model and RUL error
+vs trees, nodes, engine memory, artifact size, load time and per-row latency.
+
+    python -m benchmarks.bench_compression [--quick | --artifact PATH] [--profiles full balanced compact]
+                                           [--output report.json]
+
+Held-out readings come from compression.holdout_set(), a seed no model is
+trained on. Load time is a fresh load() of the profile's saved artifact,
+including building the inference engine.
+"""
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+
+import compression
+from benchmarks._common import add_model_args, build_model, percentiles, sample_readings
+from model import PredictiveMaintenanceAIOnly
+
+
+def load_time(path, n_samples, spec):
+    gc.collect()
+    start = time.perf_counter()
+    loaded = PredictiveMaintenanceAIOnly()
+    if not loaded.load(path, n_samples=n_samples, profile=spec):
+        raise RuntimeError(f"could not load {path}")
+    return time.perf_counter() - start
+
+
+def latency(model, readings, X):
+    model.predict(readings[0])
+    durations = []
+    for reading in readings:
+        start = time.perf_counter()
+        model.predict(reading)
+        durations.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    model.predict_columns(X)
+    return percentiles(durations)["p50_ms"], len(X) / (time.perf_counter() - start)
+
+
+def run(full, names, n_single, n_holdout, artifact=None, artifact_load_s=None):
+    holdout = compression.holdout_set(n_holdout)
+    reference = full._predict_columns(holdout[0])
+    readings = sample_readings(full, n_single, seed=1)
+    X_batch = holdout[0][:10000]
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names:
+            spec = compression.profile_spec(name)
+            start = time.perf_counter()
+            model = compression.compress(full, spec)
+            compress_s = time.perf_counter() - start
+
+            if name == "full" and artifact:
+                # The full artifact is too big to have loaded twice
+                path, load_s = artifact, artifact_load_s
+            else:
+                path = compression.profile_artifact_path(os.path.join(tmp, "model.joblib"), name)
+                model.save(path)
+                load_s = load_time(path, full.n_samples, spec)
+
+            p50_ms, rows_s = latency(model, readings, X_batch)
+            rows.append(dict(
+                profile=name,
+                compress_s=compress_s,
+                artifact_mb=os.path.getsize(path) / 2**20,
+                load_s=load_s,
+                p50_ms=p50_ms,
+                batch_rows_s=rows_s,
+                **compression.size(model),
+                **compression.evaluate(model, holdout, reference),
+            ))
+            if path != artifact:
+                os.remove(path)
+            del model
+            gc.collect()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_model_args(parser)
+    parser.add_argument("--artifact", help="load this saved model instead of training one")
+    parser.add_argument("--profiles", nargs="+", default=list(compression.PROFILES),
+                        choices=list(compression.PROFILES))
+    parser.add_argument("--single", type=int, default=300, help="readings timed one at a time")
+    parser.add_argument("--holdout", type=int, default=20000, help="held-out readings scored")
+    parser.add_argument("--output", help="also write the report as JSON here")
+    args = parser.parse_args()
+
+    artifact_load_s = None
+    if args.artifact:
+        start = time.perf_counter()
+        full = PredictiveMaintenanceAIOnly()
+        if not full.load(args.artifact, n_samples=args.n_samples):
+            raise SystemExit(f"Could not load {args.artifact}")
+        artifact_load_s = time.perf_counter() - start
+    else:
+        full = build_model(args)
+
+    rows = run(full, args.profiles, args.single, args.holdout, args.artifact, artifact_load_s)
+    print(f"{'profile':>10} {'trees':>6} {'nodes':>9} {'engine':>8} {'artifact':>9} {'load':>6} "
+          f"{'p50':>6} {'batch':>8} {'fault':>6} {'sev':>6} {'fault':>6} {'sev':>6} {'RUL':>6}")
+    print(f"{'':>10} {'':>6} {'':>9} {'MB':>8} {'MB':>9} {'s':>6} "
+          f"{'ms':>6} {'rows/s':>8} {'acc':>6} {'acc':>6} {'agree':>6} {'agree':>6} {'MAE h':>6}")
+    for r in rows:
+        print(f"{r['profile']:>10} {r['trees']:>6} {r['nodes']:>9} {r['engine_mb']:>8.1f} {r['artifact_mb']:>9.1f} "
+              f"{r['load_s']:>6.2f} {r['p50_ms']:>6.2f} {r['batch_rows_s']:>8.0f} "
+              f"{r['fault_accuracy']:>6.1%} {r['severity_accuracy']:>6.1%} "
+              f"{r['fault_agreement']:>6.1%} {r['severity_agreement']:>6.1%} {r['rul_mae_hours']:>6.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": rows}, f, indent=2, default=float)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+/health latency while concurrent /predict calls are running, with inference
+inline on the event loop vs on the inference pool.
+
+    python -m benchmarks.bench_event_loop [--quick] [--concurrency 16] [--seconds 5]
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks._asgi import request_json
+from benchmarks._common import add_model_args, build_model, percentiles, sample_readings
+from inference import InferencePool
+
+import main
+
+
+async def load_phase(readings, concurrency, seconds, probe_interval=0.01):
+    stop = time.perf_counter() + seconds
+    counts = {"ok": 0, "rejected": 0}
+    health_latency = []
+
+    async def predictor(worker):
+        i = worker
+        while time.perf_counter() < stop:
+            status, _ = await request_json(main.app, "POST", "/predict", readings[i % len(readings)])
+            i += concurrency
+            if status == 200:
+                counts["ok"] += 1
+            else:
+                # back off after a 503, as a real client would
+                counts["rejected"] += 1
+                await asyncio.sleep(0.005)
+
+    async def prober():
+        # measured from when the probe should fire, so time spent waiting for a
+        # blocked event loop counts, as it would for a real client
+        while time.perf_counter() < stop:
+            due = time.perf_counter() + probe_interval
+            await asyncio.sleep(probe_interval)
+            await request_json(main.app, "GET", "/health")
+            health_latency.append(time.perf_counter() - due)
+
+    await asyncio.gather(prober(), *(predictor(w) for w in range(concurrency)))
+    return {
+        "predict_per_s": counts["ok"] / seconds,
+        "rejected": counts["rejected"],
+        "health": percentiles(health_latency),
+    }
+
+
+async def run(model, kinds, concurrency, seconds, workers, max_pending):
+    main.model = model
+    readings = sample_readings(model, 500)
+    results = {}
+    for kind in kinds:
+        main.inference_pool = InferencePool(kind=kind, workers=workers, max_pending=max_pending)
+        await main.startup_event()
+
+        idle = await load_phase(readings, 0, 1.0)
+        loaded = await load_phase(readings, concurrency, seconds)
+        results[kind] = {"idle_health": idle["health"], **loaded}
+
+        main.inference_pool.shutdown()
+        main.store.clear()
+    return results
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_model_args(parser)
+    parser.add_argument("--kinds", nargs="+", default=["inline", "thread"])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-pending", type=int, default=64)
+    args = parser.parse_args()
+
+    model = build_model(args)
+    results = asyncio.run(run(model, args.kinds, args.concurrency, args.seconds, args.workers, args.max_pending))
+
+    print(f"{'pool':>8} {'idle p50':>9} {'load p50':>9} {'load p99':>9} {'predict/s':>10} {'503s':>6}   (/health ms)")
+    for kind, r in results.items():
+        print(f"{kind:>8} {r['idle_health']['p50_ms']:>9.2f} {r['health']['p50_ms']:>9.2f} "
+              f"{r['health']['p99_ms']:>9.2f} {r['predict_per_s']:>10.1f} {r['rejected']:>6}")
+
+
+if __name__ == "__main__":
+    main_()
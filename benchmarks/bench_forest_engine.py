@@ -0,0 +1,71 @@
+"""
+Single-row latency of the flat-array forest engine vs the stock sklearn forests.
+
+    python -m benchmarks.bench_forest_engine [--quick] [--rows 300]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks._common import add_model_args, build_model, percentiles, sample_readings
+
+
+def stock_predict(model, x_scaled):
+    return {
+        "fault": model.fault_model.predict_proba(x_scaled),
+        "severity": model.severity_model.predict_proba(x_scaled),
+        "rul": model.rul_model.predict(x_scaled),
+    }
+
+
+def run(model, n_rows):
+    readings = sample_readings(model, n_rows)
+    X_scaled = model.scaler.transform(model._as_matrix(readings))
+
+    # outputs must be bit-for-bit identical, for the batch and for single rows
+    expected = stock_predict(model, X_scaled)
+    actual = model.engine.predict(X_scaled)
+    for name in expected:
+        if not np.array_equal(expected[name], actual[name]):
+            raise AssertionError(f"engine output for {name!r} differs from sklearn")
+
+    timings = {"sklearn": [], "engine": []}
+    for i in range(n_rows):
+        x = X_scaled[i:i + 1]
+
+        start = time.perf_counter()
+        stock = stock_predict(model, x)
+        timings["sklearn"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        flat = model.engine.predict(x)
+        timings["engine"].append(time.perf_counter() - start)
+
+        for name in stock:
+            if not np.array_equal(stock[name], flat[name]):
+                raise AssertionError(f"engine output for {name!r} differs from sklearn on row {i}")
+
+    return {name: percentiles(samples) for name, samples in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_model_args(parser)
+    parser.add_argument("--rows", type=int, default=300)
+    args = parser.parse_args()
+
+    model = build_model(args)
+    engine = model.engine
+    print(f"engine: {len(engine.roots)} trees, {len(engine.feature)} nodes, "
+          f"max depth {engine.max_depth}, {engine.nbytes / 1e6:.1f} MB")
+
+    results = run(model, args.rows)
+    print(f"{'path':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, stats in results.items():
+        print(f"{name:>8} {stats['p50_ms']:>9.3f} {stats['p99_ms']:>9.3f}")
+    print(f"p50 speedup: {results['sklearn']['p50_ms'] / results['engine']['p50_ms']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cost of metrics recording on POST /predict and POST /predict/batch, with
+metrics off (METRICS_ENABLED=0) and on, plus the time to render a /metrics
+scrape. The prediction cache is disabled so every request reaches the model.
+
+    python -m benchmarks.bench_metrics [--quick] [--requests 2000]
+"""
+import argparse
+import asyncio
+import time
+
+import metrics
+from benchmarks._asgi import request, request_json
+from benchmarks._common import add_model_args, build_model, percentiles, sample_readings
+from prediction_cache import PredictionCache
+
+import main
+
+
+async def replay(path, bodies, latencies):
+    """Send each body twice, once with metrics off and once on, alternating which goes first."""
+    for i, body in enumerate(bodies):
+        for enabled in ((False, True) if i % 2 else (True, False)):
+            metrics.enabled = enabled
+            start = time.perf_counter()
+            status, _ = await request_json(main.app, "POST", path, body)
+            latencies.setdefault((path, enabled), []).append(time.perf_counter() - start)
+            assert status == 200, status
+    metrics.enabled = True
+
+
+async def run(model, n_requests, rounds):
+    main.model = model
+    main.prediction_cache = PredictionCache(max_entries=0)
+    await main.startup_event()
+    readings = sample_readings(model, n_requests)
+    workloads = {
+        "/predict": [dict(r, machine_id=f"m{i % 50}") for i, r in enumerate(readings)],
+        "/predict/batch": [{"readings": readings[i:i + 32]} for i in range(0, n_requests, 32)],
+    }
+
+    await replay("/predict", workloads["/predict"][:100], {})  # warm-up
+    # Off and on requests are interleaved so drift (GC, history growth) hits both equally
+    samples = {}
+    for _ in range(rounds):
+        for path, bodies in workloads.items():
+            await replay(path, bodies, samples)
+        main.store.clear()
+
+    scrape = []
+    for _ in range(50):
+        start = time.perf_counter()
+        await request(main.app, "GET", "/metrics")
+        scrape.append(time.perf_counter() - start)
+    main.inference_pool.shutdown()
+    return samples, percentiles(scrape), len(metrics.render().splitlines())
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_model_args(parser)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    model = build_model(args)
+    samples, scrape, lines = asyncio.run(run(model, args.requests, args.rounds))
+
+    print(f"{'endpoint':>15} {'metrics':>8} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for (path, enabled), latencies in sorted(samples.items()):
+        p = percentiles(latencies)
+        mean_ms = sum(latencies) / len(latencies) * 1000
+        print(f"{path:>15} {'on' if enabled else 'off':>8} {p['p50_ms']:>8.3f} {p['p99_ms']:>8.3f} {mean_ms:>8.3f}")
+    print(f"/metrics scrape ({lines} lines): p50 {scrape['p50_ms']:.3f} ms, p99 {scrape['p99_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,85 @@
+"""
+Single-request latency of PredictiveMaintenanceAIOnly.predict vs the original
+predict + predict_proba implementation.
+
+    python -m benchmarks.bench_predict_latency [--quick] [--requests 200]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks._common import add_model_args, build_model, percentiles, sample_readings
+
+
+def legacy_predict(model, sensor_data):
+    """The pre-fast-path predict(): separate predict/predict_proba calls, Python sort + round."""
+    x = np.array([[sensor_data[c] for c in model.feature_cols]], dtype=float)
+    x_scaled = model.scaler.transform(x)
+
+    fault_pred = model.fault_model.predict(x_scaled)[0]
+    fault_proba = model.fault_model.predict_proba(x_scaled)[0]
+    fault_prob_map = {cls: float(prob) for cls, prob in zip(model.fault_model.classes_, fault_proba)}
+
+    sev_pred = model.severity_model.predict(x_scaled)[0]
+    sev_proba = model.severity_model.predict_proba(x_scaled)[0]
+    sev_prob_map = {cls: float(prob) for cls, prob in zip(model.severity_model.classes_, sev_proba)}
+
+    rul_pred = max(0.0, float(model.rul_model.predict(x_scaled)[0]))
+
+    rec = model.recommender.predict(x_scaled)[0]
+
+    return {
+        "predicted_fault_type": fault_pred,
+        "fault_probabilities": {k: round(v, 3) for k, v in sorted(fault_prob_map.items(), key=lambda x: -x[1])},
+        "predicted_severity": sev_pred,
+        "severity_probabilities": {k: round(v, 3) for k, v in sorted(sev_prob_map.items(), key=lambda x: -x[1])},
+        "predicted_rul_hours": int(round(rul_pred)),
+        "recommendation": rec
+    }
+
+
+def time_calls(fn, readings):
+    samples = []
+    for reading in readings:
+        start = time.perf_counter()
+        fn(reading)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def run(model, n_requests):
+    readings = sample_readings(model, n_requests)
+
+    mismatches = sum(legacy_predict(model, r) != model.predict(r) for r in readings[:50])
+    if mismatches:
+        raise AssertionError(f"fast path disagrees with legacy predict on {mismatches} readings")
+
+    # warm up both paths before timing
+    for reading in readings[:5]:
+        legacy_predict(model, reading)
+        model.predict(reading)
+
+    return {
+        "legacy": time_calls(lambda r: legacy_predict(model, r), readings),
+        "predict": time_calls(model.predict, readings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_model_args(parser)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    model = build_model(args)
+    results = run(model, args.requests)
+
+    print(f"{'path':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, stats in results.items():
+        print(f"{name:>8} {stats['p50_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+    print(f"p50 speedup: {results['legacy']['p50_ms'] / results['predict']['p50_ms']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
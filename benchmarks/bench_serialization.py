@@ -0,0 +1,120 @@
+"""
+Encode cost of API responses: FastAPI's generic path (response_model
+validation / jsonable_encoder, then JSONResponse) vs serialization.py
+(orjson, the stdlib json fallback and MessagePack if msgpack is installed),
+for one POST /predict response and for a 1,000-entry GET /history page.
+
+    python -m benchmarks.bench_serialization [--repeat 2000]
+
+Every encoding is decoded and checked against FastAPI's output first.
+"""
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import time
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+import serialization
+from benchmarks.bench_storage_ingest import fake_predictions
+from machine_state import feature_names
+from storage import MemoryStore
+
+
+def prediction_response():
+    """A POST /predict response of a machine with rolling features"""
+    _, _, prediction = next(fake_predictions(1, 1))
+    rng = np.random.default_rng(0)
+    features = {name: float(rng.normal()) for name in feature_names((10, 60))}
+    return {**prediction, "timestamp": datetime.datetime.now().isoformat(), "machine_features": features}
+
+
+def history_page(n):
+    store = MemoryStore(history_capacity=n)
+    now = datetime.datetime.now()
+    for i, (machine_id, sensor_data, prediction) in enumerate(fake_predictions(n, 100)):
+        prediction["timestamp"] = (now - datetime.timedelta(seconds=n - i)).isoformat()
+        store.add_prediction(sensor_data, prediction, machine_id)
+    return store.history(limit=n)
+
+
+def fastapi_encoder(response_field):
+    """What FastAPI does with a handler's return value (validation only with a response_model)"""
+    loop = asyncio.new_event_loop()
+
+    def encode(content):
+        if response_field is None:
+            return JSONResponse(jsonable_encoder(content)).body
+        return JSONResponse(loop.run_until_complete(
+            serialize_response(field=response_field, response_content=content)
+        )).body
+    return encode
+
+
+def stdlib_json(content):
+    orjson, serialization.orjson = serialization.orjson, None
+    try:
+        return serialization.encode_json(content)
+    finally:
+        serialization.orjson = orjson
+
+
+def encoders(response_field):
+    out = {"fastapi": (fastapi_encoder(response_field), json.loads)}
+    if serialization.orjson is not None:
+        out["orjson"] = (serialization.encode_json, json.loads)
+    out["json"] = (stdlib_json, json.loads)
+    if serialization.msgpack is not None:
+        out["msgpack"] = (serialization.encode_msgpack, serialization.msgpack.unpackb)
+    return out
+
+
+def run(name, content, response_field, repeat):
+    results = {}
+    expected = None
+    for encoder, (encode, decode) in encoders(response_field).items():
+        body = encode(content)
+        decoded = decode(body)
+        if expected is None:
+            expected = decoded
+        elif decoded != expected:
+            raise AssertionError(f"{encoder} encoding of {name} differs from FastAPI's")
+
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            encode(content)
+        results[encoder] = {"us": (time.perf_counter() - start) / repeat * 1e6, "bytes": len(body)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000, help="encodes per single response")
+    parser.add_argument("--history", type=int, default=1000, help="entries in the history page")
+    args = parser.parse_args()
+
+    import main as api
+    predict_route = next(r for r in api.app.routes if getattr(r, "path", None) == "/predict")
+
+    cases = [
+        ("predict", prediction_response(), predict_route.response_field, args.repeat),
+        (f"history.{args.history}", history_page(args.history), None, max(args.repeat // 100, 10)),
+    ]
+    if serialization.msgpack is None:
+        print("msgpack is not installed: MessagePack not measured")
+    print(f"{'response':>14} {'encoder':>8} {'us':>10} {'bytes':>9} {'speedup':>8}")
+    for name, content, field, repeat in cases:
+        results = run(name, content, field, repeat)
+        base = results["fastapi"]["us"]
+        for encoder, r in results.items():
+            print(f"{name:>14} {encoder:>8} {r['us']:>10.1f} {r['bytes']:>9} {base / r['us']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+API cold start: import time of main, then a real uvicorn server started in a
+fresh process and polled until /health answers, the model is ready and the
+first POST /predict succeeds.
+
+    python -m benchmarks.bench_startup [--runs 3] [--artifact PATH]
+
+With no artifact at MODEL_ARTIFACT_PATH the server trains the model first,
+which takes minutes; point --artifact at a saved one to measure the load path.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+READING = {"temperature": 72.0, "vibration": 3.1, "pressure": 110.0, "rpm": 2100.0, "machine_id": "bench"}
+
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import main
+print(time.perf_counter() - start, "pandas" in sys.modules, "sklearn" in sys.modules)
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def call(port, method, path, body=None):
+    """(status, parsed JSON body), or (None, None) if the server is not accepting connections yet."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        payload = json.dumps(body) if body is not None else None
+        conn.request(method, path, payload, {"Content-Type": "application/json"} if payload else {})
+        response = conn.getresponse()
+        content = response.read()
+        return response.status, json.loads(content) if content else None
+    except (ConnectionError, OSError):
+        return None, None
+    finally:
+        conn.close()
+
+
+def import_time(env):
+    out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), out[1] == "True", out[2] == "True"
+
+
+def cold_start(env, timeout):
+    """Seconds from process start to: /health answering, model ready, first prediction."""
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    marks = {}
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"server exited with status {server.returncode}")
+            status, body = call(port, "GET", "/health")
+            if status == 200:
+                marks.setdefault("health", time.perf_counter() - started)
+                # APIs without the model_loading flag only answer once the model is ready
+                if not body.get("model_loading", False):
+                    marks.setdefault("model_ready", time.perf_counter() - started)
+                    status, _ = call(port, "POST", "/predict", READING)
+                    if status == 200:
+                        marks["first_prediction"] = time.perf_counter() - started
+                        return marks
+            time.sleep(0.02)
+        raise RuntimeError(f"no prediction within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--artifact", help="model artifact to load (default: MODEL_ARTIFACT_PATH)")
+    parser.add_argument("--timeout", type=float, default=900.0)
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    if args.artifact:
+        env["MODEL_ARTIFACT_PATH"] = os.path.abspath(args.artifact)
+
+    imports = [import_time(env) for _ in range(args.runs)]
+    print(f"import main: median {statistics.median(t for t, _, _ in imports):.3f}s "
+          f"(pandas imported: {imports[0][1]}, sklearn imported: {imports[0][2]})")
+
+    runs = [cold_start(env, args.timeout) for _ in range(args.runs)]
+    print(f"{'run':>4} {'/health s':>10} {'model ready s':>14} {'first prediction s':>19}")
+    for i, marks in enumerate(runs, 1):
+        print(f"{i:>4} {marks['health']:>10.2f} {marks['model_ready']:>14.2f} {marks['first_prediction']:>19.2f}")
+    for key in ("health", "model_ready", "first_prediction"):
+        print(f"median {key}: {statistics.median(m[key] for m in runs):.2f}s")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,110 @@
+"""
+Sustained ingest into the SQLite history store at a fixed reading rate, then
+range-query latency over what was written.
+
+    python -m benchmarks.bench_storage_ingest [--rate 5000] [--seconds 10] [--machines 100]
+"""
+import argparse
+import datetime
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks._common import percentiles
+from storage import SQLiteStore
+
+
+def fake_predictions(n, n_machines, seed=0):
+    """Readings and predictions shaped like the API's, without running the model."""
+    rng = np.random.default_rng(seed)
+    statuses = np.array(["Healthy", "Warning", "Critical"])
+    status = statuses[rng.choice(3, n, p=[0.8, 0.15, 0.05])]
+    for i in range(n):
+        yield (
+            f"machine-{rng.integers(n_machines)}",
+            {
+                "temperature": float(rng.normal(60, 8)), "vibration": float(rng.normal(3.5, 0.8)),
+                "pressure": float(rng.normal(115, 10)), "rpm": float(rng.normal(2100, 150)),
+            },
+            {
+                "health_status": str(status[i]), "failure_risk": int(rng.integers(0, 100)),
+                "anomaly_detected": bool(status[i] != "Healthy"), "anomaly_probability": float(rng.random()),
+                "root_cause": "Normal operation", "recommendation": "No action needed. Continue monitoring.",
+                "remaining_useful_life": int(rng.integers(0, 1000)),
+            },
+        )
+
+
+def run(path, rate, seconds, n_machines):
+    store = SQLiteStore(path)
+    total = int(rate * seconds)
+    put_latency = []
+    max_backlog = 0
+
+    start = time.perf_counter()
+    for i, (machine_id, sensor_data, prediction) in enumerate(fake_predictions(total, n_machines)):
+        # pace the producer to the target rate
+        due = start + i / rate
+        now = time.perf_counter()
+        if due > now:
+            time.sleep(due - now)
+        prediction["timestamp"] = datetime.datetime.now().isoformat()
+
+        t = time.perf_counter()
+        store.add_prediction(sensor_data, prediction, machine_id)
+        put_latency.append(time.perf_counter() - t)
+        if i % 1000 == 0:
+            max_backlog = max(max_backlog, store._queue.qsize())
+    produced = time.perf_counter() - start
+
+    t = time.perf_counter()
+    store.flush()
+    drain = time.perf_counter() - t
+    elapsed = time.perf_counter() - start
+
+    end_ts = datetime.datetime.now()
+    start_ts = end_ts - datetime.timedelta(seconds=seconds)
+    query_latency = []
+    for i in range(20):
+        t = time.perf_counter()
+        store.history(limit=0, start=start_ts, end=end_ts, machine_id=f"machine-{i}", max_points=100)
+        query_latency.append(time.perf_counter() - t)
+
+    count = store.history_count()
+    store.close()
+    return {
+        "rows": count,
+        "target_rows_per_s": rate,
+        "achieved_rows_per_s": total / produced,
+        "committed_rows_per_s": count / elapsed,
+        "max_backlog": max_backlog,
+        "final_drain_s": drain,
+        "put": percentiles(put_latency),
+        "range_query": percentiles(query_latency),
+        "db_mb": os.path.getsize(path) / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=5000)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--machines", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        r = run(os.path.join(tmp, "bench.db"), args.rate, args.seconds, args.machines)
+
+    print(f"rows written:      {r['rows']} ({r['db_mb']:.1f} MB)")
+    print(f"producer rate:     {r['achieved_rows_per_s']:.0f}/s (target {r['target_rows_per_s']:.0f}/s)")
+    print(f"committed rate:    {r['committed_rows_per_s']:.0f}/s, max backlog {r['max_backlog']}, "
+          f"final drain {r['final_drain_s'] * 1000:.0f} ms")
+    print(f"enqueue latency:   p50 {r['put']['p50_ms'] * 1000:.1f} us, p99 {r['put']['p99_ms'] * 1000:.1f} us")
+    print(f"range query (1 machine, 100 points): p50 {r['range_query']['p50_ms']:.2f} ms, "
+          f"p99 {r['range_query']['p99_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Training wall-clock time and peak memory per stage: forests fitted one after
+another vs concurrently, and a warm-start update with field data vs a full
+refit.
+
+    python -m benchmarks.bench_training [--quick] [--n-jobs 1] [--field-rows 5000] [--new-trees 50]
+
+Peak memory is the highest resident memory sampled during each stage, and
++MB how far it rose above the memory in use when the stage started. Every run
+happens in a fresh subprocess, so runs do not inherit each other's memory.
+"""
+import argparse
+import json
+import multiprocessing
+
+from model import PredictiveMaintenanceAIOnly
+
+
+def make_model(args):
+    model = PredictiveMaintenanceAIOnly(n_jobs=args.n_jobs)
+    if args.quick:
+        for forest in (model.fault_model, model.severity_model, model.rul_model):
+            forest.set_params(n_estimators=30)
+    return model
+
+
+def n_samples(args):
+    return min(args.n_samples, 5000) if args.quick else args.n_samples
+
+
+def train_run(args, parallel, out):
+    model = make_model(args)
+    model.train(n_samples=n_samples(args), parallel=parallel)
+    out.put(model.training_stats)
+
+
+def update_run(args, out):
+    model = make_model(args)
+    model.train(n_samples=n_samples(args))
+    # labeled field data: a fresh draw from the simulator with another seed
+    field = PredictiveMaintenanceAIOnly(random_state=7).generate_synthetic_dataset(args.field_rows)
+    out.put(model.update(field, new_trees=(args.new_trees,) * 3))
+
+
+def in_subprocess(target, *args):
+    ctx = multiprocessing.get_context("fork")
+    out = ctx.Queue()
+    proc = ctx.Process(target=target, args=(*args, out))
+    proc.start()
+    result = out.get()
+    proc.join()
+    return result
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n-samples", type=int, default=30000)
+    parser.add_argument("--quick", action="store_true", help="30-tree forests on 5000 rows")
+    parser.add_argument("--n-jobs", type=int, default=None, help="cores per forest (default: 1)")
+    parser.add_argument("--field-rows", type=int, default=5000)
+    parser.add_argument("--new-trees", type=int, default=50, help="trees added per forest (--quick: 10)")
+    parser.add_argument("--json", action="store_true", help="print raw stats as JSON")
+    args = parser.parse_args()
+    if args.quick:
+        args.new_trees = min(args.new_trees, 10)
+
+    results = {
+        "sequential": in_subprocess(train_run, args, False),
+        "concurrent": in_subprocess(train_run, args, True),
+        "warm start": in_subprocess(update_run, args),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"cpus: {multiprocessing.cpu_count()}, n_jobs per forest: {args.n_jobs or 1}")
+    stages = ["dataset", "scaler", "fault_model", "severity_model", "rul_model", "forests",
+              "recommender", "engine", "total"]
+    print(f"{'stage':>15}" + "".join(f"{name:>30}" for name in results))
+    print(f"{'':>15}" + f"{'seconds  peak MB  +MB':>30}" * len(results))
+    for stage in stages:
+        row = f"{stage:>15}"
+        for stats in results.values():
+            s = stats.get(stage)
+            if s is None or s["peak_rss_mb"] is None:
+                row += f"{s['seconds']:>12.2f}{'-':>9}{'-':>9}" if s else f"{'-':>30}"
+            else:
+                row += f"{s['seconds']:>12.2f}{s['peak_rss_mb']:>9.0f}{s['peak_increase_mb']:>+9.0f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main_()
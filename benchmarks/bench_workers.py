@@ -0,0 +1,175 @@
+"""
+Memory per worker and /predict throughput of the pre-fork server (serve.py)
+with 1, 2, 4 and 8 workers sharing one loaded model.
+
+    python -m benchmarks.bench_workers [--quick] [--workers 1 2 4 8] [--clients 16] [--seconds 10]
+
+The model is trained once and saved to a temporary artifact; each server run
+loads it in the parent and forks its workers. Memory is read from
+/proc/<pid>/smaps_rollup: RSS counts shared pages in full for every process,
+PSS splits them between the processes sharing them, and Private is what a
+worker holds on its own.
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks._common import add_model_args, build_model, sample_readings
+
+
+def child_pids(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def memory_mb(pid):
+    """RSS, PSS and private memory of a process, in MB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024.0
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "private": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port, timeout=600):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not come up")
+
+
+def client(port, bodies, seconds, out):
+    """POST /predict over one keep-alive connection until time runs out."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {"Content-Type": "application/json"}
+    ok = 0
+    i = 0
+    stop = time.perf_counter() + seconds
+    while time.perf_counter() < stop:
+        conn.request("POST", "/predict", bodies[i % len(bodies)], headers)
+        response = conn.getresponse()
+        response.read()
+        ok += response.status == 200
+        i += 1
+    out.put(ok)
+
+
+def drive(port, bodies, clients, seconds):
+    ctx = multiprocessing.get_context("fork")
+    out = ctx.Queue()
+    procs = [ctx.Process(target=client, args=(port, bodies[c::clients], seconds, out)) for c in range(clients)]
+    for p in procs:
+        p.start()
+    total = sum(out.get() for _ in procs)
+    for p in procs:
+        p.join()
+    return total / seconds
+
+
+def run_server_child(args):
+    """Server side of one run: load the saved model into main.model and serve."""
+    import main
+    import serve
+
+    model = build_model_params(args)
+    if not model.load(args.artifact, n_samples=args.n_samples_used):
+        raise SystemExit(f"could not load {args.artifact}")
+    main.model = model
+    serve.serve("127.0.0.1", args.port, args.serve_workers, log_level="warning")
+
+
+def build_model_params(args):
+    """An untrained model with the same parameters build_model(args) trains."""
+    from model import PredictiveMaintenanceAIOnly
+
+    model = PredictiveMaintenanceAIOnly()
+    if args.quick:
+        for forest in (model.fault_model, model.severity_model, model.rul_model):
+            forest.set_params(n_estimators=30)
+    return model
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_model_args(parser)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    # internal: run as the server process of one measurement
+    parser.add_argument("--serve-workers", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--artifact", help=argparse.SUPPRESS)
+    parser.add_argument("--n-samples-used", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_workers:
+        run_server_child(args)
+        return
+
+    model = build_model(args)
+    n_samples = model.n_samples
+    bodies = [json.dumps(r) for r in sample_readings(model, 1000)]
+    tmp = tempfile.TemporaryDirectory()
+    artifact = os.path.join(tmp.name, "model.joblib")
+    model.save(artifact)
+    del model
+    print(f"cpus: {os.cpu_count()}, clients: {args.clients}")
+
+    results = {}
+    for workers in args.workers:
+        port = free_port()
+        cmd = [sys.executable, "-m", "benchmarks.bench_workers", "--serve-workers", str(workers),
+               "--port", str(port), "--artifact", artifact, "--n-samples-used", str(n_samples)]
+        if args.quick:
+            cmd.append("--quick")
+        server = subprocess.Popen(cmd, env={**os.environ, "STORAGE_BACKEND": "memory"})
+        try:
+            wait_ready(port)
+            predict_per_s = drive(port, bodies, args.clients, args.seconds)
+            worker_mem = [memory_mb(pid) for pid in child_pids(server.pid)]
+            results[workers] = {
+                "predict_per_s": predict_per_s,
+                "parent": memory_mb(server.pid),
+                "workers": worker_mem,
+            }
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{'workers':>7} {'predict/s':>10} {'RSS/worker':>11} {'PSS/worker':>11} "
+          f"{'private/worker':>15} {'total PSS':>10}   (MB)")
+    for workers, r in results.items():
+        mem = r["workers"]
+        mean = {k: sum(m[k] for m in mem) / len(mem) for k in ("rss", "pss", "private")}
+        total_pss = r["parent"]["pss"] + sum(m["pss"] for m in mem)
+        print(f"{workers:>7} {r['predict_per_s']:>10.1f} {mean['rss']:>11.1f} {mean['pss']:>11.1f} "
+              f"{mean['private']:>15.1f} {total_pss:>10.1f}")
+
+
+if __name__ == "__main__":
+    main_()
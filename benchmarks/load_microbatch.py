@@ -0,0 +1,80 @@
+"""
+Load test of /predict micro-batching: throughput and latency with N concurrent
+clients, without batching and for several (max wait, max batch size) settings.
+
+    python -m benchmarks.load_microbatch [--quick] [--concurrency 64] [--seconds 5]
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks._asgi import request_json
+from benchmarks._common import add_model_args, build_model, percentiles, sample_readings
+from inference import InferencePool, MicroBatcher
+
+import main
+
+# (max_wait_ms, max_batch_size); None = micro-batching disabled
+SETTINGS = [None, (0.5, 16), (2.0, 64), (5.0, 256)]
+
+
+async def load(readings, concurrency, seconds):
+    stop = time.perf_counter() + seconds
+    latency = []
+
+    async def client(worker):
+        i = worker
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            status, _ = await request_json(main.app, "POST", "/predict", readings[i % len(readings)])
+            if status == 200:
+                latency.append(time.perf_counter() - start)
+            i += concurrency
+
+    await asyncio.gather(*(client(w) for w in range(concurrency)))
+    return {"requests_per_s": len(latency) / seconds, **percentiles(latency)}
+
+
+async def run(model, concurrency, seconds, workers):
+    main.model = model
+    readings = sample_readings(model, 1000)
+    results = []
+    for setting in SETTINGS:
+        main.inference_pool = InferencePool(kind="thread", workers=workers, max_pending=10 * concurrency)
+        main.micro_batcher = None
+        if setting is not None:
+            max_wait_ms, max_batch_size = setting
+            main.micro_batcher = MicroBatcher(main.inference_pool, max_batch_size=max_batch_size,
+                                              max_wait_ms=max_wait_ms)
+        await main.startup_event()
+
+        r = await load(readings, concurrency, seconds)
+        r["setting"] = setting
+        r["mean_batch"] = main.micro_batcher.stats()["mean_batch_size"] if setting else 1.0
+        results.append(r)
+
+        main.inference_pool.shutdown()
+        main.store.clear()
+    return results
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_model_args(parser)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    model = build_model(args)
+    results = asyncio.run(run(model, args.concurrency, args.seconds, args.workers))
+
+    print(f"{'wait ms':>8} {'max batch':>9} {'mean batch':>10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        wait, size = r["setting"] if r["setting"] else ("off", "-")
+        print(f"{wait:>8} {size:>9} {r['mean_batch']:>10.1f} {r['requests_per_s']:>8.1f} "
+              f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,149 @@
+"""
+Live feed (GET /stream) under load: idle subscribers of machines that send
+nothing, active subscribers of the machines being scored, and /predict
+producers, all on one event loop.
+
+    python -m benchmarks.load_stream [--quick] [--idle 1000] [--active 100] [--rate 200] [--seconds 10]
+
+Reports /predict latency with and without the subscribers connected, event
+delivery latency (prediction timestamp to subscriber), memory per
+subscriber and the broadcaster's queue statistics.
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import time
+
+from benchmarks._asgi import request_json, stream
+from benchmarks._common import add_model_args, build_model, percentiles, sample_readings
+
+import main
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+async def produce(readings, machines, rate, seconds):
+    """POST /predict at `rate` readings/s spread over machines; returns request latencies."""
+    latencies = []
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    i = 0
+    tasks = set()
+
+    async def one(reading):
+        t0 = time.perf_counter()
+        status, _ = await request_json(main.app, "POST", "/predict", reading)
+        if status == 200:
+            latencies.append(time.perf_counter() - t0)
+
+    while time.perf_counter() - start < seconds:
+        reading = dict(readings[i % len(readings)], machine_id=machines[i % len(machines)])
+        task = asyncio.ensure_future(one(reading))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        i += 1
+        await asyncio.sleep(max(0.0, start + i * interval - time.perf_counter()))
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+class Listener:
+    """Subscriber-side bookkeeping: events received and their delivery latency."""
+
+    def __init__(self):
+        self.events = 0
+        self.latencies = []
+        self._buffer = b""
+
+    def on_chunk(self, chunk):
+        self._buffer += chunk
+        *messages, self._buffer = self._buffer.split(b"\n\n")
+        now = datetime.datetime.now()
+        for message in messages:
+            if not message.startswith(b"event: prediction"):
+                continue
+            self.events += 1
+            # only the timestamp is needed; skip parsing the whole payload
+            stamp = message[message.rindex(b'"timestamp":"') + 13:]
+            sent = datetime.datetime.fromisoformat(stamp[:stamp.index(b'"')].decode())
+            self.latencies.append((now - sent).total_seconds())
+
+
+async def run(model, n_idle, n_active, n_machines, rate, seconds):
+    main.model = model
+    await main.startup_event()
+    readings = sample_readings(model, 1000)
+    machines = [f"machine-{m}" for m in range(n_machines)]
+
+    baseline = await produce(readings, machines, rate, seconds)
+
+    stop = asyncio.Event()
+    rss_before = rss_mb()
+    listeners = [Listener() for _ in range(n_active)]
+    connections = [
+        asyncio.ensure_future(stream(main.app, f"/stream?machine_id=idle-{i}", lambda chunk: None, stop))
+        for i in range(n_idle)
+    ]
+    # half the active subscribers follow one machine, the rest the whole feed
+    for i, listener in enumerate(listeners):
+        path = f"/stream?machine_id={machines[i % n_machines]}" if i % 2 == 0 else "/stream"
+        connections.append(asyncio.ensure_future(stream(main.app, path, listener.on_chunk, stop)))
+    while len(main.broadcaster) < n_idle + n_active:
+        await asyncio.sleep(0.01)
+    rss_connected = rss_mb()
+
+    loaded = await produce(readings, machines, rate, seconds)
+    await asyncio.sleep(0.5)  # let the last events drain
+    stats = main.broadcaster.stats()
+
+    stop.set()
+    await asyncio.gather(*connections)
+    main.inference_pool.shutdown()
+
+    delivery = [latency for listener in listeners for latency in listener.latencies]
+    return {
+        "baseline": percentiles(baseline),
+        "baseline_per_s": len(baseline) / seconds,
+        "loaded": percentiles(loaded),
+        "loaded_per_s": len(loaded) / seconds,
+        "events_received": sum(listener.events for listener in listeners),
+        "delivery": percentiles(delivery) if delivery else None,
+        "kb_per_subscriber": (rss_connected - rss_before) * 1024 / (n_idle + n_active),
+        "stream": stats,
+        "subscribers_after_disconnect": len(main.broadcaster),
+    }
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_model_args(parser)
+    parser.add_argument("--idle", type=int, default=1000)
+    parser.add_argument("--active", type=int, default=100)
+    parser.add_argument("--machines", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=200, help="/predict calls per second")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    model = build_model(args)
+    r = asyncio.run(run(model, args.idle, args.active, args.machines, args.rate, args.seconds))
+
+    print(f"subscribers: {args.idle} idle + {args.active} active, {args.rate:.0f} predictions/s "
+          f"over {args.machines} machines")
+    print(f"/predict without subscribers: p50 {r['baseline']['p50_ms']:.2f} ms, "
+          f"p99 {r['baseline']['p99_ms']:.2f} ms, {r['baseline_per_s']:.0f}/s")
+    print(f"/predict with subscribers:    p50 {r['loaded']['p50_ms']:.2f} ms, "
+          f"p99 {r['loaded']['p99_ms']:.2f} ms, {r['loaded_per_s']:.0f}/s")
+    if r["delivery"]:
+        print(f"delivery latency: p50 {r['delivery']['p50_ms']:.2f} ms, p99 {r['delivery']['p99_ms']:.2f} ms "
+              f"({r['events_received']} events received)")
+    print(f"memory per subscriber: {r['kb_per_subscriber']:.1f} KB")
+    print(f"broadcaster: {r['stream']}")
+    print(f"subscribers left after disconnect: {r['subscribers_after_disconnect']}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,299 @@
+"""
+The standard benchmark suite: one number per hot path, written as JSON and
+compared against a stored baseline.
+
+    python -m benchmarks [--quick] [--output results.json]
+    python -m benchmarks --quick --save-baseline     # record benchmarks/baseline_quick.json
+
+Cases:
+  predict_single        PredictiveMaintenanceAIOnly.predict on one reading
+  predict_batch         predict_batch throughput at several batch sizes
+  train                 training time vs n_samples
+  api_predict           POST /predict end to end through the ASGI app
+  api_history/alerts    GET /history and GET /alerts with large in-memory buffers
+
+Every metric is compared with the baseline recorded for the same mode
+(--quick or full); a metric worse than baseline by more than --tolerance
+(a fraction, default 0.5 = 50%) is reported as a regression and the exit
+status is 1. p99 latencies are reported but not gated: on a shared machine
+they vary by more than any useful tolerance. Timings depend on the machine, so record a baseline on the
+machine (or CI runner) the suite is compared on.
+"""
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import sklearn
+
+from benchmarks._asgi import request
+from benchmarks._common import build_model, percentiles, sample_readings
+from benchmarks.bench_storage_ingest import fake_predictions
+from model import PredictiveMaintenanceAIOnly
+from prediction_cache import PredictionCache
+from storage import create_store
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Workload sizes per mode
+SIZES = {
+    "quick": {
+        "n_samples": 5000, "single_requests": 300, "batch_sizes": (100, 5000), "train_sizes": (2000, 5000),
+        "api_requests": 300, "history_size": 20000, "alerts_size": 1000, "query_requests": 50,
+    },
+    "full": {
+        "n_samples": 30000, "single_requests": 1000, "batch_sizes": (100, 10000), "train_sizes": (10000, 30000),
+        "api_requests": 1000, "history_size": 100000, "alerts_size": 10000, "query_requests": 100,
+    },
+}
+
+
+def metric(value, unit, better, gate=True):
+    """gate=False: reported and compared, but too noisy to fail the run on"""
+    return {"value": round(float(value), 4), "unit": unit, "better": better, "gate": gate}
+
+
+def latency_metrics(prefix, durations):
+    p = percentiles(durations)
+    return {
+        f"{prefix}.p50_ms": metric(p["p50_ms"], "ms", "lower"),
+        f"{prefix}.p99_ms": metric(p["p99_ms"], "ms", "lower", gate=False),
+    }
+
+
+def timed(fn, n):
+    gc.collect()
+    durations = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def timed_requests(app, method, path, n):
+    gc.collect()
+    durations = []
+    for _ in range(n):
+        start = time.perf_counter()
+        status, _, _ = await request(app, method, path)
+        durations.append(time.perf_counter() - start)
+        if status != 200:
+            raise RuntimeError(f"{method} {path} returned {status}")
+    return durations
+
+
+def quick_model(quick):
+    model = PredictiveMaintenanceAIOnly()
+    if quick:
+        for forest in (model.fault_model, model.severity_model, model.rul_model):
+            forest.set_params(n_estimators=30)
+    return model
+
+
+def bench_predict_single(model, sizes):
+    readings = sample_readings(model, sizes["single_requests"])
+    model.predict(readings[0])
+    it = iter(readings)
+    return latency_metrics("predict_single", timed(lambda: model.predict(next(it)), len(readings)))
+
+
+def bench_predict_batch(model, sizes):
+    results = {}
+    for size in sizes["batch_sizes"]:
+        readings = sample_readings(model, size)
+        best = min(timed(lambda: model.predict_batch(readings), 3))
+        results[f"predict_batch.{size}.rows_per_s"] = metric(size / best, "rows/s", "higher")
+    return results
+
+
+def bench_train(sizes, quick):
+    results = {}
+    for n_samples in sizes["train_sizes"]:
+        fresh = quick_model(quick)
+        start = time.perf_counter()
+        fresh.train(n_samples=n_samples)
+        results[f"train.{n_samples}.seconds"] = metric(time.perf_counter() - start, "s", "lower")
+        del fresh
+        gc.collect()
+    return results
+
+
+def fill_store(store, history_size, alerts_size, n_machines=100):
+    now = datetime.datetime.now()
+    for i, (machine_id, sensor_data, prediction) in enumerate(fake_predictions(history_size, n_machines)):
+        prediction["timestamp"] = (now - datetime.timedelta(seconds=history_size - i)).isoformat()
+        store.add_prediction(sensor_data, prediction, machine_id)
+    for i in range(alerts_size):
+        store.add_alert({
+            "id": i + 1,
+            "severity": "Critical" if i % 4 == 0 else "Warning",
+            "message": "Warning: Bearing Wear - Inspect bearings",
+            "timestamp": now.isoformat(),
+            "sensor_data": {"temperature": 80.0, "vibration": 6.0, "pressure": 110.0, "rpm": 2100.0},
+        })
+
+
+async def bench_api(model, sizes):
+    import main
+
+    main.model = model
+    # Every request reaches the model: readings are random, but a cache would hide the model cost
+    main.prediction_cache = PredictionCache(max_entries=0)
+    main.store = create_store("memory", history_capacity=sizes["history_size"],
+                              alerts_capacity=sizes["alerts_size"])
+    await main.startup_event()
+    try:
+        results = {}
+        bodies = [dict(r, machine_id=f"m{i % 50}")
+                  for i, r in enumerate(sample_readings(model, sizes["api_requests"], seed=1))]
+        payloads = [json.dumps(body).encode() for body in bodies]
+        await request(main.app, "POST", "/predict", payloads[0])
+        gc.collect()
+        durations = []
+        for payload in payloads:
+            start = time.perf_counter()
+            status, _, _ = await request(main.app, "POST", "/predict", payload)
+            durations.append(time.perf_counter() - start)
+            if status != 200:
+                raise RuntimeError(f"POST /predict returned {status}")
+        results.update(latency_metrics("api_predict", durations))
+
+        main.store.clear()
+        fill_store(main.store, sizes["history_size"], sizes["alerts_size"])
+        n = sizes["query_requests"]
+        for name, path in (
+            ("api_history.latest_50", "/history?limit=50"),
+            ("api_history.machine", "/history?limit=0&machine_id=machine-7"),
+            ("api_history.downsampled", "/history?limit=0&max_points=500"),
+            ("api_alerts", "/alerts"),
+            ("api_alerts.critical", "/alerts?severity=Critical"),
+        ):
+            results.update(latency_metrics(name, await timed_requests(main.app, "GET", path, n)))
+        return results
+    finally:
+        main.inference_pool.shutdown()
+        main.store.clear()
+
+
+def environment(quick):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=BENCH_DIR, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "mode": "quick" if quick else "full",
+        "commit": commit,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run_suite(quick, only=None):
+    sizes = SIZES["quick" if quick else "full"]
+    selected = lambda name: only is None or name in only  # noqa: E731
+    results = {}
+
+    model = build_model(argparse.Namespace(n_samples=sizes["n_samples"], quick=quick))
+    if selected("predict_single"):
+        results.update(bench_predict_single(model, sizes))
+    if selected("predict_batch"):
+        results.update(bench_predict_batch(model, sizes))
+    if selected("api"):
+        results.update(asyncio.run(bench_api(model, sizes)))
+    if selected("train"):
+        results.update(bench_train(sizes, quick))
+    return {"environment": environment(quick), "results": results}
+
+
+def compare(report, baseline, tolerance):
+    """Rows of (name, baseline value, value, change, regressed); change > 0 is always worse."""
+    rows = []
+    for name, current in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None or not previous["value"]:
+            rows.append((name, None, current["value"], None, False))
+            continue
+        if current["better"] == "lower":
+            change = current["value"] / previous["value"] - 1.0
+        else:
+            change = previous["value"] / current["value"] - 1.0 if current["value"] else float("inf")
+        rows.append((name, previous["value"], current["value"], change,
+                     current.get("gate", True) and change > tolerance))
+    return rows
+
+
+def baseline_path(quick):
+    return os.path.join(BENCH_DIR, f"baseline_{'quick' if quick else 'full'}.json")
+
+
+def main_(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare against a baseline")
+    parser.add_argument("--quick", action="store_true",
+                        help="small forests and workloads for a fast smoke run")
+    parser.add_argument("--only", nargs="+", choices=("predict_single", "predict_batch", "api", "train"),
+                        help="run only these cases")
+    parser.add_argument("--output", help="write the results JSON here (default: stdout only)")
+    parser.add_argument("--baseline", help="baseline JSON (default: benchmarks/baseline_<mode>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed slowdown before a metric counts as a regression (default: 0.5 = 50%%)")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.quick, set(args.only) if args.only else None)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+    path = args.baseline or baseline_path(args.quick)
+    if args.save_baseline:
+        with open(path, "w") as f:
+            f.write(text + "\n")
+        print(f"\nbaseline written to {path}")
+        return 0
+    if not os.path.exists(path):
+        print(f"\nno baseline at {path}; run with --save-baseline to record one")
+        return 0
+
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline["environment"]["mode"] != report["environment"]["mode"]:
+        print(f"\nbaseline {path} is a {baseline['environment']['mode']} run; not comparing", file=sys.stderr)
+        return 2
+
+    rows = compare(report, baseline, args.tolerance)
+    print(f"\ncompared with {path} (commit {baseline['environment'].get('commit')}, "
+          f"tolerance {args.tolerance:.0%})")
+    print(f"{'metric':>40} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, before, after, change, regressed in rows:
+        before_s = f"{before:>12.4g}" if before is not None else f"{'-':>12}"
+        change_s = f"{change:>+8.0%}" if change is not None else f"{'new':>8}"
+        gated = report["results"][name].get("gate", True)
+        flag = "  REGRESSION" if regressed else ("" if gated else "  (not gated)")
+        print(f"{name:>40} {before_s} {after:>12.4g} {change_s}{flag}")
+
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"\nFAIL: {len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}: "
+              f"{', '.join(regressions)}", file=sys.stderr)
+        return 1
+    print("\nOK: no regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_())
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+
+def encode_event(event, data):
+    """One Server-Sent Events message, ready to write to every subscriber."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class Subscriber:
+    """One live-feed connection: a bounded queue of encoded events."""
+
+    def __init__(self, machine_id=None, max_queue=100):
+        self.machine_id = machine_id
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def offer(self, payload):
+        # a slow client loses its oldest pending event rather than growing without bound
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(payload)
+
+
+class Broadcaster:
+    """
+    Fans out predictions and alerts to live-feed subscribers.
+
+    Each event is serialized once and the same bytes are queued for every
+    subscriber it matches: subscribers without a machine_id get every event,
+    the others only events for their machine (looked up by machine_id, so an
+    event costs nothing for subscribers of other machines).
+
+    Must be used from the event loop thread.
+    """
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._all = set()
+        self._by_machine = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0  # from subscribers that have since disconnected
+
+    def subscribe(self, machine_id=None):
+        subscriber = Subscriber(machine_id, self.max_queue)
+        if machine_id is None:
+            self._all.add(subscriber)
+        else:
+            self._by_machine.setdefault(machine_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        if subscriber.machine_id is None:
+            self._all.discard(subscriber)
+        else:
+            subscribers = self._by_machine.get(subscriber.machine_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._by_machine[subscriber.machine_id]
+        self.dropped += subscriber.dropped
+
+    def publish(self, event, data, machine_id=None):
+        """Queue event (JSON-serializable data) for every matching subscriber."""
+        targets = list(self._all)
+        if machine_id is not None:
+            targets.extend(self._by_machine.get(machine_id, ()))
+        self.published += 1
+        if not targets:
+            return
+        payload = encode_event(event, data)
+        for subscriber in targets:
+            subscriber.offer(payload)
+        self.delivered += len(targets)
+
+    def _subscribers(self):
+        yield from self._all
+        for subscribers in self._by_machine.values():
+            yield from subscribers
+
+    def __len__(self):
+        return len(self._all) + sum(len(s) for s in self._by_machine.values())
+
+    def stats(self):
+        depths = [subscriber.queue.qsize() for subscriber in self._subscribers()]
+        return {
+            "subscribers": len(depths),
+            "machines_subscribed": len(self._by_machine),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "max_queue": self.max_queue,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped + sum(subscriber.dropped for subscriber in self._subscribers()),
+        }
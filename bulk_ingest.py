@@ -0,0 +1,227 @@
+"""
+Offline scoring of historical sensor files.
+
+    python bulk_ingest.py synthetic_sensor_data_with_vibration.csv scored.csv [--chunk-size 50000]
+
+Reads CSV (or Parquet, if pyarrow is installed) in chunks, maps the file's
+columns to the model's inputs, scores every chunk with one
+PredictiveMaintenanceAIOnly.predict_columns call and appends the results to
+the output file, so memory stays bounded by the chunk size whatever the file
+size.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from model import PredictiveMaintenanceAIOnly, ARTIFACT_VERSION
+
+PSI_PER_BAR = 14.5038
+
+# file column -> (model input, factor converting to the API's units)
+COLUMN_MAP = {
+    "temperature_C": ("temperature", 1.0),
+    "pressure_bar": ("pressure", PSI_PER_BAR),
+    "vibration_mm_s": ("vibration", 1.0),
+    "rpm": ("rpm", 1.0),
+    # files already in the API's units and names
+    "temperature": ("temperature", 1.0),
+    "pressure": ("pressure", 1.0),
+    "vibration": ("vibration", 1.0),
+}
+
+FORMATS = ("csv", "parquet")
+
+
+def detect_format(path, fmt=None):
+    if fmt is None:
+        fmt = "parquet" if str(path).lower().endswith((".parquet", ".pq")) else "csv"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown file format: {fmt!r} (expected one of {FORMATS})")
+    return fmt
+
+
+def read_chunks(source, chunk_size=50000, fmt="csv"):
+    """DataFrames of at most chunk_size rows from a CSV/Parquet path or binary file object."""
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet files requires pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_size)
+
+
+def map_columns(df, feature_cols):
+    """
+    The model inputs of a raw chunk as an (N, len(feature_cols)) float matrix,
+    converted to the API's units.
+    """
+    columns = {}
+    for name in df.columns:
+        target = COLUMN_MAP.get(str(name).strip())
+        if target is not None and target[0] not in columns:
+            feature, factor = target
+            values = pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)
+            columns[feature] = values * factor if factor != 1.0 else values
+
+    missing = [c for c in feature_cols if c not in columns]
+    if missing:
+        raise ValueError(f"Input has no column for {missing} (columns: {list(df.columns)})")
+    return np.column_stack([columns[c] for c in feature_cols])
+
+
+class ScoreStats:
+    """Running totals of a scoring job."""
+
+    def __init__(self):
+        self.rows = 0
+        self.skipped = 0
+        self.chunks = 0
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+        self.severity_counts = {}
+
+    @property
+    def rows_per_s(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "skipped": self.skipped,
+            "chunks": self.chunks,
+            "seconds": round(self.seconds, 3),
+            "rows_per_s": round(self.rows_per_s, 1),
+            "severity_counts": self.severity_counts,
+        }
+
+
+def prepare_chunk(df, feature_cols, row_offset):
+    """
+    (row numbers, input matrix) of a raw chunk; rows with a missing or
+    non-numeric reading are dropped.
+    """
+    X = map_columns(df, feature_cols)
+    valid = np.isfinite(X).all(axis=1)
+    rows = np.arange(row_offset, row_offset + len(df))
+    return rows[valid], X[valid]
+
+
+def results_frame(model, rows, X, columns):
+    """One output row per scored reading: inputs (in API units), predictions and class probabilities."""
+    out = {"row": rows}
+    out.update({c: X[:, i] for i, c in enumerate(model.feature_cols)})
+    for key in ("predicted_fault_type", "predicted_severity", "predicted_rul_hours", "recommendation"):
+        out[key] = columns[key]
+    for prefix, classes, proba in (
+        ("fault", model.fault_model.classes_, columns["fault_probabilities"]),
+        ("severity", model.severity_model.classes_, columns["severity_probabilities"]),
+    ):
+        for i, cls in enumerate(classes):
+            out[f"p_{prefix}_{cls}"] = np.round(proba[:, i], 3)
+    return pd.DataFrame(out)
+
+
+def update_stats(stats, n_raw, frame):
+    stats.chunks += 1
+    stats.rows += len(frame)
+    stats.skipped += n_raw - len(frame)
+    for severity, count in frame["predicted_severity"].value_counts().items():
+        stats.severity_counts[severity] = stats.severity_counts.get(severity, 0) + int(count)
+    stats.seconds = time.perf_counter() - stats.started
+
+
+def score_chunks(model, chunks, stats=None):
+    """Score each raw chunk; yields one results DataFrame per chunk."""
+    stats = stats if stats is not None else ScoreStats()
+    offset = 0
+    for df in chunks:
+        rows, X = prepare_chunk(df, model.feature_cols, offset)
+        offset += len(df)
+        frame = results_frame(model, rows, X, model.predict_columns(X))
+        update_stats(stats, len(df), frame)
+        yield frame
+
+
+class ResultWriter:
+    """Appends result chunks to a CSV or Parquet file."""
+
+    def __init__(self, path, fmt="csv"):
+        self.path = path
+        self.fmt = fmt
+        self._parquet = None
+        self._header = True
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError("Writing Parquet files requires pyarrow (pip install pyarrow)")
+
+    def write(self, frame):
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def score_file(model, source, output, chunk_size=50000, input_format=None, output_format=None, progress=None):
+    """
+    Score every reading of source into output, chunk by chunk.
+    progress: optional callable(stats) run after each chunk.
+    Returns the ScoreStats.
+    """
+    stats = ScoreStats()
+    chunks = read_chunks(source, chunk_size, detect_format(source, input_format))
+    writer = ResultWriter(output, detect_format(output, output_format))
+    try:
+        for frame in score_chunks(model, chunks, stats):
+            writer.write(frame)
+            if progress is not None:
+                progress(stats)
+    finally:
+        writer.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of sensor readings in chunks")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--input-format", choices=FORMATS)
+    parser.add_argument("--output-format", choices=FORMATS)
+    parser.add_argument("--artifact", default=os.environ.get(
+        "MODEL_ARTIFACT_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts", f"model_v{ARTIFACT_VERSION}.joblib")
+    ))
+    args = parser.parse_args()
+
+    model = PredictiveMaintenanceAIOnly()
+    model.load_or_train(args.artifact)
+
+    def progress(stats):
+        print(f"\r{stats.rows} rows scored, {stats.rows_per_s:,.0f} rows/s", end="", flush=True)
+
+    stats = score_file(model, args.input, args.output, args.chunk_size,
+                       args.input_format, args.output_format, progress)
+    print(f"\nDone: {stats.rows} rows ({stats.skipped} skipped) in {stats.seconds:.1f}s, "
+          f"{stats.rows_per_s:,.0f} rows/s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Two-stage cascade inference: a cheap screening model clears readings that are
+confidently normal, and only the rest go through the full forests and kNN
+lookup of PredictiveMaintenanceAIOnly.
+
+The screen is model_standalone.PredictiveMaintenanceModel: a reading is
+cleared when all four sensors are inside its normal ranges (zero rule-based
+risk) and its IsolationForest decision score is at least a threshold
+calibrated against the full model's own labels. Cleared readings get one
+cached healthy response instead of a model pass.
+"""
+import threading
+
+import numpy as np
+
+from model import PredictiveMaintenanceAIOnly
+
+
+def full_model_healthy(columns):
+    """Readings the full model calls healthy with normal operation (what a cleared reading is served as)."""
+    return (columns["predicted_severity"] == "healthy") & (columns["predicted_fault_type"] == "healthy")
+
+
+class ScreeningStage:
+    """
+    First stage of the cascade; attach to a model as model.screen (see
+    PredictiveMaintenanceAIOnly.predict_columns). Build with ScreeningStage.fit().
+    """
+
+    def __init__(self, standalone, threshold, healthy_columns, calibration):
+        """
+        standalone: trained model_standalone.PredictiveMaintenanceModel
+        threshold: minimum IsolationForest decision score of a cleared reading
+        healthy_columns: predict_columns() values served for every cleared reading
+        calibration: summary of the calibration run (see fit())
+        """
+        self.standalone = standalone
+        self.threshold = threshold
+        self.healthy_columns = healthy_columns
+        self.calibration = calibration
+        self.feature_cols = list(standalone.normal_ranges)
+        self._low = np.array([standalone.normal_ranges[c][0] for c in self.feature_cols], dtype=float)
+        self._high = np.array([standalone.normal_ranges[c][1] for c in self.feature_cols], dtype=float)
+        self._lock = threading.Lock()
+        self.screened = 0
+        self.cleared = 0
+
+    @classmethod
+    def fit(cls, model, max_false_clear=0.01, max_faulty_cleared=0.05, healthy_share=None,
+            n_samples=10000, random_state=1):
+        """
+        Train the standalone model and calibrate the clearing threshold on
+        n_samples fresh synthetic readings labelled by model (the full one).
+
+        The threshold clears as many readings as possible while the expected
+        false-clear rate (share of cleared readings the full model would not
+        call healthy) stays at most max_false_clear, for a stream in which
+        healthy_share of the readings are healthy (None: the calibration
+        set's own share, which is conservative for mostly-healthy fleets).
+        On a mostly-healthy stream that alone would allow clearing most of the
+        few faulty readings, so at most max_faulty_cleared of the readings the
+        full model does not call healthy may be cleared as well.
+        """
+        from model_standalone import PredictiveMaintenanceModel
+
+        standalone = PredictiveMaintenanceModel()
+        standalone.train_model()
+
+        rng = np.random.default_rng(random_state)
+        cols = PredictiveMaintenanceAIOnly._simulate(rng, n_samples, 1000)
+        X = np.column_stack([cols[c] for c in model.feature_cols]).astype(float)
+        full = model._predict_columns(X)
+        healthy = full_model_healthy(full)
+
+        stage = cls(standalone, np.inf, None, None)
+        scores = stage.scores(X)
+        n_healthy, n_faulty = int(healthy.sum()), int((~healthy).sum())
+        share = n_healthy / len(X) if healthy_share is None else healthy_share
+
+        # Clearing the k highest-scoring readings: per-class clear rates, then
+        # the false-clear rate they imply at the assumed healthy share
+        order = np.argsort(-scores, kind="stable")
+        cleared_healthy = np.cumsum(healthy[order]) / max(n_healthy, 1)
+        cleared_faulty = np.cumsum(~healthy[order]) / max(n_faulty, 1)
+        cleared_share = share * cleared_healthy + (1 - share) * cleared_faulty
+        with np.errstate(invalid="ignore", divide="ignore"):
+            false_clear = (1 - share) * cleared_faulty / cleared_share
+        allowed = (
+            np.isfinite(scores[order])
+            & (false_clear <= max_false_clear)
+            & (cleared_faulty <= max_faulty_cleared)
+        )
+        k = int(np.nonzero(allowed)[0].max()) + 1 if allowed.any() else 0
+
+        threshold = float(scores[order[k - 1]]) if k else np.inf
+        stage.threshold = threshold
+        stage.healthy_columns = cls._healthy_response(model, full, healthy & (scores >= threshold))
+        stage.calibration = {
+            "samples": len(X),
+            "healthy_share": round(share, 4),
+            "max_false_clear": max_false_clear,
+            "max_faulty_cleared": max_faulty_cleared,
+            "threshold": threshold if k else None,
+            "clear_rate": round(float(cleared_share[k - 1]), 4) if k else 0.0,
+            "false_clear_rate": round(float(false_clear[k - 1]), 4) if k else 0.0,
+            "faulty_cleared": round(float(cleared_faulty[k - 1]), 4) if k else 0.0,
+        }
+        return stage
+
+    @staticmethod
+    def _healthy_response(model, full, rows):
+        """
+        The response served for cleared readings: the full model's mean class
+        probabilities and median remaining life over the correctly cleared
+        calibration readings (all healthy readings if none were cleared).
+        """
+        if not rows.any():
+            rows = full_model_healthy(full)
+        recommendations, counts = np.unique(full["recommendation"][rows].astype(str), return_counts=True)
+        return {
+            "predicted_fault_type": "healthy",
+            "fault_probabilities": full["fault_probabilities"][rows].mean(axis=0),
+            "predicted_severity": "healthy",
+            "severity_probabilities": full["severity_probabilities"][rows].mean(axis=0),
+            "predicted_rul_hours": int(np.median(full["predicted_rul_hours"][rows])),
+            "recommendation": recommendations[counts.argmax()],
+        }
+
+    def scores(self, X):
+        """IsolationForest decision score of each reading; -inf outside the normal ranges."""
+        X = np.asarray(X, dtype=float)
+        in_range = ((X >= self._low) & (X <= self._high)).all(axis=1)
+        scores = np.full(len(X), -np.inf)
+        if in_range.any():
+            scores[in_range] = self.standalone.decision_scores(X[in_range])
+        return scores
+
+    def predict_columns(self, model, X):
+        """model.predict_columns(X), with cleared readings answered from the cached healthy response."""
+        cleared = self.scores(X) >= self.threshold
+        n_cleared = int(cleared.sum())
+        with self._lock:
+            self.screened += len(X)
+            self.cleared += n_cleared
+        if n_cleared == 0:
+            return model._predict_columns(X)
+
+        escalated = ~cleared
+        full = model._predict_columns(X[escalated])
+        out = {}
+        for key, cached in self.healthy_columns.items():
+            values = full[key]
+            column = np.empty((len(X),) + values.shape[1:], dtype=values.dtype)
+            column[escalated] = values
+            column[cleared] = cached
+            out[key] = column
+        return out
+
+    def stats(self):
+        return {
+            "screened": self.screened,
+            "cleared": self.cleared,
+            "escalated": self.screened - self.cleared,
+            "clear_rate": self.cleared / self.screened if self.screened else 0.0,
+            "calibration": self.calibration,
+        }
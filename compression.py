@@ -0,0 +1,221 @@
+"""
+Forest compression: smaller versions of a trained PredictiveMaintenanceAIOnly
+for serving, selected by name (MODEL_PROFILE).
+
+A profile cuts each forest to its first n trees, caps tree depth, or both;
+a "distill" profile instead fits fresh small forests to the full model's own
+predictions on new synthetic readings. The scaler and the kNN recommender are
+shared with the full model, so recommendations are unchanged.
+
+Depth capping prunes the fitted trees: a node at the depth limit becomes a
+leaf predicting the class counts / mean it already stores, as a tree grown
+with that max_depth would, and the nodes below it are dropped.
+"""
+import copy
+import os
+
+import numpy as np
+
+from model import FAULT_TYPES, SEVERITIES, PredictiveMaintenanceAIOnly
+
+FORESTS = ("fault_model", "severity_model", "rul_model")
+
+# name -> compression spec; "full" serves the forests as trained
+PROFILES = {
+    "full": None,
+    "balanced": {"trees": {"fault_model": 100, "severity_model": 100, "rul_model": 100}},
+    "compact": {"trees": {"fault_model": 50, "severity_model": 50, "rul_model": 30}, "max_depth": 20},
+    "distilled": {"trees": {"fault_model": 30, "severity_model": 30, "rul_model": 30}, "max_depth": 12,
+                  "distill_samples": 100000},
+}
+
+
+def profile_spec(name):
+    """The spec of profile name (None for "full"), tagged with its name as saved in artifacts."""
+    if name not in PROFILES:
+        raise ValueError(f"Unknown model profile: {name!r} (expected one of {tuple(PROFILES)})")
+    spec = PROFILES[name]
+    return None if spec is None else dict(spec, name=name)
+
+
+def profile_artifact_path(path, name):
+    """Where the artifact of profile name is kept next to the full one at path"""
+    if name == "full":
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{name}{ext}"
+
+
+def prune_tree(estimator, max_depth):
+    """A copy of a fitted sklearn decision tree with every path cut at max_depth."""
+    tree = estimator.tree_
+    if tree.max_depth <= max_depth:
+        return estimator
+
+    state = tree.__getstate__()
+    nodes = state["nodes"]
+    left, right = nodes["left_child"], nodes["right_child"]
+
+    # Nodes reached within max_depth, level by level
+    keep = np.zeros(tree.node_count, dtype=bool)
+    keep[0] = True
+    frontier = np.array([0])
+    for _ in range(max_depth):
+        frontier = frontier[left[frontier] != -1]
+        frontier = np.concatenate([left[frontier], right[frontier]])
+        keep[frontier] = True
+    cut = frontier[left[frontier] != -1]  # internal nodes at the depth limit
+
+    # Children are stored after their parent, so keeping the order keeps that invariant
+    kept = np.nonzero(keep)[0]
+    new_index = np.full(tree.node_count, -1, dtype=left.dtype)
+    new_index[kept] = np.arange(len(kept))
+
+    new_nodes = nodes[kept].copy()
+    is_cut = np.isin(kept, cut)
+    is_leaf = (new_nodes["left_child"] == -1) | is_cut
+    new_nodes["left_child"] = np.where(is_leaf, -1, new_index[new_nodes["left_child"]])
+    new_nodes["right_child"] = np.where(is_leaf, -1, new_index[new_nodes["right_child"]])
+    new_nodes["feature"][is_cut] = -2
+    new_nodes["threshold"][is_cut] = -2.0
+
+    pruned = type(tree)(tree.n_features, np.asarray(tree.n_classes), tree.n_outputs)
+    pruned.__setstate__({
+        "max_depth": max_depth,
+        "node_count": len(kept),
+        "nodes": new_nodes,
+        "values": state["values"][kept],
+    })
+    estimator = copy.copy(estimator)
+    estimator.tree_ = pruned
+    return estimator
+
+
+def compress(model, spec):
+    """
+    A new PredictiveMaintenanceAIOnly serving model's forests compressed per
+    spec (see PROFILES); model itself is left unchanged.
+    """
+    if spec is None:
+        return model
+    if spec.get("distill_samples"):
+        return distill(model, spec)
+
+    compressed = copy.copy(model)
+    for name in FORESTS:
+        forest = copy.copy(getattr(model, name))
+        estimators = forest.estimators_[:spec["trees"][name]] if spec.get("trees") else forest.estimators_
+        if spec.get("max_depth"):
+            estimators = [prune_tree(est, spec["max_depth"]) for est in estimators]
+        forest.estimators_ = list(estimators)
+        forest.n_estimators = len(estimators)
+        setattr(compressed, name, forest)
+    return _finish(compressed, spec)
+
+
+def distill(model, spec, random_state=7):
+    """
+    A new PredictiveMaintenanceAIOnly whose forests (spec trees and max_depth)
+    are fitted to model's predicted fault type, severity and RUL on
+    spec["distill_samples"] fresh synthetic readings.
+    """
+    from sklearn.base import clone
+
+    cols = PredictiveMaintenanceAIOnly._simulate(np.random.default_rng(random_state), spec["distill_samples"], 1000)
+    X = np.column_stack([cols[c] for c in model.feature_cols]).astype(float)
+    X_scaled = model.scaler.transform(X)
+    teacher = model.engine.predict(X_scaled)
+    targets = {
+        "fault_model": model.fault_model.classes_.take(teacher["fault"].argmax(axis=1)),
+        "severity_model": model.severity_model.classes_.take(teacher["severity"].argmax(axis=1)),
+        "rul_model": teacher["rul"],
+    }
+
+    student = copy.copy(model)
+    student.screen = None
+    fits = []
+    for name in FORESTS:
+        forest = clone(getattr(model, name)).set_params(
+            n_estimators=spec["trees"][name], max_depth=spec.get("max_depth"), warm_start=False
+        )
+        setattr(student, name, forest)
+        fits.append((name, forest, targets[name]))
+    PredictiveMaintenanceAIOnly._fit_forests(fits, X_scaled, {}, parallel=True)
+    return _finish(student, spec)
+
+
+def _finish(compressed, spec):
+    compressed.profile = spec
+    compressed.updates = list(compressed.updates)
+    compressed.screen = None
+    compressed.build_engine()
+    return compressed
+
+
+def load_or_compress(model, path, name, n_samples=30000):
+    """
+    Model to serve for profile name. The compressed artifact next to path is
+    loaded into model if it is current; otherwise the full model is loaded
+    (or trained) from path, compressed, and the result saved for next time.
+    """
+    spec = profile_spec(name)
+    if spec is None:
+        model.load_or_train(path, n_samples=n_samples)
+        return model
+
+    compressed_path = profile_artifact_path(path, name)
+    if model.load(compressed_path, n_samples=n_samples, profile=spec):
+        print(f"Loaded {name} model profile from {compressed_path}")
+        return model
+
+    model.load_or_train(path, n_samples=n_samples)
+    return compress_and_save(model, path, name)
+
+
+def compress_and_save(model, path, name):
+    """compress() a full model saved at path per profile name and save the result next to it"""
+    if name == "full":
+        return model
+    compressed = compress(model, profile_spec(name))
+    compressed_path = profile_artifact_path(path, name)
+    compressed.save(compressed_path)
+    print(f"Saved {name} model profile to {compressed_path}")
+    return compressed
+
+
+def holdout_set(n_samples=20000, random_state=12345):
+    """
+    Fresh labelled synthetic readings, drawn with a seed the models are not
+    trained on: (X in feature order, fault types, severities, RUL hours).
+    """
+    cols = PredictiveMaintenanceAIOnly._simulate(np.random.default_rng(random_state), n_samples, 1000)
+    X = np.column_stack([cols[c] for c in ("temperature", "vibration", "pressure", "rpm")]).astype(float)
+    return X, FAULT_TYPES[cols["fault_code"]], SEVERITIES[cols["severity_code"]], cols["rul_hours"]
+
+
+def evaluate(model, holdout, reference=None):
+    """
+    Held-out accuracy and RUL error of model, and (given the full model's
+    predict_columns() output on the same readings as reference) how often it
+    agrees with the full model.
+    """
+    X, fault, severity, rul = holdout
+    out = model._predict_columns(X)
+    report = {
+        "fault_accuracy": float(np.mean(out["predicted_fault_type"] == fault)),
+        "severity_accuracy": float(np.mean(out["predicted_severity"] == severity)),
+        "rul_mae_hours": float(np.mean(np.abs(out["predicted_rul_hours"] - rul))),
+    }
+    if reference is not None:
+        report["fault_agreement"] = float(np.mean(out["predicted_fault_type"] == reference["predicted_fault_type"]))
+        report["severity_agreement"] = float(np.mean(out["predicted_severity"] == reference["predicted_severity"]))
+    return report
+
+
+def size(model):
+    """Trees, nodes and bytes of the flat-array engine serving model"""
+    return {
+        "trees": len(model.engine.trees),
+        "nodes": int(sum(tree.node_count for tree in model.engine.trees)),
+        "engine_mb": model.engine.nbytes / 2**20,
+    }
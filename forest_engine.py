@@ -0,0 +1,158 @@
+import numpy as np
+from sklearn.base import is_classifier
+
+
+class FlatForestEngine:
+    """
+    Flat-array inference for fitted scikit-learn random forests.
+
+    Every tree of every forest is packed into one set of contiguous node arrays
+    (feature, threshold, left/right child) plus one array of leaf values per
+    forest. A few rows are scored by walking all trees together, one NumPy step
+    per tree level, instead of dispatching each estimator through Python. From
+    PER_TREE_MIN_ROWS rows on, each tree's compiled apply() is faster (its
+    traversal stays in cache while the level-by-level walk gathers from every
+    tree at once), so leaves are found tree by tree and the packed values are
+    used as before.
+
+    The arrays are kept narrow: the smallest integer type for feature indices,
+    int32 children, float32 thresholds, and leaf values (internal nodes have
+    none) as float32 when that is exact. A leaf's threshold is +inf, so the
+    walk always takes its left child, itself, and its right child holds its row
+    in the forest's values.
+
+    Results are bit-for-bit equal to the estimators' predict_proba / predict:
+    inputs are compared as float32 like sklearn's trees (against each float64
+    threshold rounded down to float32, which splits float32 inputs the same
+    way), per-tree class probabilities are normalized the same way, and trees
+    are summed in float64 in estimator order before dividing by the tree count.
+    """
+
+    # Rows traversed at once; bounds the (n_trees, rows) working arrays
+    CHUNK_SIZE = 1024
+
+    # Batches of at least this many rows use the per-tree traversal
+    PER_TREE_MIN_ROWS = 4
+
+    def __init__(self, forests):
+        """
+        forests: dict of name -> fitted RandomForestClassifier / RandomForestRegressor
+        """
+        features, thresholds, lefts, rights, roots = [], [], [], [], []
+        self.trees = []
+        self.forests = {}
+        self.max_depth = 0
+
+        offset = 0
+        n_features = max(forest.n_features_in_ for forest in forests.values())
+        feature_dtype = np.min_scalar_type(n_features - 1)
+        for name, forest in forests.items():
+            classifier = is_classifier(forest)
+            tree_start = len(self.trees)
+            values = []
+            n_leaves = 0
+
+            for estimator in forest.estimators_:
+                tree = estimator.tree_
+                node_ids = np.arange(offset, offset + tree.node_count, dtype=np.int32)
+                is_leaf = tree.children_left == -1
+                leaf_rows = n_leaves + np.cumsum(is_leaf, dtype=np.int32) - 1
+
+                features.append(np.where(is_leaf, 0, tree.feature).astype(feature_dtype))
+                thresholds.append(self._float32_floor(np.where(is_leaf, np.inf, tree.threshold)))
+                # Leaves point at themselves so extra levels leave them in place
+                lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.int32))
+                rights.append(np.where(is_leaf, leaf_rows, tree.children_right + offset).astype(np.int32))
+                roots.append(offset)
+                self.trees.append(tree)
+
+                if classifier:
+                    # same normalization as DecisionTreeClassifier.predict_proba
+                    proba = tree.value[is_leaf, 0, :forest.n_classes_]
+                    normalizer = proba.sum(axis=1)[:, np.newaxis]
+                    normalizer[normalizer == 0.0] = 1.0
+                    values.append(proba / normalizer)
+                else:
+                    values.append(tree.value[is_leaf, 0, 0])
+
+                self.max_depth = max(self.max_depth, tree.max_depth)
+                offset += tree.node_count
+                n_leaves += len(values[-1])
+
+            values = np.concatenate(values)
+            narrow = values.astype(np.float32)
+            self.forests[name] = {
+                "classifier": classifier,
+                "classes": forest.classes_ if classifier else None,
+                "trees": slice(tree_start, len(self.trees)),
+                "values": narrow if np.array_equal(narrow, values) else values,
+            }
+
+        self.feature = np.concatenate(features)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts)
+        self.right = np.concatenate(rights)
+        self.roots = np.array(roots, dtype=np.int32)
+
+    @staticmethod
+    def _float32_floor(thresholds):
+        """Largest float32 <= each threshold: x <= t and x <= floor32(t) agree for every float32 x."""
+        rounded = thresholds.astype(np.float32)
+        above = rounded > thresholds
+        rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+        return rounded
+
+    @property
+    def nbytes(self):
+        arrays = [self.feature, self.threshold, self.left, self.right, self.roots]
+        arrays += [f["values"] for f in self.forests.values()]
+        return sum(a.nbytes for a in arrays)
+
+    def apply(self, X):
+        """Leaf node (global index) reached in every tree: array of shape (n_trees, n_rows)."""
+        # sklearn trees split on float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) >= self.PER_TREE_MIN_ROWS:
+            X = np.ascontiguousarray(X)
+            nodes = np.empty((len(self.trees), len(X)), dtype=np.int32)
+            for i, tree in enumerate(self.trees):
+                nodes[i] = tree.apply(X)
+            nodes += self.roots[:, np.newaxis]
+            return nodes
+
+        X_cols = np.ascontiguousarray(X.T)
+        rows = np.arange(X.shape[0])
+
+        nodes = np.repeat(self.roots[:, np.newaxis], X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            go_left = X_cols[self.feature[nodes], rows] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict(self, X):
+        """
+        Evaluate all forests on X (already scaled).
+        Returns dict of name -> class probabilities (classifiers) or predictions (regressors).
+        """
+        X = np.asarray(X)
+        out = {}
+        for name, forest in self.forests.items():
+            width = len(forest["classes"]) if forest["classifier"] else None
+            out[name] = np.empty((len(X), width) if width else len(X), dtype=np.float64)
+
+        for start in range(0, len(X), self.CHUNK_SIZE):
+            chunk = slice(start, start + self.CHUNK_SIZE)
+            leaves = self.apply(X[chunk])
+            for name, forest in self.forests.items():
+                leaf_rows = self.right[leaves[forest["trees"]]]
+                values = forest["values"]
+                # trees are added one after the other in estimator order, like the
+                # forests do (sum() may switch to pairwise summation), in float64
+                if len(leaf_rows[0]) >= self.PER_TREE_MIN_ROWS:
+                    total = values[leaf_rows[0]].astype(np.float64)
+                    for rows_of_tree in leaf_rows[1:]:
+                        total += values[rows_of_tree]
+                else:
+                    total = np.add.accumulate(values[leaf_rows], axis=0, dtype=np.float64)[-1]
+                out[name][chunk] = total / (forest["trees"].stop - forest["trees"].start)
+        return out
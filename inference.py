@@ -0,0 +1,218 @@
+import asyncio
+import concurrent.futures
+import multiprocessing
+import threading
+
+# Model used by process-pool workers (inherited on fork, or loaded by _init_worker)
+_worker_model = None
+
+
+def _init_worker(model, artifact_path, profile="full"):
+    global _worker_model
+    if model is not None:
+        _worker_model = model
+        return
+    import compression
+    from model import PredictiveMaintenanceAIOnly
+    _worker_model = compression.load_or_compress(PredictiveMaintenanceAIOnly(), artifact_path, profile)
+
+
+def _worker_call(method, *args):
+    return getattr(_worker_model, method)(*args)
+
+
+class PoolSaturatedError(Exception):
+    """Raised when the inference pool already has max_pending requests in flight."""
+
+
+class InferencePool:
+    """
+    Runs model inference off the asyncio event loop.
+
+    kind:
+    - "thread": a ThreadPoolExecutor sharing the server's model (NumPy and the
+      kNN query release the GIL for most of the work)
+    - "process": a ProcessPoolExecutor; workers are forked after the model is
+      loaded so they share its memory copy-on-write (or load the artifact
+      themselves where fork is unavailable)
+    - "inline": run on the event loop, as before (for comparison)
+
+    At most max_pending requests may be in flight (running or waiting for a
+    worker); beyond that run() raises PoolSaturatedError immediately instead of
+    queueing without bound.
+    """
+
+    KINDS = ("thread", "process", "inline")
+
+    def __init__(self, kind="thread", workers=4, max_pending=64, artifact_path=None, profile="full"):
+        """artifact_path, profile: what spawned process workers load (see compression.load_or_compress)"""
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown inference pool kind: {kind!r} (expected one of {self.KINDS})")
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.artifact_path = artifact_path
+        self.profile = profile
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def start(self, model):
+        """Create the executor once the model is ready."""
+        if self.kind == "thread":
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="inference"
+            )
+        elif self.kind == "process":
+            if "fork" in multiprocessing.get_all_start_methods():
+                context, initargs = multiprocessing.get_context("fork"), (model, None)
+            else:
+                context, initargs = multiprocessing.get_context("spawn"), (None, self.artifact_path, self.profile)
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=context,
+                initializer=_init_worker, initargs=initargs
+            )
+
+    def swap_model(self, model):
+        """
+        Serve model from now on. Process workers hold their own copy of the
+        model, so a new set is started; the old workers finish what they were
+        given and exit. Thread and inline pools are handed the model per call.
+        """
+        if self.kind != "process" or self._executor is None:
+            return
+        old = self._executor
+        self.start(model)
+        old.shutdown(wait=False)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def predict_batch(self, model, readings, context=None):
+        """model.predict_batch(readings, context) on a pool worker."""
+        return await self.call(model, "predict_batch", readings, context)
+
+    async def call(self, model, method, *args):
+        """model.<method>(*args) on a pool worker (process workers use their own copy of the model)."""
+        if self.kind == "process":
+            return await self.run(_worker_call, method, *args)
+        return await self.run(getattr(model, method), *args)
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.max_pending:
+                self.rejected += 1
+                raise PoolSaturatedError(
+                    f"Inference queue is full ({self.max_pending} requests in flight)"
+                )
+            self._in_flight += 1
+
+        try:
+            if self._executor is None:
+                return fn(*args)
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self.completed += 1
+
+    def stats(self):
+        in_flight = self._in_flight
+        workers = self.workers if self._executor is not None else 1
+        return {
+            "kind": self.kind,
+            "workers": workers,
+            "max_pending": self.max_pending,
+            "in_flight": in_flight,
+            "queue_depth": max(0, in_flight - workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-reading predictions into one predict_batch call.
+
+    Readings are collected until max_batch_size are waiting or max_wait_ms has
+    passed since the first one arrived. The batch is then scored as one matrix
+    on the inference pool and each waiting request gets its own row back.
+    Backpressure applies per batch: if the pool is saturated, every request in
+    the batch gets PoolSaturatedError. A batch is scored by a single model: a
+    reading for another model than the one the waiting readings were given
+    (a model swapped in meanwhile) sends the waiting batch off and starts a new one.
+    """
+
+    def __init__(self, pool, max_batch_size=64, max_wait_ms=2.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.pool = pool
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._pending = []  # (reading, context, future) waiting for the next batch
+        self._model = None  # the model the waiting readings are scored with
+        self._timer = None
+        self._tasks = set()  # running batches (the event loop only keeps weak references)
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    async def predict(self, model, reading, context=None):
+        """model.predict(reading), scored together with concurrent callers of the same model."""
+        if self._pending and model is not self._model:
+            self._flush()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._model = model
+        self._pending.append((reading, context, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000.0, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        model, self._model = self._model, None
+        if batch:
+            task = asyncio.ensure_future(self._run(model, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, model, batch):
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        try:
+            results = await self.pool.predict_batch(
+                model, [reading for reading, _, _ in batch], [context for _, context, _ in batch]
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():  # the client may have gone away
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "waiting": len(self._pending),
+            "batches": self.batches,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
@@ -0,0 +1,190 @@
+import collections
+import datetime
+import threading
+
+import numpy as np
+
+SENSOR_FIELDS = ("temperature", "vibration", "pressure", "rpm")
+STATS = ("mean", "var", "slope", "ewma")
+
+
+def feature_names(windows):
+    """Names of the rolling features, in the order MachineState.feature_vector returns them."""
+    return [f"{field}_{stat}_{window}" for window in windows for stat in STATS for field in SENSOR_FIELDS]
+
+
+class MachineState:
+    """
+    Rolling statistics of one machine's readings over several window lengths.
+
+    For every window (a number of readings) and every sensor this keeps the
+    mean, the variance (population), the least-squares slope against time
+    (units per second) and an exponentially weighted mean with the usual
+    span = window smoothing, alpha = 2 / (window + 1).
+
+    The last max(windows) readings are kept in a ring buffer, and each window
+    keeps running sums of t, t^2, x, x^2 and t*x, so a reading is added (and
+    the one leaving each window removed) in O(1) whatever the window length.
+    The sums are recomputed from the buffer once per buffer length to stop
+    floating-point drift, which keeps updates O(1) amortized.
+    """
+
+    def __init__(self, windows=(10, 60)):
+        self.windows = np.asarray(sorted(set(windows)), dtype=np.int64)
+        if len(self.windows) == 0 or self.windows[0] < 1:
+            raise ValueError("windows must be positive reading counts")
+        capacity = int(self.windows[-1])
+        n_windows, n_fields = len(self.windows), len(SENSOR_FIELDS)
+
+        self.count = 0  # readings seen so far
+        self.last_timestamp = None
+        self._origin = None  # times are kept in seconds relative to this
+        self._t = np.zeros(capacity)
+        self._x = np.zeros((capacity, n_fields))
+
+        self._n = np.zeros(n_windows)
+        self._st = np.zeros(n_windows)
+        self._stt = np.zeros(n_windows)
+        self._sx = np.zeros((n_windows, n_fields))
+        self._sxx = np.zeros((n_windows, n_fields))
+        self._stx = np.zeros((n_windows, n_fields))
+        self._alpha = (2.0 / (self.windows + 1.0))[:, np.newaxis]
+        self._ewma = np.zeros((n_windows, n_fields))
+
+    def update(self, timestamp, values):
+        """
+        Add one reading.
+        timestamp: seconds (e.g. datetime.timestamp()); values: the four sensor values in SENSOR_FIELDS order.
+        """
+        x = np.asarray(values, dtype=np.float64)
+        if self._origin is None:
+            self._origin = timestamp
+        t = timestamp - self._origin
+        capacity = len(self._t)
+
+        # drop the reading leaving each full window (before its slot is reused)
+        full = self.count >= self.windows
+        if full.any():
+            old = (self.count - self.windows[full]) % capacity
+            old_t, old_x = self._t[old], self._x[old]
+            self._n[full] -= 1
+            self._st[full] -= old_t
+            self._stt[full] -= old_t * old_t
+            self._sx[full] -= old_x
+            self._sxx[full] -= old_x * old_x
+            self._stx[full] -= old_t[:, np.newaxis] * old_x
+
+        slot = self.count % capacity
+        self._t[slot] = t
+        self._x[slot] = x
+        self._n += 1
+        self._st += t
+        self._stt += t * t
+        self._sx += x
+        self._sxx += x * x
+        self._stx += t * x
+
+        if self.count == 0:
+            self._ewma[:] = x
+        else:
+            self._ewma += self._alpha * (x - self._ewma)
+
+        self.count += 1
+        self.last_timestamp = timestamp
+        if self.count % capacity == 0:
+            self._recompute()
+
+    def _recompute(self):
+        """Rebuild the running sums from the buffer, with times relative to the oldest kept reading."""
+        capacity = len(self._t)
+        kept = min(self.count, capacity)
+        order = (self.count - kept + np.arange(kept)) % capacity  # oldest first
+
+        shift = self._t[order[0]]
+        self._t -= shift
+        self._origin += shift
+
+        for w, window in enumerate(self.windows):
+            idx = order[max(0, kept - window):]
+            t, x = self._t[idx], self._x[idx]
+            self._n[w] = len(idx)
+            self._st[w] = t.sum()
+            self._stt[w] = (t * t).sum()
+            self._sx[w] = x.sum(axis=0)
+            self._sxx[w] = (x * x).sum(axis=0)
+            self._stx[w] = (t[:, np.newaxis] * x).sum(axis=0)
+
+    def feature_vector(self):
+        """All rolling features as one array, in feature_names(windows) order."""
+        n = self._n[:, np.newaxis]
+        mean = self._sx / n
+        var = np.maximum(self._sxx / n - mean * mean, 0.0)
+
+        denom = (self._n * self._stt - self._st * self._st)[:, np.newaxis]
+        numer = n * self._stx - self._st[:, np.newaxis] * self._sx
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = np.where(denom > 0, numer / denom, 0.0)
+
+        # (windows, stats, fields) -> flat, matching feature_names()
+        return np.stack([mean, var, slope, self._ewma], axis=1).ravel()
+
+    def features(self):
+        """Rolling features as a {name: value} dict, plus the reading count."""
+        out = dict(zip(feature_names(self.windows.tolist()), self.feature_vector().tolist()))
+        out["readings"] = self.count
+        return out
+
+
+class MachineStates:
+    """
+    Per-machine MachineState, created on a machine's first reading.
+    At most max_machines are tracked; the least recently updated is dropped first.
+    """
+
+    def __init__(self, windows=(10, 60), max_machines=10000):
+        self.windows = tuple(sorted(set(windows)))
+        self.max_machines = max_machines
+        self._states = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, machine_id, sensor_data, timestamp):
+        """
+        Add a reading (dict with the SENSOR_FIELDS keys) taken at timestamp
+        (a datetime) and return the machine's features including it.
+        """
+        values = [sensor_data[field] for field in SENSOR_FIELDS]
+        with self._lock:
+            state = self._states.get(machine_id)
+            if state is None:
+                state = self._states[machine_id] = MachineState(self.windows)
+                if len(self._states) > self.max_machines:
+                    self._states.popitem(last=False)
+            else:
+                self._states.move_to_end(machine_id)
+            state.update(timestamp.timestamp(), values)
+            return state.features()
+
+    def features(self, machine_id):
+        """Current features of a machine, or None if it has sent no readings."""
+        with self._lock:
+            state = self._states.get(machine_id)
+            return state.features() if state is not None else None
+
+    def machines(self):
+        """Tracked machines with their reading count and last reading time (newest first)."""
+        with self._lock:
+            return [
+                {
+                    "machine_id": machine_id,
+                    "readings": state.count,
+                    "last_timestamp": datetime.datetime.fromtimestamp(state.last_timestamp).isoformat(),
+                }
+                for machine_id, state in reversed(self._states.items())
+            ]
+
+    def __len__(self):
+        return len(self._states)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
@@ -1,10 +1,25 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, File, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional
 import uvicorn
-from model import PredictiveMaintenanceAIOnly
+from model import PredictiveMaintenanceAIOnly, ARTIFACT_VERSION
+from storage import StoreFullError, create_store
+from inference import InferencePool, MicroBatcher, PoolSaturatedError
+from machine_state import MachineStates
+from broadcast import Broadcaster
+from model_registry import ModelRegistry
+from prediction_cache import PredictionCache, parse_precision
+from cascade import ScreeningStage
+from alerts import AlertEngine
+import compression
+import metrics
+import serialization
+import asyncio
 import datetime
+import os
 
 app = FastAPI(
     title="AI Predictive Maintenance API",
@@ -21,18 +36,174 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize the predictive maintenance model
-model = PredictiveMaintenanceAIOnly()
+# Request latency and counts by route and status code, for GET /metrics
+# (METRICS_ENABLED=0 turns all metrics recording off)
+app.add_middleware(metrics.ASGIMiddleware, routes=app.routes)
 
-# In-memory storage for demo purposes (in production, use a database)
-sensor_history = []
-alerts = []
+def create_model():
+    """
+    A new, untrained predictive maintenance model; when it has to be trained, the
+    three forests are fitted concurrently with TRAIN_N_JOBS cores each (-1: all)
+    """
+    return PredictiveMaintenanceAIOnly(
+        n_jobs=int(os.environ["TRAIN_N_JOBS"]) if os.environ.get("TRAIN_N_JOBS") else None
+    )
+
+# The served predictive maintenance model: None until the startup load (run in
+# the background so /health answers right away) finishes. It is replaced as a
+# whole by model_registry when a new one is loaded or trained, so request
+# handlers read it once (served_model()) and use that reference throughout.
+model = None
+
+def load_model():
+    """
+    The MODEL_PROFILE model, loaded from its artifact; the full model at
+    MODEL_ARTIFACT_PATH is trained and saved first if missing or stale, and
+    compressed when the profile's own artifact is
+    """
+    new_model = compression.load_or_compress(create_model(), MODEL_ARTIFACT_PATH, MODEL_PROFILE)
+    return attach_screen(new_model)
+
+# Cascade mode (CASCADE_ENABLED=1): a cheap screening model answers readings it
+# is confident are normal with a cached healthy response, and only the rest go
+# through the full forests. Its threshold is calibrated on
+# CASCADE_CALIBRATION_SAMPLES readings so that at most CASCADE_MAX_FALSE_CLEAR
+# of cleared readings would not be healthy according to the full model, for a
+# stream with CASCADE_HEALTHY_SHARE healthy readings (default: the synthetic
+# data's own share), and at most CASCADE_MAX_FAULTY_CLEARED of the readings it
+# would not call healthy are cleared.
+CASCADE_ENABLED = os.environ.get("CASCADE_ENABLED", "0") == "1"
+
+def attach_screen(new_model):
+    """Calibrate a cascade screen for a trained new_model when cascade mode is on"""
+    if CASCADE_ENABLED:
+        new_model.screen = ScreeningStage.fit(
+            new_model,
+            max_false_clear=float(os.environ.get("CASCADE_MAX_FALSE_CLEAR", 0.01)),
+            max_faulty_cleared=float(os.environ.get("CASCADE_MAX_FAULTY_CLEARED", 0.05)),
+            healthy_share=float(os.environ["CASCADE_HEALTHY_SHARE"]) if os.environ.get("CASCADE_HEALTHY_SHARE") else None,
+            n_samples=int(os.environ.get("CASCADE_CALIBRATION_SAMPLES", 10000))
+        )
+    return new_model
+
+# Trained models are cached here and only retrained when missing or stale
+MODEL_ARTIFACT_PATH = os.environ.get(
+    "MODEL_ARTIFACT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts", f"model_v{ARTIFACT_VERSION}.joblib")
+)
+
+# Forest compression profile served (see compression.PROFILES and
+# benchmarks/bench_compression.py): "full" (default) serves the forests as
+# trained; "balanced", "compact" and "distilled" serve smaller ones, built from
+# the full model once and kept in their own artifact next to MODEL_ARTIFACT_PATH
+MODEL_PROFILE = os.environ.get("MODEL_PROFILE", "full")
+compression.profile_spec(MODEL_PROFILE)  # fail at startup on an unknown profile
+
+# Prediction history and alerts storage:
+# - "memory" (default): ring buffers keeping the most recent HISTORY_CAPACITY
+#   predictions and ALERTS_CAPACITY resolved alerts, lost on restart
+# - "sqlite": durable SQLite database at SQLITE_PATH
+# Either way GET /alerts lists every open alert of a machine plus the
+# ALERTS_CAPACITY most recent other ones.
+store = create_store(
+    backend=os.environ.get("STORAGE_BACKEND", "memory"),
+    history_capacity=int(os.environ.get("HISTORY_CAPACITY", 1000)),
+    alerts_capacity=int(os.environ.get("ALERTS_CAPACITY", 50)),
+    sqlite_path=os.environ.get(
+        "SQLITE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "predictions.db")
+    )
+)
+
+# Warning/Critical predictions raise at most one open alert per machine:
+# repeated readings are counted on it, it escalates to Critical after
+# ALERT_ESCALATE_AFTER consecutive Critical readings and is resolved after
+# ALERT_CLEAR_AFTER consecutive healthy ones. Ids come from the store, so
+# workers sharing an SQLite database never reuse one, and alerts left open by a
+# previous run keep being updated (restored when each worker starts).
+# Deduplication is per process: with several workers (serve.py), each folds only
+# the readings it serves into its alerts, and once one worker resolves an alert
+# the others' updates to it are ignored by the store.
+alert_engine = AlertEngine(
+    escalate_after=int(os.environ.get("ALERT_ESCALATE_AFTER", 1)),
+    clear_after=int(os.environ.get("ALERT_CLEAR_AFTER", 3)),
+    next_id=store.next_alert_id
+)
+
+# Model inference runs off the event loop on a bounded pool:
+# INFERENCE_POOL is "thread", "process" or "inline" (on the event loop);
+# requests beyond INFERENCE_MAX_PENDING in flight get 503
+inference_pool = InferencePool(
+    kind=os.environ.get("INFERENCE_POOL", "thread"),
+    workers=int(os.environ.get("INFERENCE_WORKERS", 4)),
+    max_pending=int(os.environ.get("INFERENCE_MAX_PENDING", 64)),
+    artifact_path=MODEL_ARTIFACT_PATH,
+    profile=MODEL_PROFILE
+)
+
+# Optional micro-batching of concurrent /predict calls (MICROBATCH_ENABLED=1):
+# readings arriving within MICROBATCH_MAX_WAIT_MS, up to MICROBATCH_MAX_SIZE,
+# are scored as one batch
+micro_batcher = None
+if os.environ.get("MICROBATCH_ENABLED", "0") == "1":
+    micro_batcher = MicroBatcher(
+        inference_pool,
+        max_batch_size=int(os.environ.get("MICROBATCH_MAX_SIZE", 64)),
+        max_wait_ms=float(os.environ.get("MICROBATCH_MAX_WAIT_MS", 2.0))
+    )
+
+# Model outputs cached by reading: up to PREDICTION_CACHE_SIZE entries (0, the
+# default, disables the cache) for PREDICTION_CACHE_TTL seconds. Only identical
+# readings share an entry unless PREDICTION_CACHE_PRECISION sets a step per
+# feature (e.g. "temperature=0.1,rpm=1"): readings within half a step then share
+# one, and get the output of whichever reading filled it. That trades accuracy
+# for hit rate: at 0.1 °C / 0.01 mm/s / 0.1 PSI / 1 rpm about 2% of such
+# readings get another severity, fault or recommendation than uncached, and
+# most another remaining useful life.
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get("PREDICTION_CACHE_SIZE", 0)),
+    ttl_seconds=float(os.environ.get("PREDICTION_CACHE_TTL", 300)),
+    precision=parse_precision(os.environ.get("PREDICTION_CACHE_PRECISION"))
+)
+
+def install_model(new_model):
+    """Make new_model the served model (called by model_registry)."""
+    global model
+    # the pool is ready before any request can see the new model
+    if model is None:
+        inference_pool.start(new_model)
+    else:
+        inference_pool.swap_model(new_model)
+    model = new_model
+    prediction_cache.invalidate(new_model)
+
+# Served model version and swap history; POST /model/reload builds a new model
+# in the background and swaps it in when ready
+model_registry = ModelRegistry(install_model)
+
+# Rolling statistics per machine_id over the last N readings for each N in
+# MACHINE_WINDOWS, for at most MAX_MACHINES machines
+machine_states = MachineStates(
+    windows=[int(w) for w in os.environ.get("MACHINE_WINDOWS", "10,60").split(",")],
+    max_machines=int(os.environ.get("MAX_MACHINES", 10000))
+)
+
+# Live feed of predictions and alerts (GET /stream); each subscriber buffers at
+# most STREAM_QUEUE_SIZE events before its oldest are dropped
+broadcaster = Broadcaster(max_queue=int(os.environ.get("STREAM_QUEUE_SIZE", 100)))
+
+# Idle live-feed connections get a comment line this often, so proxies keep them open
+STREAM_KEEPALIVE_SECONDS = 15.0
+
+# Upper bound on readings accepted by POST /predict/batch
+MAX_BATCH_SIZE = 10000
 
 class SensorData(BaseModel):
     temperature: float = Field(..., ge=0, le=200, description="Temperature in °C")
     vibration: float = Field(..., ge=0, le=20, description="Vibration in mm/s")
     pressure: float = Field(..., ge=0, le=500, description="Pressure in PSI")
     rpm: float = Field(..., ge=0, le=5000, description="RPM")
+    machine_id: Optional[str] = Field(None, max_length=64, description="Machine identifier")
 
 class PredictionResponse(BaseModel):
     health_status: str
@@ -43,18 +214,66 @@ class PredictionResponse(BaseModel):
     recommendation: str
     remaining_useful_life: int
     timestamp: str
+    machine_features: Optional[Dict[str, float]] = None
+
+class SensorBatch(BaseModel):
+    readings: List[SensorData]
+
+class BatchPredictionResponse(BaseModel):
+    count: int
+    predictions: List[PredictionResponse]
 
 class Alert(BaseModel):
     id: int
     severity: str
     message: str
-    timestamp: str
-    sensor_data: Dict[str, float]
+    timestamp: str  # when the alert was opened
+    sensor_data: Dict[str, float]  # latest degraded reading
+    machine_id: Optional[str] = None
+    status: str = "open"  # open / resolved
+    acknowledged: bool = False
+    root_cause: Optional[str] = None
+    count: int = 1  # degraded readings folded into the alert
+    warning_count: int = 0
+    critical_count: int = 0
+    last_seen: Optional[str] = None
+    resolved_at: Optional[str] = None
+    acknowledged_at: Optional[str] = None
 
 @app.on_event("startup")
 async def startup_event():
-    """Train the model on startup"""
-    model.train()
+    """
+    Serve a model that is already trained (e.g. loaded by serve.py before
+    forking workers); otherwise start loading the saved model (training it
+    first if needed) in the background. Until it is ready /health reports
+    model_loading and prediction endpoints answer 503. Alerts left open in
+    the store are handed back to this process's alert engine.
+    """
+    global model
+    alert_engine.restore(await run_in_threadpool(store.open_alerts))
+    if model is not None and model.is_trained:
+        # registered as the first model, which also starts the inference pool
+        ready, model = model, None
+        model_registry.register(ready, "startup")
+    else:
+        model_registry.reload_in_background(load_model, "startup")
+
+def served_model():
+    """The model to serve this request with; 503 while the startup load is still running"""
+    served = model
+    if served is None:
+        if model_registry.last_error is not None:
+            detail = f"Model failed to load: {model_registry.last_error['error']}"
+        else:
+            detail = "Model is loading, retry shortly"
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "5"})
+    return served
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the inference pool, then flush and close the storage backend"""
+    inference_pool.shutdown()
+    store.close()
 
 @app.get("/")
 async def root():
@@ -64,145 +283,563 @@ async def root():
         "version": "1.0.0",
         "endpoints": [
             "/predict - POST sensor data for prediction",
+            "/predict/batch - POST a list of sensor readings for prediction",
+            "/predict/file - POST a CSV/Parquet file of readings for offline scoring",
             "/history - GET sensor data history",
+            "/machines - GET machines seen by the API",
+            "/machines/{machine_id}/features - GET a machine's rolling sensor statistics",
             "/alerts - GET current alerts",
+            "/alerts/{alert_id}/acknowledge - POST acknowledge an alert",
+            "/stream - GET live feed of predictions and alerts (Server-Sent Events)",
+            "/model - GET served model version and swap history",
+            "/model/reload - POST to load or retrain a model in the background and swap it in",
+            "/cache - GET prediction cache statistics (DELETE to clear it)",
+            "/metrics - GET Prometheus metrics",
             "/health - GET API health status"
         ]
     }
 
-@app.post("/predict", response_model=PredictionResponse)
-async def predict_maintenance(sensor_data: SensorData):
+def build_prediction(ai_prediction: dict, timestamp: str) -> dict:
     """
-    Predict equipment health based on sensor data using pure AI (no rule-based calculations)
+    Map raw AI outputs from PredictiveMaintenanceAIOnly to the API response format
     """
-    try:
-        data_dict = sensor_data.dict()
+    health_status = ai_prediction["predicted_severity"].capitalize()
 
-        # Get AI prediction
-        ai_prediction = model.predict(data_dict)
+    # Calculate failure risk based on severity probabilities
+    severity_probs = ai_prediction["severity_probabilities"]
+    failure_risk = int((severity_probs.get("warning", 0) * 50 + severity_probs.get("critical", 0) * 100))
+    failure_risk = max(0, min(100, failure_risk))  # Ensure within 0-100 range
 
-        # Map AI outputs to expected API format
-        health_status = ai_prediction["predicted_severity"].capitalize()
+    # If health status is Healthy, force failure risk to 0
+    if health_status == "Healthy":
+        failure_risk = 0
 
-        # Calculate failure risk based on severity probabilities
-        severity_probs = ai_prediction["severity_probabilities"]
-        failure_risk = int((severity_probs.get("warning", 0) * 50 + severity_probs.get("critical", 0) * 100))
-        failure_risk = max(0, min(100, failure_risk))  # Ensure within 0-100 range
+    # Determine anomaly detection
+    anomaly_detected = health_status != "Healthy"
+    anomaly_probability = round(severity_probs.get("warning", 0) + severity_probs.get("critical", 0), 3)
 
-        # If health status is Healthy, force failure risk to 0
-        if health_status == "Healthy":
-            failure_risk = 0
+    # Format root cause from fault type
+    fault_type = ai_prediction["predicted_fault_type"]
+    if fault_type == "healthy":
+        root_cause = "Normal operation"
+    else:
+        root_cause = fault_type.replace("_", " ").title()
 
-        # Determine anomaly detection
-        anomaly_detected = health_status != "Healthy"
-        anomaly_probability = round(severity_probs.get("warning", 0) + severity_probs.get("critical", 0), 3)
+    return {
+        "health_status": health_status,
+        "failure_risk": failure_risk,
+        "anomaly_detected": anomaly_detected,
+        "anomaly_probability": round(anomaly_probability, 3),
+        "root_cause": root_cause,
+        "recommendation": ai_prediction["recommendation"],
+        "remaining_useful_life": ai_prediction["predicted_rul_hours"],
+        "timestamp": timestamp,
+        "machine_features": ai_prediction.get("machine_features")
+    }
 
-        # Format root cause from fault type
-        fault_type = ai_prediction["predicted_fault_type"]
-        if fault_type == "healthy":
-            root_cause = "Normal operation"
-        else:
-            root_cause = fault_type.replace("_", " ").title()
+def record_prediction(data_dict: dict, prediction: dict, machine_id: Optional[str] = None):
+    """
+    Store a prediction in history, publish it to the live feed and raise,
+    update or resolve the machine's alert
+    """
+    store.add_prediction(data_dict, prediction, machine_id)
+    metrics.predictions_total.inc(prediction["health_status"])
+    broadcaster.publish(
+        "prediction",
+        {"machine_id": machine_id, "sensor_data": data_dict, "prediction": prediction},
+        machine_id
+    )
+
+    event, alert = alert_engine.observe(machine_id, data_dict, prediction)
+    if event is None:
+        return
+    if event == "opened":
+        store.add_alert(alert)
+    else:
+        store.update_alert(alert)
+    # the live feed and alert counters only see changes of alert state, not every reading
+    if event != "updated":
+        if event in ("opened", "escalated"):
+            metrics.alerts_total.inc(alert["severity"])
+        broadcaster.publish("alert", {"event": event, **alert}, machine_id)
+
+def cacheable(ai_prediction: dict) -> dict:
+    """A model output without the per-request machine features"""
+    return {k: v for k, v in ai_prediction.items() if k != "machine_features"}
+
+def with_features(ai_prediction: dict, features: Optional[dict]) -> dict:
+    return ai_prediction if features is None else {**ai_prediction, "machine_features": features}
+
+async def predict_reading(served, data_dict: dict, features: Optional[dict]) -> dict:
+    """Model output for one reading, from the prediction cache if possible"""
+    key = None
+    if prediction_cache.enabled:
+        key = prediction_cache.key(data_dict)
+        cached = prediction_cache.get(key, served)
+        if cached is not None:
+            return with_features(cached, features)
+
+    if micro_batcher is not None:
+        ai_prediction = await micro_batcher.predict(served, data_dict, features)
+    else:
+        ai_prediction = (await inference_pool.predict_batch(served, [data_dict], [features]))[0]
+
+    if key is not None:
+        prediction_cache.put(key, cacheable(ai_prediction), served)
+    return ai_prediction
+
+async def predict_readings(served, data_dicts: List[dict], context: List[Optional[dict]]) -> List[dict]:
+    """Model outputs for many readings; only cache misses go to the model, in one batch"""
+    if not prediction_cache.enabled:
+        return await inference_pool.predict_batch(served, data_dicts, context)
+
+    keys = [prediction_cache.key(data_dict) for data_dict in data_dicts]
+    results = [prediction_cache.get(key, served) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        fresh = await inference_pool.predict_batch(
+            served, [data_dicts[i] for i in missing], [context[i] for i in missing]
+        )
+        for i, ai_prediction in zip(missing, fresh):
+            prediction_cache.put(keys[i], cacheable(ai_prediction), served)
+            results[i] = ai_prediction
+    missed = set(missing)
+    return [
+        result if i in missed else with_features(result, features)
+        for i, (result, features) in enumerate(zip(results, context))
+    ]
+
+@app.post("/predict", response_model=PredictionResponse)
+async def predict_maintenance(sensor_data: SensorData, request: Request):
+    """
+    Predict equipment health based on sensor data using pure AI (no rule-based calculations).
+    Send Accept: application/msgpack for a MessagePack response.
+    """
+    respond = serialization.negotiate(request)
+    served = served_model()
+    try:
+        data_dict = sensor_data.dict(exclude={"machine_id"})
+        now = datetime.datetime.now()
+
+        # Update the machine's rolling statistics with this reading
+        features = None
+        if sensor_data.machine_id is not None:
+            features = machine_states.update(sensor_data.machine_id, data_dict, now)
+
+        # Get AI prediction (cached, or on the inference pool, not the event loop)
+        with metrics.stage("inference"):
+            ai_prediction = await predict_reading(served, data_dict, features)
 
         # Build complete prediction response
-        prediction = {
-            "health_status": health_status,
-            "failure_risk": failure_risk,
-            "anomaly_detected": anomaly_detected,
-            "anomaly_probability": round(anomaly_probability, 3),
-            "root_cause": root_cause,
-            "recommendation": ai_prediction["recommendation"],
-            "remaining_useful_life": ai_prediction["predicted_rul_hours"],
-            "timestamp": datetime.datetime.now().isoformat()
-        }
-
-        # Store in history (keep last 1000 entries)
-        sensor_history.append({
-            "timestamp": prediction["timestamp"],
-            "sensor_data": data_dict,
-            "prediction": prediction
-        })
-
-        if len(sensor_history) > 1000:
-            sensor_history.pop(0)
-
-        # Generate alerts if necessary
-        if prediction["health_status"] in ["Warning", "Critical"]:
-            alert = Alert(
-                id=len(alerts) + 1,
-                severity="Critical" if prediction["health_status"] == "Critical" else "Warning",
-                message=f"{prediction['health_status']}: {prediction['root_cause']} - {prediction['recommendation']}",
-                timestamp=prediction["timestamp"],
-                sensor_data=data_dict
-            )
-            alerts.append(alert)
-
-            # Keep only last 50 alerts
-            if len(alerts) > 50:
-                alerts.pop(0)
-
-        return prediction
+        with metrics.stage("postprocess"):
+            prediction = build_prediction(ai_prediction, now.isoformat())
+        with metrics.stage("record"):
+            record_prediction(data_dict, prediction, sensor_data.machine_id)
+
+        # build_prediction's output already has the response shape: encoded
+        # directly, without response_model validation
+        with metrics.stage("encode"):
+            return respond(prediction)
 
+    except (PoolSaturatedError, StoreFullError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_maintenance_batch(batch: SensorBatch, request: Request):
+    """
+    Predict equipment health for many readings in one vectorized model pass.
+    Results are returned in input order and match POST /predict row for row.
+    Send Accept: application/msgpack for a MessagePack response.
+    """
+    respond = serialization.negotiate(request)
+    if len(batch.readings) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(batch.readings)} readings (max {MAX_BATCH_SIZE})"
+        )
+
+    served = served_model()
+    try:
+        data_dicts = [reading.dict(exclude={"machine_id"}) for reading in batch.readings]
+        now = datetime.datetime.now()
+
+        # Readings of the same machine update its statistics in batch order
+        context = [
+            machine_states.update(reading.machine_id, data_dict, now) if reading.machine_id is not None else None
+            for reading, data_dict in zip(batch.readings, data_dicts)
+        ]
+
+        with metrics.stage("inference"):
+            ai_predictions = await predict_readings(served, data_dicts, context)
+
+        timestamp = now.isoformat()
+        with metrics.stage("postprocess"):
+            predictions = [build_prediction(ai_prediction, timestamp) for ai_prediction in ai_predictions]
+        with metrics.stage("record"):
+            for reading, data_dict, prediction in zip(batch.readings, data_dicts, predictions):
+                record_prediction(data_dict, prediction, reading.machine_id)
+
+        with metrics.stage("encode"):
+            return respond({"count": len(predictions), "predictions": predictions})
+
+    except (PoolSaturatedError, StoreFullError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+@app.post("/predict/file")
+async def predict_file(
+    file: UploadFile = File(...),
+    summary: bool = False,
+    chunk_size: int = Query(50000, ge=1, le=500000)
+):
+    """
+    Score an uploaded CSV (or Parquet) file of historical readings in chunks
+    of chunk_size rows. Columns are mapped and converted as by bulk_ingest
+    (temperature_C, pressure_bar in bar, vibration_mm_s, rpm, or the API's
+    names). Returns the scored rows as a CSV stream, or with summary=true only
+    row counts and throughput. Results are not added to history or alerts.
+    """
+    import bulk_ingest  # pandas: only loaded once a file is uploaded
+
+    served = served_model()  # the whole file is scored by one model, even if it is swapped meanwhile
+    chunks = None
+    try:
+        fmt = bulk_ingest.detect_format(file.filename or "", None)
+        chunks = bulk_ingest.read_chunks(file.file, chunk_size, fmt)
+        first = await run_in_threadpool(next, chunks, None)
+        if first is None:
+            raise ValueError("File has no rows")
+        prepared = bulk_ingest.prepare_chunk(first, served.feature_cols, 0)
+    except Exception as e:
+        if chunks is not None:
+            chunks.close()  # release the reader while the upload is still open
+        raise HTTPException(status_code=400, detail=f"Unreadable sensor file: {str(e)}")
+
+    stats = bulk_ingest.ScoreStats()
+
+    async def scored_frames():
+        raw, (rows, X) = first, prepared
+        offset = len(raw)
+        try:
+            while True:
+                # wait for room on the inference pool rather than failing halfway through the file
+                while True:
+                    try:
+                        columns = await inference_pool.call(served, "predict_columns", X)
+                        break
+                    except PoolSaturatedError:
+                        await asyncio.sleep(0.05)
+                frame = bulk_ingest.results_frame(served, rows, X, columns)
+                bulk_ingest.update_stats(stats, len(raw), frame)
+                yield frame
+
+                raw = await run_in_threadpool(next, chunks, None)
+                if raw is None:
+                    return
+                rows, X = bulk_ingest.prepare_chunk(raw, served.feature_cols, offset)
+                offset += len(raw)
+        finally:
+            chunks.close()
+
+    if summary:
+        try:
+            async for _ in scored_frames():
+                pass
+            return stats.as_dict()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"File scoring failed: {str(e)}")
+
+    async def csv_body():
+        header = True
+        async for frame in scored_frames():
+            yield frame.to_csv(header=header, index=False)
+            header = False
+
+    name = os.path.splitext(os.path.basename(file.filename or "readings"))[0].replace('"', "")
+    return StreamingResponse(
+        csv_body(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{name}_scored.csv"'}
+    )
+
+def to_local_naive(timestamp: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+    """History timestamps are naive local time; convert aware query bounds to match"""
+    if timestamp is not None and timestamp.tzinfo is not None:
+        return timestamp.astimezone().replace(tzinfo=None)
+    return timestamp
+
 @app.get("/history")
-async def get_sensor_history(limit: Optional[int] = 50):
+async def get_sensor_history(
+    request: Request,
+    limit: Optional[int] = 50,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    machine_id: Optional[str] = None,
+    max_points: Optional[int] = None
+):
     """
-    Get recent sensor data history
+    Get sensor data history, newest `limit` entries (0 for no limit).
+    Optionally restricted to [start, end] and one machine, and downsampled
+    to the latest entry in each of `max_points` equal time buckets.
+    Send Accept: application/msgpack for a MessagePack response.
     """
+    respond = serialization.negotiate(request)
     try:
-        return sensor_history[-limit:] if limit else sensor_history
+        # SQLite reads wait for queued writes: off the event loop
+        return respond(await run_in_threadpool(
+            store.history,
+            limit=limit,
+            start=to_local_naive(start),
+            end=to_local_naive(end),
+            machine_id=machine_id,
+            max_points=max_points
+        ))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve history: {str(e)}")
 
+@app.get("/machines")
+async def get_machines():
+    """
+    Machines that have sent readings, most recently updated first
+    """
+    return machine_states.machines()
+
+@app.get("/machines/{machine_id}/features")
+async def get_machine_features(machine_id: str):
+    """
+    Rolling mean, variance, slope (per second) and EWMA of each sensor over
+    the machine's last N readings, for each configured window N
+    """
+    features = machine_states.features(machine_id)
+    if features is None:
+        raise HTTPException(status_code=404, detail=f"No readings for machine {machine_id!r}")
+    return {"machine_id": machine_id, "windows": list(machine_states.windows), "features": features}
+
 @app.get("/alerts")
-async def get_alerts(severity: Optional[str] = None):
+async def get_alerts(
+    severity: Optional[str] = None,
+    status: Optional[str] = Query(None, pattern="^(open|resolved)$")
+):
     """
-    Get current alerts, optionally filtered by severity
+    Get current alerts, optionally filtered by severity and status (open / resolved):
+    every open alert of a machine and the most recent others, in the order they were opened
     """
     try:
-        if severity:
-            filtered_alerts = [alert for alert in alerts if alert.severity.lower() == severity.lower()]
-            return filtered_alerts
-        return alerts
+        return await run_in_threadpool(store.alerts, severity, status)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve alerts: {str(e)}")
 
+@app.post("/alerts/{alert_id}/acknowledge", response_model=Alert)
+async def acknowledge_alert(alert_id: int):
+    """
+    Acknowledge an alert; an open alert stays open (and is unacknowledged
+    again if it escalates) until its machine is healthy again
+    """
+    now = datetime.datetime.now().isoformat()
+    try:
+        alert = alert_engine.acknowledge(alert_id, now)
+        if alert is not None:
+            store.update_alert(alert)
+        else:
+            # resolved, or open in another worker: only its acknowledgement changes
+            alert = await run_in_threadpool(store.get_alert, alert_id)
+            if alert is not None:
+                alert.update(acknowledged=True, acknowledged_at=now)
+                store.acknowledge_alert(alert_id, now)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to acknowledge alert: {str(e)}")
+    if alert is None:
+        raise HTTPException(status_code=404, detail=f"Alert {alert_id} not found")
+    return alert
+
 @app.delete("/alerts/{alert_id}")
 async def delete_alert(alert_id: int):
     """
-    Delete a specific alert
+    Delete a specific alert; if it was open, the machine's next degraded
+    reading opens a new one
     """
     try:
-        global alerts
-        alerts = [alert for alert in alerts if alert.id != alert_id]
+        alert_engine.forget(alert_id)
+        await run_in_threadpool(store.delete_alert, alert_id)
         return {"message": f"Alert {alert_id} deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete alert: {str(e)}")
 
+@app.get("/stream")
+async def stream_events(machine_id: Optional[str] = None):
+    """
+    Live feed of new predictions and alerts as Server-Sent Events
+    ("prediction" and "alert" events), optionally for one machine only
+    """
+    async def events():
+        subscriber = broadcaster.subscribe(machine_id)
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    events = [await asyncio.wait_for(subscriber.queue.get(), STREAM_KEEPALIVE_SECONDS)]
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                # a client that fell behind gets everything queued in one write
+                while not subscriber.queue.empty():
+                    events.append(subscriber.queue.get_nowait())
+                yield b"".join(events)
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/model")
+async def get_model_status():
+    """
+    Served model version, fingerprint and training time, any reload in
+    progress and the swap history
+    """
+    return model_registry.status()
+
+@app.post("/model/reload", status_code=202)
+async def reload_model(
+    mode: str = Query("load", pattern="^(load|retrain)$"),
+    n_samples: int = Query(30000, ge=1000, le=1000000)
+):
+    """
+    Build a new model in the background and swap it in once it is ready;
+    requests are served by the current model until then.
+    mode=load re-reads the artifact at MODEL_ARTIFACT_PATH (training and saving
+    it if missing or stale); mode=retrain trains from scratch on n_samples
+    synthetic rows and saves the artifact. Either way the MODEL_PROFILE
+    compression of it is served.
+    """
+    def build():
+        new_model = create_model()
+        if mode == "retrain":
+            new_model.train(n_samples=n_samples)
+            new_model.save(MODEL_ARTIFACT_PATH)
+            new_model = compression.compress_and_save(new_model, MODEL_ARTIFACT_PATH, MODEL_PROFILE)
+        else:
+            new_model = compression.load_or_compress(new_model, MODEL_ARTIFACT_PATH, MODEL_PROFILE,
+                                                     n_samples=n_samples)
+        return attach_screen(new_model)
+
+    if not model_registry.reload_in_background(build, mode):
+        raise HTTPException(status_code=409, detail="A model reload is already in progress")
+    return {"message": f"Model {mode} started", "model": model_registry.status()}
+
+@app.get("/cache")
+async def get_cache_stats():
+    """
+    Prediction cache size, settings and hit/miss/eviction counters
+    """
+    return prediction_cache.stats()
+
+@app.delete("/cache")
+async def clear_cache():
+    """
+    Drop every cached prediction
+    """
+    prediction_cache.invalidate()
+    return {"message": "Prediction cache cleared"}
+
+def cascade_stats():
+    """Screening stage counters and calibration of the served model, or None outside cascade mode"""
+    served = model
+    if served is None or served.screen is None:
+        return None
+    return served.screen.stats()
+
+def cascade_outcomes():
+    stats = cascade_stats()
+    if stats is None:
+        return None
+    return {("cleared",): stats["cleared"], ("escalated",): stats["escalated"]}
+
+def training_seconds():
+    """Duration of each training stage of the served model (empty if it was loaded, not trained)"""
+    served = model
+    if served is None:
+        return None
+    return {
+        (name,): stage["seconds"]
+        for name, stage in served.training_stats.items()
+        if isinstance(stage, dict) and "seconds" in stage
+    }
+
+# Gauges read when /metrics is scraped, so they cost nothing between scrapes
+metrics.Callback("pm_history_size", "Predictions held in history", lambda: store.history_count())
+metrics.Callback("pm_alerts_size", "Alerts held in the alert buffer", lambda: store.alerts_count())
+metrics.Callback("pm_alerts_open", "Machines with an open alert", lambda: len(alert_engine))
+metrics.Callback("pm_machines_tracked", "Machines with rolling statistics", lambda: len(machine_states))
+metrics.Callback("pm_stream_subscribers", "Connected live feed clients", lambda: len(broadcaster))
+metrics.Callback("pm_inference_in_flight", "Predictions running or queued on the inference pool",
+                 lambda: inference_pool.stats()["in_flight"])
+metrics.Callback("pm_inference_rejected_total", "Predictions rejected because the inference pool was saturated",
+                 lambda: inference_pool.rejected, kind="counter")
+metrics.Callback("pm_cache_entries", "Entries in the prediction cache", lambda: prediction_cache.stats()["entries"])
+metrics.Callback("pm_cache_lookups_total", "Prediction cache lookups by result",
+                 lambda: {("hit",): prediction_cache.hits, ("miss",): prediction_cache.misses},
+                 labels=("result",), kind="counter")
+metrics.Callback("pm_model_version", "Version of the served model (increments on every swap)",
+                 lambda: model_registry.version)
+metrics.Callback("pm_cascade_readings_total", "Readings screened in cascade mode, by outcome",
+                 cascade_outcomes, labels=("outcome",), kind="counter")
+metrics.Callback("pm_model_training_seconds", "Training duration of the served model, by stage",
+                 training_seconds, labels=("stage",))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Prometheus metrics in the text exposition format
+    """
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=0)")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     """
     API health check
     """
+    served = model
+    if served is not None:
+        status = "healthy"
+    elif model_registry.reloading:
+        status = "model_loading"
+    else:
+        status = "model_load_failed"  # see model.last_reload_error
     return {
-        "status": "healthy",
-        "model_trained": model.is_trained,
+        "status": status,
+        "model_loading": served is None,
+        "model_trained": served is not None and served.is_trained,
+        "model": model_registry.status(),
         "timestamp": datetime.datetime.now().isoformat(),
-        "history_count": len(sensor_history),
-        "alerts_count": len(alerts)
+        "history_count": store.history_count(),
+        "alerts_count": store.alerts_count(),
+        "open_alerts": len(alert_engine),
+        "machines_tracked": len(machine_states),
+        "stream": broadcaster.stats(),
+        "inference": inference_pool.stats(),
+        "cache": prediction_cache.stats(),
+        "cascade": cascade_stats(),
+        "microbatch": micro_batcher.stats() if micro_batcher is not None else None
     }
 
 @app.post("/reset")
 async def reset_system():
     """
-    Reset the system (clear history and alerts)
+    Reset the system (clear history, alerts and machine statistics)
     """
     try:
-        global sensor_history, alerts
-        sensor_history = []
-        alerts = []
+        await run_in_threadpool(store.clear)
+        alert_engine.clear()
+        machine_states.clear()
         return {"message": "System reset successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Reset failed: {str(e)}")
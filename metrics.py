@@ -0,0 +1,224 @@
+"""
+Prometheus-style metrics without the client library.
+
+Counters and histograms are plain Python objects updated in place; gauges
+(and counters kept elsewhere, e.g. by the cache) are read through callbacks
+only when /metrics is scraped. render() produces the Prometheus text
+exposition format.
+
+Set METRICS_ENABLED=0 to turn recording off: stage() then returns a shared
+no-op context manager and inc()/observe() return immediately.
+"""
+import bisect
+import os
+import threading
+import time
+
+enabled = os.environ.get("METRICS_ENABLED", "1") == "1"
+
+# Latency buckets in seconds, from 50 µs (a cache hit) to 10 s (a large file chunk)
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"'.replace("\n", " ") for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *label_values, amount=1):
+        if not enabled:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, *label_values):
+        if not enabled:
+            return
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labels + ("le",), label_values + (le,))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {repr(float(series[-1]))}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Callback:
+    """
+    A gauge or counter whose values are read at scrape time.
+    fn returns a number, or a dict of label value tuple -> number.
+    """
+
+    def __init__(self, name, help, fn, labels=(), kind="gauge"):
+        self.name, self.help, self.fn, self.labels, self.kind = name, help, fn, tuple(labels), kind
+        _registry.append(self)
+
+    def collect(self):
+        try:
+            values = self.fn()
+        except Exception:
+            return
+        if values is None:
+            return
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        if not isinstance(values, dict):
+            values = {(): values}
+        for label_values, value in sorted(values.items()):
+            if value is not None:
+                yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class _StageTimer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        stage_duration.observe(time.perf_counter() - self.start, self.stage)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_null_timer = _NullTimer()
+
+
+def stage(name):
+    """Context manager timing one stage of request handling into stage_duration."""
+    return _StageTimer(name) if enabled else _null_timer
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+stage_duration = Histogram(
+    "pm_stage_duration_seconds",
+    "Time spent in each stage of handling a prediction request",
+    labels=("stage",)
+)
+request_duration = Histogram(
+    "pm_http_request_duration_seconds",
+    "HTTP request latency, including validation and serialization",
+    labels=("method", "path")
+)
+requests_total = Counter(
+    "pm_http_requests_total", "HTTP requests by route and status code", labels=("method", "path", "status")
+)
+predictions_total = Counter(
+    "pm_predictions_total", "Predictions served, by health status", labels=("health_status",)
+)
+alerts_total = Counter("pm_alerts_total", "Alerts opened or escalated, by severity", labels=("severity",))
+
+
+class ASGIMiddleware:
+    """
+    Records request_duration and requests_total for every HTTP request.
+    routes: the application's route list, used to label requests with the
+    matched path template (e.g. /alerts/{alert_id}) so label values stay bounded.
+    """
+
+    def __init__(self, app, routes=()):
+        self.app = app
+        self.routes = routes
+        self._paths = {}  # endpoint -> path template
+
+    def _path(self, scope):
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._paths.get(endpoint)
+        if path is None:
+            self._paths = {getattr(r, "endpoint", None): r.path for r in self.routes}
+            path = self._paths.get(endpoint, "unmatched")
+        return path
+
+    async def __call__(self, scope, receive, send):
+        if not enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # the router adds the matched endpoint to scope
+            path = self._path(scope)
+            request_duration.observe(time.perf_counter() - start, scope["method"], path)
+            requests_total.inc(scope["method"], path, status[0])
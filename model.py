@@ -1,12 +1,86 @@
+import concurrent.futures
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
 import numpy as np
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.neighbors import NearestNeighbors
+import metrics
 import warnings
 warnings.filterwarnings("ignore")
 
+# sklearn, joblib and pandas are imported where they are first needed: the API
+# imports this module on its quick-boot path, before the model is loaded, and
+# pandas is only needed to generate training data, never to serve predictions.
+
+# Bump when the artifact layout changes
+ARTIFACT_VERSION = 2
+# Bump when generate_synthetic_dataset changes the data it produces
+DATASET_VERSION = 1
+
+# Label vocabularies of the synthetic dataset; codes index into these arrays
+FAULT_TYPES = np.array(["healthy", "overheating", "imbalance", "leakage", "overspeed", "mixed"], dtype=object)
+SEVERITIES = np.array(["healthy", "warning", "critical"], dtype=object)
+HEALTHY, OVERHEATING, IMBALANCE, LEAKAGE, OVERSPEED, MIXED = range(len(FAULT_TYPES))
+WARNING, CRITICAL = 1, 2
+
+# Recommendations stored as "historical actions" to retrieve later (kNN), one per fault type
+RECOMMENDATIONS = np.array([
+    "No action needed. Continue monitoring.",
+    "Inspect cooling path, airflow, and thermal interface.",
+    "Check alignment/bearings and perform vibration balancing.",
+    "Inspect seals/valves and verify pressure integrity.",
+    "Verify controller limits and inspect drivetrain load conditions.",
+    "Run full inspection: thermal + vibration + pressure subsystems."
+], dtype=object)
+
+
+def rss_mb():
+    """Resident memory of this process right now in MB (None where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+@contextlib.contextmanager
+def training_stage(stats, name, interval=0.01):
+    """
+    Record the wall-clock time and memory of a training stage in stats[name]:
+    peak_rss_mb is the highest resident memory sampled (every interval seconds)
+    while the stage ran, peak_increase_mb how far that rose above the memory in
+    use when it started. Stages running at the same time (the concurrent forest
+    fits) share the process, so each one's peak includes the others' memory.
+    """
+    peak = [rss_mb()]
+    start_rss = peak[0]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(interval):
+            peak[0] = max(peak[0], rss_mb())
+
+    sampler = None
+    if start_rss is not None:
+        sampler = threading.Thread(target=sample, name=f"rss-{name}", daemon=True)
+        sampler.start()
+    started = time.perf_counter()
+    try:
+        yield
+        seconds = time.perf_counter() - started
+    finally:
+        done.set()
+        if sampler is not None:
+            sampler.join()
+
+    peak_rss = increase = None
+    if start_rss is not None:
+        peak_rss = max(peak[0], rss_mb())
+        increase = peak_rss - start_rss
+    stats[name] = {"seconds": seconds, "peak_rss_mb": peak_rss, "peak_increase_mb": increase}
+
 
 class PredictiveMaintenanceAIOnly:
     """
@@ -17,25 +91,41 @@ class PredictiveMaintenanceAIOnly:
     - Recommendation: kNN retrieval from similar training samples (no hard-coded rules)
     """
 
-    def __init__(self, random_state=42):
+    def __init__(self, random_state=42, neighbor_index="auto", n_jobs=None):
+        """
+        neighbor_index: how recommendations are retrieved, see RecommendationIndex
+        ("auto", "kd_tree", "ball_tree", "brute" or the approximate "grid")
+        n_jobs: cores each forest uses to build its trees (None: 1, -1: all).
+        The three forests are fitted concurrently, so up to 3 * n_jobs cores are used.
+        """
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+        from retrieval import RecommendationIndex
+
         self.random_state = random_state
 
         self.scaler = StandardScaler()
 
         self.fault_model = RandomForestClassifier(
-            n_estimators=300, random_state=random_state, class_weight="balanced"
+            n_estimators=300, random_state=random_state, class_weight="balanced", n_jobs=n_jobs
         )
         self.severity_model = RandomForestClassifier(
-            n_estimators=300, random_state=random_state, class_weight="balanced"
+            n_estimators=300, random_state=random_state, class_weight="balanced", n_jobs=n_jobs
         )
         self.rul_model = RandomForestRegressor(
-            n_estimators=400, random_state=random_state
+            n_estimators=400, random_state=random_state, n_jobs=n_jobs
         )
 
-        self.nn = NearestNeighbors(n_neighbors=7)
+        self.recommender = RecommendationIndex(n_neighbors=7, method=neighbor_index)
 
         self.is_trained = False
-        self.train_df = None  # store training samples for retrieval
+        self.n_samples = None  # training set size of the fitted models
+        self.engine = None  # flat-array copy of the three forests used for inference
+        self.fingerprint = None  # training_fingerprint() of the from-scratch fit
+        self.training_stats = {}  # stage -> {"seconds", "peak_rss_mb", "peak_increase_mb"} of the last train()
+        self.updates = []  # field-data updates (update()) since that fit
+        self.screen = None  # optional cascade.ScreeningStage answering confidently normal readings
+        self.profile = None  # compression.PROFILES spec the forests were compressed with (None: as trained)
 
         self.feature_cols = ["temperature", "vibration", "pressure", "rpm"]
 
@@ -50,8 +140,51 @@ class PredictiveMaintenanceAIOnly:
         - rul_hours: remaining useful life
         Recommendation text is part of the dataset and later retrieved via kNN.
         """
+        import pandas as pd
+
         rng = np.random.default_rng(self.random_state)
+        cols = self._simulate(rng, n_samples, max_life_hours)
+
+        return pd.DataFrame({
+            "temperature": cols["temperature"],
+            "vibration": cols["vibration"],
+            "pressure": cols["pressure"],
+            "rpm": cols["rpm"],
+            "fault_type": FAULT_TYPES[cols["fault_code"]],
+            "severity": SEVERITIES[cols["severity_code"]],
+            "rul_hours": cols["rul_hours"],
+            "recommendation": RECOMMENDATIONS[cols["fault_code"]]
+        })
 
+    def iter_synthetic_dataset(self, n_samples, chunk_size=1_000_000, max_life_hours=1000):
+        """
+        Stream the synthetic dataset as DataFrames of at most chunk_size rows.
+        Label columns are categoricals over small integer codes instead of object
+        arrays, so 10M+ rows can be generated chunk by chunk in bounded memory.
+        Output is reproducible for a given random_state and chunk_size.
+        """
+        import pandas as pd
+
+        rng = np.random.default_rng(self.random_state)
+        for start in range(0, n_samples, chunk_size):
+            cols = self._simulate(rng, min(chunk_size, n_samples - start), max_life_hours)
+            yield pd.DataFrame({
+                "temperature": cols["temperature"],
+                "vibration": cols["vibration"],
+                "pressure": cols["pressure"],
+                "rpm": cols["rpm"],
+                "fault_type": pd.Categorical.from_codes(cols["fault_code"], FAULT_TYPES),
+                "severity": pd.Categorical.from_codes(cols["severity_code"], SEVERITIES),
+                "rul_hours": cols["rul_hours"],
+                "recommendation": pd.Categorical.from_codes(cols["fault_code"], RECOMMENDATIONS)
+            }, index=pd.RangeIndex(start, start + len(cols["rpm"])))
+
+    @staticmethod
+    def _simulate(rng, n_samples, max_life_hours):
+        """
+        Draw n_samples rows from rng. Labels are returned as integer codes into
+        FAULT_TYPES / SEVERITIES (RECOMMENDATIONS share the fault codes).
+        """
         # Latent variables (not visible to the model)
         # age: device age in hours
         age = rng.uniform(0, max_life_hours, n_samples)
@@ -74,11 +207,8 @@ class PredictiveMaintenanceAIOnly:
         p_fault = 1 / (1 + np.exp(-( (age/max_life_hours)*3 + stress*2 - 2.2 )))  # 0..1
         fault_draw = rng.uniform(0, 1, n_samples) < p_fault
 
-        # Assign fault type (healthy or one/mixed)
-        fault_type = np.array(["healthy"] * n_samples, dtype=object)
-
-        # When faulty, pick a dominant mode, sometimes "mixed"
-        modes = np.array(["overheating", "imbalance", "leakage", "overspeed", "mixed"], dtype=object)
+        # When faulty, pick a dominant mode (overheating/imbalance/leakage/overspeed),
+        # sometimes "mixed"
         mode_probs = np.column_stack([
             0.28 + 0.30 * overheat_int,
             0.28 + 0.30 * imbalance_int,
@@ -88,18 +218,25 @@ class PredictiveMaintenanceAIOnly:
         ])
         mode_probs = mode_probs / mode_probs.sum(axis=1, keepdims=True)
 
-        chosen = np.array([rng.choice(modes, p=mode_probs[i]) for i in range(n_samples)])
-        fault_type[fault_draw] = chosen[fault_draw]
+        # Inverse-CDF sampling for all rows at once. This is what rng.choice(p=...)
+        # does per call (one uniform draw, searchsorted right on the normalized
+        # cumulative probabilities), so the draws match a per-row choice loop.
+        cdf = np.cumsum(mode_probs, axis=1)
+        cdf /= cdf[:, -1:]
+        chosen = (cdf <= rng.random(n_samples)[:, np.newaxis]).sum(axis=1)
+
+        # Assign fault type (healthy or one/mixed)
+        fault_code = np.where(fault_draw, chosen + 1, 0).astype(np.int8)
 
         # Severity label (learned target)
         # We create severity from latent "damage" (again: only used to label training data)
         damage = (age/max_life_hours) * 0.6 + stress * 0.4
-        sev = np.array(["healthy"] * n_samples, dtype=object)
-        sev[(damage > 0.45) & (damage <= 0.72)] = "warning"
-        sev[(damage > 0.72)] = "critical"
+        sev = np.zeros(n_samples, dtype=np.int8)
+        sev[(damage > 0.45) & (damage <= 0.72)] = WARNING
+        sev[(damage > 0.72)] = CRITICAL
         # ensure healthy fault_type usually maps to healthy severity but allow some noise
-        healthy_mask = fault_type == "healthy"
-        sev[healthy_mask] = np.where(rng.uniform(0,1,healthy_mask.sum()) < 0.96, "healthy", sev[healthy_mask])
+        healthy_mask = fault_code == HEALTHY
+        sev[healthy_mask] = np.where(rng.uniform(0,1,healthy_mask.sum()) < 0.96, HEALTHY, sev[healthy_mask])
 
         # Sensor generation (overlapping distributions)
         # Base signals
@@ -109,68 +246,287 @@ class PredictiveMaintenanceAIOnly:
         rpm = 2100 + 250*(load-0.7) + rng.normal(0, 120, n_samples)
 
         # Inject fault effects (still overlapping, not simple thresholds)
-        temperature += (fault_type == "overheating") * (18*overheat_int + 10*(age/max_life_hours))
-        vibration += (fault_type == "imbalance") * (2.5*imbalance_int + 1.2*(age/max_life_hours))
-        pressure -= (fault_type == "leakage") * (25*leakage_int + 10*(age/max_life_hours))
-        rpm += (fault_type == "overspeed") * (350*overspeed_int)
+        temperature += (fault_code == OVERHEATING) * (18*overheat_int + 10*(age/max_life_hours))
+        vibration += (fault_code == IMBALANCE) * (2.5*imbalance_int + 1.2*(age/max_life_hours))
+        pressure -= (fault_code == LEAKAGE) * (25*leakage_int + 10*(age/max_life_hours))
+        rpm += (fault_code == OVERSPEED) * (350*overspeed_int)
 
         # Mixed faults: combination
-        is_mixed = (fault_type == "mixed")
+        is_mixed = (fault_code == MIXED)
         temperature += is_mixed * (12*overheat_int)
         vibration += is_mixed * (1.8*imbalance_int)
         pressure -= is_mixed * (18*leakage_int)
         rpm += is_mixed * (220*overspeed_int)
 
-        # Recommendations stored as "historical actions" to retrieve later (kNN)
-        rec_map = {
-            "healthy": "No action needed. Continue monitoring.",
-            "overheating": "Inspect cooling path, airflow, and thermal interface.",
-            "imbalance": "Check alignment/bearings and perform vibration balancing.",
-            "leakage": "Inspect seals/valves and verify pressure integrity.",
-            "overspeed": "Verify controller limits and inspect drivetrain load conditions.",
-            "mixed": "Run full inspection: thermal + vibration + pressure subsystems."
-        }
-        recommendation = np.array([rec_map[x] for x in fault_type], dtype=object)
-
-        df = pd.DataFrame({
+        return {
             "temperature": temperature,
             "vibration": vibration,
             "pressure": pressure,
             "rpm": rpm,
-            "fault_type": fault_type,
-            "severity": sev,
-            "rul_hours": rul,
-            "recommendation": recommendation
-        })
-
-        return df
+            "fault_code": fault_code,
+            "severity_code": sev,
+            "rul_hours": rul
+        }
 
     # ----------------------------
     # 2) TRAIN MODELS
     # ----------------------------
-    def train(self, n_samples=30000):
+    def train(self, n_samples=30000, parallel=True):
+        """
+        Fit everything from scratch on a fresh synthetic dataset.
+        parallel: fit the three forests concurrently (tree building releases
+        the GIL, so threads run in parallel); the fitted models are the same
+        either way. Wall-clock time and peak memory of every stage are kept in
+        training_stats.
+        """
         print("Training PURE AI-based models (fault type, severity, RUL, retrieval)...")
+        stats = {}
+
+        with training_stage(stats, "total"):
+            with training_stage(stats, "dataset"):
+                df = self.generate_synthetic_dataset(n_samples=n_samples)
+                self.n_samples = n_samples
+
+                X = df[self.feature_cols].values
+                y_fault = df["fault_type"].values
+                y_sev = df["severity"].values
+                y_rul = df["rul_hours"].values
+
+            with training_stage(stats, "scaler"):
+                X_scaled = self.scaler.fit_transform(X)
+
+            # Train models
+            with training_stage(stats, "forests"):
+                self._fit_forests([
+                    ("fault_model", self.fault_model, y_fault),
+                    ("severity_model", self.severity_model, y_sev),
+                    ("rul_model", self.rul_model, y_rul),
+                ], X_scaled, stats, parallel)
+
+            # Train retrieval index (kNN over integer-coded recommendations)
+            with training_stage(stats, "recommender"):
+                self.recommender.fit(X_scaled, df["recommendation"].values)
+
+            with training_stage(stats, "engine"):
+                self.build_engine()
+
+        self.training_stats = stats
+        self.fingerprint = self.training_fingerprint(n_samples)
+        self.updates = []
+        self.is_trained = True
+        print(f"Training completed in {stats['total']['seconds']:.1f}s.")
 
-        df = self.generate_synthetic_dataset(n_samples=n_samples)
-        self.train_df = df.copy()
-
-        X = df[self.feature_cols].values
-        y_fault = df["fault_type"].values
-        y_sev = df["severity"].values
-        y_rul = df["rul_hours"].values
+    def update(self, df, new_trees=(50, 50, 50), parallel=True):
+        """
+        Warm start: learn from labeled field data by adding trees instead of
+        refitting from scratch.
+
+        df: readings in feature_cols (API units) with "fault_type", "severity"
+        and "rul_hours" labels, and optionally the "recommendation" taken
+        (defaults to the standard one for the fault type).
+        new_trees: trees added to the fault, severity and RUL forests. They are
+        fitted on df only; existing trees and the scaler are kept as they are.
+        The recommendation index is refitted on its samples plus df.
+        Returns the stage timings, also appended to updates.
+        """
+        if not self.is_trained:
+            raise ValueError("update() needs a trained model; call train() or load() first")
+
+        y_fault = np.asarray(df["fault_type"].values, dtype=object)
+        y_sev = np.asarray(df["severity"].values, dtype=object)
+        # all trees of a forest must share one class list, and warm-started
+        # trees take theirs from the data they are fitted on
+        for label, forest, y in (("fault_type", self.fault_model, y_fault), ("severity", self.severity_model, y_sev)):
+            classes = set(np.unique(y).tolist())
+            if classes != set(forest.classes_.tolist()):
+                raise ValueError(
+                    f"Field data must contain exactly the trained {label} classes "
+                    f"{sorted(forest.classes_.tolist())}, got {sorted(classes)}"
+                )
+
+        if "recommendation" in df:
+            recommendations = df["recommendation"].values
+        else:
+            standard = dict(zip(FAULT_TYPES.tolist(), RECOMMENDATIONS.tolist()))
+            recommendations = np.array([standard[fault] for fault in y_fault], dtype=object)
+
+        fits = [
+            ("fault_model", self.fault_model, y_fault),
+            ("severity_model", self.severity_model, y_sev),
+            ("rul_model", self.rul_model, df["rul_hours"].values),
+        ]
+        stats = {}
+        with training_stage(stats, "total"):
+            X_scaled = self.scaler.transform(df[self.feature_cols].values.astype(float))
+
+            for (_, forest, _), n_new in zip(fits, new_trees):
+                forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + n_new)
+            try:
+                with training_stage(stats, "forests"):
+                    self._fit_forests(fits, X_scaled, stats, parallel)
+            finally:
+                for _, forest, _ in fits:
+                    forest.set_params(warm_start=False, n_estimators=len(forest.estimators_))
+
+            with training_stage(stats, "recommender"):
+                self.recommender.extend(X_scaled, recommendations)
+
+            with training_stage(stats, "engine"):
+                self.build_engine()
+
+        self.updates.append({"rows": len(df), "trees_added": list(new_trees), "stats": stats})
+        return stats
+
+    @staticmethod
+    def _fit_forests(fits, X_scaled, stats, parallel):
+        """Fit (name, forest, y) triples on X_scaled, concurrently if parallel; timings go to stats[name]."""
+        def fit(name, forest, y):
+            with training_stage(stats, name):
+                forest.fit(X_scaled, y)
+
+        if not parallel:
+            for args in fits:
+                fit(*args)
+            return
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(fits), thread_name_prefix="train") as pool:
+            for future in [pool.submit(fit, *args) for args in fits]:
+                future.result()
+
+    def build_engine(self):
+        """Pack the fitted forests into the flat-array inference engine"""
+        from forest_engine import FlatForestEngine
+
+        self.engine = FlatForestEngine({
+            "fault": self.fault_model,
+            "severity": self.severity_model,
+            "rul": self.rul_model,
+        })
 
-        X_scaled = self.scaler.fit_transform(X)
+    # ----------------------------
+    # 2b) PERSIST MODELS
+    # ----------------------------
+    def training_fingerprint(self, n_samples=30000):
+        """
+        Hash of everything that determines the fitted models: estimator
+        hyperparameters, seed, training set size, dataset and library versions.
+        Models grown with update() keep the fingerprint of their from-scratch fit.
+        """
+        import sklearn
+
+        ignored = {"n_jobs", "verbose"}  # do not change the fitted result
+
+        def params(est):
+            return {k: v for k, v in est.get_params().items() if k not in ignored}
+
+        spec = {
+            "artifact_version": ARTIFACT_VERSION,
+            "dataset_version": DATASET_VERSION,
+            "sklearn_version": sklearn.__version__,
+            "random_state": self.random_state,
+            "n_samples": n_samples,
+            "feature_cols": self.feature_cols,
+            "fault_model": params(self.fault_model),
+            "severity_model": params(self.severity_model),
+            "rul_model": params(self.rul_model),
+            "recommender": params(self.recommender),
+        }
+        return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
 
-        # Train models
-        self.fault_model.fit(X_scaled, y_fault)
-        self.severity_model.fit(X_scaled, y_sev)
-        self.rul_model.fit(X_scaled, y_rul)
+    def save(self, path):
+        """
+        Write the fitted scaler, forests, kNN index and recommendation table to
+        path. The file is replaced atomically so concurrent workers never read
+        a partial artifact.
+        """
+        import joblib
 
-        # Train retrieval index (kNN)
-        self.nn.fit(X_scaled)
+        if not self.is_trained:
+            raise ValueError("Cannot save an untrained model")
+
+        artifact = {
+            "artifact_version": ARTIFACT_VERSION,
+            "fingerprint": self.fingerprint,
+            "n_samples": self.n_samples,
+            "training_stats": self.training_stats,
+            "updates": self.updates,
+            "profile": self.profile,
+            "scaler": self.scaler,
+            "fault_model": self.fault_model,
+            "severity_model": self.severity_model,
+            "rul_model": self.rul_model,
+            "recommender": self.recommender,
+        }
 
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            joblib.dump(artifact, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            # no partial artifact left behind (e.g. when the disk is full)
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, path, n_samples=30000, profile=None):
+        """
+        Load an artifact written by save(). Numeric arrays are memory-mapped;
+        the inference engine is packed from the loaded forests.
+        Returns False, leaving the model untouched, if the file is missing,
+        unreadable, was trained with different parameters or was compressed
+        with another profile spec than profile (None: not compressed).
+        """
+        if not os.path.exists(path):
+            return False
+
+        import joblib
+
+        try:
+            artifact = joblib.load(path, mmap_mode="r")
+        except Exception as e:
+            print(f"Could not read model artifact {path}: {e}")
+            return False
+
+        if artifact.get("fingerprint") != self.training_fingerprint(n_samples):
+            print(f"Model artifact {path} is stale.")
+            return False
+        if artifact.get("profile") != profile:
+            print(f"Model artifact {path} was compressed with another profile.")
+            return False
+
+        self.scaler = artifact["scaler"]
+        self.fault_model = artifact["fault_model"]
+        self.severity_model = artifact["severity_model"]
+        self.rul_model = artifact["rul_model"]
+        self.recommender = artifact["recommender"]
+        self.n_samples = artifact["n_samples"]
+        self.fingerprint = artifact["fingerprint"]
+        self.training_stats = artifact.get("training_stats", {})
+        self.updates = artifact.get("updates", [])
+        self.profile = artifact.get("profile")
+        self.build_engine()
         self.is_trained = True
-        print("Training completed.")
+
+        # artifacts that also stored the engine arrays were twice as large
+        if "engine" in artifact:
+            self.save(path)
+            print(f"Removed the inference engine arrays from {path}")
+        return True
+
+    def load_or_train(self, path, n_samples=30000):
+        """
+        Load the artifact at path, retraining (and saving a fresh artifact)
+        only when it is missing or stale.
+        """
+        if self.load(path, n_samples=n_samples):
+            print(f"Loaded trained models from {path}")
+            return
+
+        self.train(n_samples=n_samples)
+        self.save(path)
+        print(f"Saved trained models to {path}")
 
     # ----------------------------
     # 3) PREDICT (NO RULES)
@@ -180,44 +536,128 @@ class PredictiveMaintenanceAIOnly:
         sensor_data keys: temperature, vibration, pressure, rpm
         Returns AI outputs (no hard-coded thresholds).
         """
+        return self.predict_batch([sensor_data])[0]
+
+    def predict_batch(self, readings, context=None):
+        """
+        Score many readings in one vectorized pass through the scaler,
+        the three forests and the kNN index.
+
+        readings: list of dicts with the predict() keys, a dict of equal-length
+        columns, or an (N, 4) array in feature_cols order.
+        context: optional per-reading extra features (e.g. a machine's rolling
+        statistics from machine_state, or None for a reading without them),
+        returned with each prediction as "machine_features". The forests are
+        trained on independent synthetic snapshots, which have no history, so
+        they score feature_cols only.
+        Returns a list of predict() outputs in input order.
+        """
+        columns = self.predict_columns(readings)
+        if len(columns["predicted_rul_hours"]) == 0:
+            return []
+
+        with metrics.stage("format"):
+            results = self._result_dicts(columns)
+        if context is not None:
+            for result, features in zip(results, context):
+                result["machine_features"] = features
+        return results
+
+    def _result_dicts(self, columns):
+        """predict_columns() output as one predict()-style dict per reading"""
+        fault_prob_maps = self._probability_maps(self.fault_model.classes_, columns["fault_probabilities"])
+        sev_prob_maps = self._probability_maps(self.severity_model.classes_, columns["severity_probabilities"])
+
+        return [
+            {
+                "predicted_fault_type": fault,
+                "fault_probabilities": fault_probs,
+                "predicted_severity": sev,
+                "severity_probabilities": sev_probs,
+                "predicted_rul_hours": rul,
+                "recommendation": rec
+            }
+            for fault, fault_probs, sev, sev_probs, rul, rec in zip(
+                columns["predicted_fault_type"].tolist(), fault_prob_maps,
+                columns["predicted_severity"].tolist(), sev_prob_maps,
+                columns["predicted_rul_hours"].tolist(), columns["recommendation"].tolist()
+            )
+        ]
+
+    def predict_columns(self, readings):
+        """
+        predict_batch() without building a dict per reading: a dict of arrays
+        with one entry per reading. fault_probabilities / severity_probabilities
+        are unrounded (N, n_classes) arrays, columns in fault_model.classes_ /
+        severity_model.classes_ order.
+        With a screen attached (cascade mode), readings it clears get its cached
+        healthy response and only the others go through the forests.
+        """
         if not self.is_trained:
             self.train()
 
-        # Build input
-        x = np.array([[sensor_data[c] for c in self.feature_cols]], dtype=float)
-        x_scaled = self.scaler.transform(x)
-
-        # Fault type + probabilities
-        fault_pred = self.fault_model.predict(x_scaled)[0]
-        fault_proba = self.fault_model.predict_proba(x_scaled)[0]
-        fault_classes = self.fault_model.classes_
-        fault_prob_map = {cls: float(prob) for cls, prob in zip(fault_classes, fault_proba)}
-
-        # Severity (learned)
-        sev_pred = self.severity_model.predict(x_scaled)[0]
-        sev_proba = self.severity_model.predict_proba(x_scaled)[0]
-        sev_classes = self.severity_model.classes_
-        sev_prob_map = {cls: float(prob) for cls, prob in zip(sev_classes, sev_proba)}
-
-        # RUL regression (learned)
-        rul_pred = float(self.rul_model.predict(x_scaled)[0])
-        rul_pred = max(0.0, rul_pred)
-
-        # Retrieval-based recommendation (data-driven)
-        dists, idxs = self.nn.kneighbors(x_scaled, n_neighbors=7)
-        neighbors = self.train_df.iloc[idxs[0]]
-        # choose the most common recommendation among neighbors
-        rec = neighbors["recommendation"].value_counts().idxmax()
+        X = self._as_matrix(readings)
+        if self.screen is not None and len(X):
+            return self.screen.predict_columns(self, X)
+        return self._predict_columns(X)
+
+    def _predict_columns(self, X):
+        """predict_columns() of an (N, n_features) matrix through the full model"""
+        if len(X) == 0:
+            forest_out = {
+                "fault": np.empty((0, len(self.fault_model.classes_))),
+                "severity": np.empty((0, len(self.severity_model.classes_))),
+                "rul": np.empty(0),
+            }
+            recs = np.empty(0, dtype=object)
+        else:
+            with metrics.stage("scale"):
+                X_scaled = self.scaler.transform(X)
+
+            # All three forests in one flat-array pass (bit-for-bit equal to sklearn)
+            with metrics.stage("forests"):
+                forest_out = self.engine.predict(X_scaled)
+
+            # Retrieval-based recommendation (data-driven)
+            with metrics.stage("recommend"):
+                recs = self.recommender.predict(X_scaled)
+
+        # Fault type + severity: labels derived from the probabilities
+        # exactly as RandomForestClassifier.predict does
+        fault_proba = forest_out["fault"]
+        sev_proba = forest_out["severity"]
 
         return {
-            "predicted_fault_type": fault_pred,
-            "fault_probabilities": {k: round(v, 3) for k, v in sorted(fault_prob_map.items(), key=lambda x: -x[1])},
-            "predicted_severity": sev_pred,
-            "severity_probabilities": {k: round(v, 3) for k, v in sorted(sev_prob_map.items(), key=lambda x: -x[1])},
-            "predicted_rul_hours": int(round(rul_pred)),
-            "recommendation": rec
+            "predicted_fault_type": self.fault_model.classes_.take(fault_proba.argmax(axis=1)),
+            "fault_probabilities": fault_proba,
+            "predicted_severity": self.severity_model.classes_.take(sev_proba.argmax(axis=1)),
+            "severity_probabilities": sev_proba,
+            # RUL regression (learned)
+            "predicted_rul_hours": np.rint(np.maximum(0.0, forest_out["rul"])).astype(int),
+            "recommendation": recs,
         }
 
+    @staticmethod
+    def _probability_maps(classes, proba):
+        """
+        Per-row {class: probability} dicts, most likely class first, rounded to 3 places.
+        Sorting and rounding are done for the whole batch in NumPy; the stable sort
+        keeps class order for ties, like sorted() did.
+        """
+        order = np.argsort(-proba, axis=1, kind="stable")
+        sorted_classes = classes[order].tolist()
+        sorted_probs = np.round(np.take_along_axis(proba, order, axis=1), 3).tolist()
+        return [dict(zip(c, p)) for c, p in zip(sorted_classes, sorted_probs)]
+
+    def _as_matrix(self, readings):
+        """Turn predict_batch input into an (N, n_features) float matrix."""
+        if isinstance(readings, dict):
+            X = np.column_stack([np.asarray(readings[c], dtype=float) for c in self.feature_cols])
+        elif isinstance(readings, np.ndarray):
+            X = readings.astype(float, copy=False)
+        else:
+            X = np.array([[r[c] for c in self.feature_cols] for r in readings], dtype=float)
+        return X.reshape(-1, len(self.feature_cols))
 
 if __name__ == "__main__":
     model = PredictiveMaintenanceAIOnly()
@@ -0,0 +1,107 @@
+import collections
+import datetime
+import threading
+import time
+
+
+def describe(model):
+    """Identity and training summary of a fitted PredictiveMaintenanceAIOnly."""
+    total = model.training_stats.get("total", {})
+    return {
+        "fingerprint": model.fingerprint[:12] if model.fingerprint else None,
+        "n_samples": model.n_samples,
+        "trees": len(model.engine.trees) if model.engine is not None else 0,
+        "profile": model.profile["name"] if model.profile else "full",
+        "updates": len(model.updates),
+        "training_seconds": total.get("seconds"),
+    }
+
+
+class ModelRegistry:
+    """
+    The model being served, and a history of the models it replaced.
+
+    New models are built in a background thread, on their own
+    PredictiveMaintenanceAIOnly instance, and only handed to install() once
+    fully trained or loaded. install() swaps a single reference, so requests
+    already running keep the model they started with and later requests get
+    the new one; no request ever sees a partly trained model.
+    """
+
+    def __init__(self, install, history_size=20):
+        """
+        install: callable(model) that makes model the served one (e.g. rebinds
+        a module global and restarts process workers)
+        """
+        self._install = install
+        self._lock = threading.Lock()
+        self._job = None
+        self.version = 0
+        self.current = None  # describe() of the served model, plus version and source
+        self.history = collections.deque(maxlen=history_size)
+        self.last_error = None
+
+    def register(self, model, source):
+        """Serve model from now on; source says where it came from (e.g. "startup", "retrain")."""
+        self._install(model)
+        with self._lock:
+            self.version += 1
+            previous = self.current
+            self.current = {
+                "version": self.version,
+                "source": source,
+                "installed_at": datetime.datetime.now().isoformat(),
+                **describe(model),
+            }
+            self.history.append({
+                "version": self.version,
+                "source": source,
+                "installed_at": self.current["installed_at"],
+                "fingerprint": self.current["fingerprint"],
+                "replaced_version": previous["version"] if previous else None,
+            })
+        return self.current
+
+    def reload_in_background(self, build, source):
+        """
+        Run build() (returning a ready model) in a background thread and
+        register its result. Returns False if a reload is already running.
+        """
+        with self._lock:
+            if self._job is not None:
+                return False
+            self._job = {"source": source, "started_at": datetime.datetime.now().isoformat()}
+            self.last_error = None
+
+        def run():
+            started = time.perf_counter()
+            try:
+                model = build()
+                if not model.is_trained:
+                    raise RuntimeError("reload produced an untrained model")
+                self.register(model, source)
+            except Exception as e:
+                self.last_error = {
+                    "source": source,
+                    "error": str(e),
+                    "seconds": time.perf_counter() - started,
+                }
+            finally:
+                with self._lock:
+                    self._job = None
+
+        threading.Thread(target=run, name="model-reload", daemon=True).start()
+        return True
+
+    @property
+    def reloading(self):
+        return self._job is not None
+
+    def status(self):
+        with self._lock:
+            return {
+                "current": self.current,
+                "reload_in_progress": self._job,
+                "last_reload_error": self.last_error,
+                "swaps": list(self.history),
+            }
@@ -1,7 +1,9 @@
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import IsolationForest
+from sklearn.ensemble._iforest import _average_path_length
 from sklearn.preprocessing import StandardScaler
+from forest_engine import FlatForestEngine
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -9,6 +11,8 @@ class PredictiveMaintenanceModel:
     def __init__(self):
         self.model = None
         self.scaler = StandardScaler()
+        self.engine = None  # flat-array copy of the isolation trees used by predict_batch
+        self.path_lengths = None  # per engine node: path length credited to a reading ending there
         self.is_trained = False
         self.normal_ranges = {
             'temperature': (20, 80),  # °C
@@ -74,6 +78,7 @@ class PredictiveMaintenanceModel:
         )
 
         self.model.fit(scaled_data)
+        self.build_engine()
         self.is_trained = True
         print("Model training completed.")
 
@@ -134,7 +139,7 @@ class PredictiveMaintenanceModel:
             root_cause = self._determine_root_cause(sensor_data)
 
             # Generate recommendation
-            recommendation = self._generate_recommendation(sensor_data, health_status)
+            recommendation = self._recommendation_for(root_cause, health_status)
 
             # Calculate Remaining Useful Life (simplified)
             rul = self._calculate_rul(sensor_data, anomaly_probability)
@@ -165,7 +170,7 @@ class PredictiveMaintenanceModel:
                 health_status = "Critical"
 
             root_cause = self._determine_root_cause(sensor_data)
-            recommendation = self._generate_recommendation(sensor_data, health_status)
+            recommendation = self._recommendation_for(root_cause, health_status)
             rul = self._calculate_rul(sensor_data, rule_based_risk)
 
             return {
@@ -179,6 +184,138 @@ class PredictiveMaintenanceModel:
                 "timestamp": pd.Timestamp.now().isoformat()
             }
 
+    def build_engine(self):
+        """
+        Pack the isolation trees into a FlatForestEngine for decision_scores().
+        Forests trained on feature subsets keep using decision_function().
+        """
+        self.engine = None
+        self.path_lengths = None
+        if self.model._max_features != self.model.n_features_in_:
+            return
+        # Same per-leaf terms IsolationForest._compute_score_samples adds up
+        self.path_lengths = np.concatenate([
+            decision_path + average_path - 1.0
+            for decision_path, average_path in zip(self.model._decision_path_lengths,
+                                                   self.model._average_path_length_per_tree)
+        ])
+        self.engine = FlatForestEngine({"isolation": self.model})
+
+    def decision_scores(self, X):
+        """
+        IsolationForest decision_function of raw readings X, an (N, 4) array
+        with columns in normal_ranges order; bit-for-bit equal to scaling a
+        DataFrame and calling self.model.decision_function.
+        """
+        if not self.is_trained:
+            self.train_model()
+
+        X = np.asarray(X, dtype=float).reshape(-1, len(self.normal_ranges))
+        X_scaled = (X - self.scaler.mean_) / self.scaler.scale_
+        if self.engine is None or len(X) == 0:
+            return self.model.decision_function(X_scaled)
+
+        # Trees are added in estimator order like sklearn does, then scaled by
+        # the expected path length of the training subsample
+        n_trees = len(self.model.estimators_)
+        denominator = n_trees * _average_path_length([self.model._max_samples])
+        scores = np.empty(len(X))
+        for start in range(0, len(X), FlatForestEngine.CHUNK_SIZE):
+            chunk = slice(start, start + FlatForestEngine.CHUNK_SIZE)
+            depths = np.add.accumulate(self.path_lengths[self.engine.apply(X_scaled[chunk])], axis=0)[-1]
+            scores[chunk] = -(2 ** -(depths / denominator))
+        return scores - self.model.offset_
+
+    def predict_batch(self, X):
+        """
+        predict() for many readings at once, without pandas.
+
+        Args:
+            X: (N, 4) array of readings, columns in normal_ranges order
+               (temperature, vibration, pressure, rpm)
+
+        Returns:
+            dict of arrays, one entry per reading, with the same keys and values
+            as predict(); "timestamp" is a single value for the whole batch
+        """
+        if not self.is_trained:
+            self.train_model()
+
+        X = np.asarray(X, dtype=float).reshape(-1, len(self.normal_ranges))
+        rule_based_risk, issues = self._rule_masks(X)
+
+        try:
+            decision = self.decision_scores(X)
+            # decision_function returns negative values for anomalies, positive for normal
+            anomaly_probability = np.clip(1 / (1 + np.exp(-decision)), 0.0, 1.0)
+            failure_risk = np.clip((np.maximum(anomaly_probability, rule_based_risk) * 100).astype(int), 0, 100)
+            anomaly_detected = decision < 0
+        except Exception as e:
+            # Fallback prediction based on rule-based analysis only
+            print(f"ML prediction failed, using rule-based fallback: {str(e)}")
+            anomaly_probability = rule_based_risk
+            failure_risk = (rule_based_risk * 100).astype(int)
+            anomaly_detected = failure_risk >= 30
+
+        status = np.select([failure_risk < 30, failure_risk < 70], [0, 1], 2)
+        # First detected issue, in the order _determine_root_cause checks them
+        cause = np.select(issues, np.arange(len(issues)), len(issues))
+        causes, recommendations = self._recommendation_table()
+
+        return {
+            "health_status": np.array(["Healthy", "Warning", "Critical"], dtype=object)[status],
+            "failure_risk": failure_risk,
+            "anomaly_detected": anomaly_detected,
+            "anomaly_probability": np.round(anomaly_probability, 3),
+            "root_cause": causes[cause],
+            "recommendation": recommendations[cause, status],
+            "remaining_useful_life": np.maximum(10, 1000 - anomaly_probability * 800).astype(int),
+            "timestamp": pd.Timestamp.now().isoformat()
+        }
+
+    def _rule_masks(self, X):
+        """
+        _calculate_rule_based_risk() of every row of X, and the issue masks
+        behind _determine_root_cause(), in its order.
+        """
+        columns = list(self.normal_ranges)
+        low = {c: X[:, i] < self.normal_ranges[c][0] for i, c in enumerate(columns)}
+        high = {c: X[:, i] > self.normal_ranges[c][1] for i, c in enumerate(columns)}
+
+        # Terms are added in the scalar order so the float sums match exactly
+        risk = np.zeros(len(X))
+        risk += np.where(high['temperature'], 0.4, np.where(low['temperature'], 0.2, 0.0))
+        risk += np.where(high['vibration'], 0.5, 0.0)
+        risk += np.where(high['pressure'], 0.3, np.where(low['pressure'], 0.4, 0.0))
+        risk += np.where(high['rpm'], 0.3, np.where(low['rpm'], 0.2, 0.0))
+        issue_count = (
+            (high['temperature'] | low['temperature']).astype(int)
+            + high['vibration']
+            + (high['pressure'] | low['pressure'])
+            + (high['rpm'] | low['rpm'])
+        )
+        risk += np.where(issue_count > 1, 0.2, 0.0)
+
+        issues = [
+            high['temperature'], low['temperature'], high['vibration'],
+            high['pressure'], low['pressure'], high['rpm'], low['rpm'],
+        ]
+        return np.clip(risk, 0.0, 1.0), issues
+
+    def _recommendation_table(self):
+        """
+        Root causes in _determine_root_cause() order ("Normal operation" last)
+        and _generate_recommendation() for each of them by health status
+        (Healthy, Warning, Critical).
+        """
+        causes = ["High temperature", "Low temperature", "High vibration", "High pressure",
+                  "Low pressure", "High RPM", "Low RPM", "Normal operation"]
+        table = np.empty((len(causes), 3), dtype=object)
+        for i, cause in enumerate(causes):
+            for j, status in enumerate(["Healthy", "Warning", "Critical"]):
+                table[i, j] = self._recommendation_for(cause, status)
+        return np.array(causes, dtype=object), table
+
     def _determine_root_cause(self, sensor_data):
         """Determine the most likely root cause of issues"""
         issues = []
@@ -216,7 +353,12 @@ class PredictiveMaintenanceModel:
         if health_status == "Healthy":
             return "Continue normal operation. Schedule routine maintenance."
 
-        root_cause = self._determine_root_cause(sensor_data)
+        return self._recommendation_for(self._determine_root_cause(sensor_data), health_status)
+
+    def _recommendation_for(self, root_cause, health_status):
+        """Recommendation text for a root cause at a health status"""
+        if health_status == "Healthy":
+            return "Continue normal operation. Schedule routine maintenance."
 
         recommendations = {
             "High temperature": "Check cooling system and ventilation. Clean heat sinks if necessary.",
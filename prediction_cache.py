@@ -0,0 +1,119 @@
+import collections
+import threading
+import time
+
+# Reading fields a cache key is built from
+FEATURES = ("temperature", "vibration", "pressure", "rpm")
+
+# A fine quantization step per feature (opt-in: lossy, see PredictionCache)
+FINE_PRECISION = {"temperature": 0.1, "vibration": 0.01, "pressure": 0.1, "rpm": 1.0}
+
+
+def parse_precision(spec):
+    """'temperature=0.1,rpm=5' -> {"temperature": 0.1, "rpm": 5.0}; features left out are matched exactly."""
+    precision = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, step = item.partition("=")
+        if name.strip() not in FEATURES:
+            raise ValueError(f"Unknown feature in cache precision: {name!r}")
+        precision[name.strip()] = float(step)
+    return precision
+
+
+class PredictionCache:
+    """
+    LRU + TTL cache of model outputs keyed on quantized sensor readings.
+
+    By default a reading's key is its exact feature values, so a hit returns
+    exactly what the model would. A feature given a precision step is instead
+    divided by it and rounded, so readings within half a step of each other
+    share an entry. That is lossy: such a reading gets the output computed for
+    whichever reading filled the entry (with FINE_PRECISION, severity, fault
+    and recommendation differ from the uncached output for about 2% of those
+    readings and the remaining useful life for most of them). At most
+    max_entries are kept (least recently used evicted first) and an entry is
+    only served for ttl_seconds after it was stored.
+
+    Entries are tied to the model that computed them: invalidate(model), called
+    when a new model is swapped in, empties the cache and from then on only
+    that model's outputs are stored and served. A request still holding the
+    previous model (or a batch it was scored in) neither stores its output
+    nor reads the new model's. A cache not tied to a model stores any output.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=300.0, precision=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.precision = dict(precision or {})
+        self._steps = [(f, self.precision.get(f)) for f in FEATURES]
+        self._entries = collections.OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.model = None  # the model whose outputs are cached (None: any)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def key(self, reading):
+        return tuple(reading[f] if step is None else round(reading[f] / step) for f, step in self._steps)
+
+    def get(self, key, model):
+        """Value cached for key, or None; always None for a model other than the one the cache is tied to."""
+        with self._lock:
+            entry = self._entries.get(key) if self._serves(model) else None
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, model):
+        """Store value, computed by model, unless the cache is tied to another model."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if not self._serves(model):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _serves(self, model):
+        return self.model is None or model is self.model
+
+    def invalidate(self, model=None):
+        """Drop every entry; with model, tie the cache to it (the newly served model)."""
+        with self._lock:
+            self._entries.clear()
+            if model is not None:
+                self.model = model
+            self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "precision": self.precision,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,93 @@
+import numpy as np
+from sklearn.base import BaseEstimator
+from sklearn.neighbors import NearestNeighbors
+
+
+class RecommendationIndex(BaseEstimator):
+    """
+    Retrieval-based recommendations: majority vote over the k nearest training
+    samples in scaled feature space.
+
+    Recommendations are kept as a compact integer code per training sample next
+    to the fitted neighbor index, and the vote is a NumPy bincount, so no
+    training DataFrame is needed at prediction time.
+
+    method:
+    - "auto", "kd_tree", "ball_tree", "brute": exact kNN with that NearestNeighbors algorithm
+    - "grid": the vote is precomputed at the center of every cell of a
+      grid_bins^d grid spanning the bulk of the training data, and a query is
+      a table lookup of its cell (approximate, constant time)
+    """
+
+    def __init__(self, n_neighbors=7, method="auto", grid_bins=16):
+        self.n_neighbors = n_neighbors
+        self.method = method
+        self.grid_bins = grid_bins
+
+    def fit(self, X_scaled, recommendations):
+        self.labels_, codes = np.unique(np.asarray(recommendations, dtype=object), return_inverse=True)
+        self.codes_ = codes.astype(np.uint8 if len(self.labels_) <= 255 else np.int32)
+
+        algorithm = "auto" if self.method == "grid" else self.method
+        self.nn_ = NearestNeighbors(n_neighbors=self.n_neighbors, algorithm=algorithm)
+        self.nn_.fit(X_scaled)
+
+        self.grid_ = None
+        if self.method == "grid":
+            self._build_grid(X_scaled)
+        return self
+
+    def extend(self, X_scaled, recommendations):
+        """Refit on the samples already indexed plus new ones."""
+        X_all = np.vstack([self.nn_._fit_X, X_scaled])
+        recommendations_all = np.concatenate([self.labels_[self.codes_], np.asarray(recommendations, dtype=object)])
+        return self.fit(X_all, recommendations_all)
+
+    def predict_codes(self, X_scaled):
+        """Integer recommendation code for every row of X_scaled."""
+        if self.grid_ is not None:
+            return self.grid_[self._cell_index(X_scaled)]
+        _, idxs = self.nn_.kneighbors(X_scaled, n_neighbors=self.n_neighbors)
+        return self._vote(idxs)
+
+    def predict(self, X_scaled):
+        """Recommendation text for every row of X_scaled."""
+        return self.labels_[self.predict_codes(X_scaled)]
+
+    def _vote(self, idxs):
+        """
+        Most common code among each row's neighbors.
+        Ties go to the label of the closest neighbor. This differs from the
+        DataFrame vote this replaced (value_counts().idxmax()): pandas orders
+        tied counts with NumPy's unstable quicksort, so its tie winner depends
+        on the label mix (and the CPU) and is not always the closest neighbor's.
+        """
+        neighbor_codes = self.codes_[idxs]
+        n_rows, n_labels = len(idxs), len(self.labels_)
+
+        # one bincount for the whole batch: row i counts into bins [i*n_labels, (i+1)*n_labels)
+        offsets = np.arange(n_rows)[:, np.newaxis] * n_labels
+        counts = np.bincount((neighbor_codes + offsets).ravel(), minlength=n_rows * n_labels)
+        counts = counts.reshape(n_rows, n_labels)
+
+        # first neighbor (closest) whose label reaches the top count
+        neighbor_counts = np.take_along_axis(counts, neighbor_codes.astype(np.intp), axis=1)
+        winner = (neighbor_counts == counts.max(axis=1)[:, np.newaxis]).argmax(axis=1)
+        return neighbor_codes[np.arange(n_rows), winner]
+
+    def _build_grid(self, X_scaled):
+        # span the central 99% of the data; outlying queries clip to the edge cells
+        self.grid_lo_, hi = np.percentile(X_scaled, [0.5, 99.5], axis=0)
+        self.grid_width_ = (hi - self.grid_lo_) / self.grid_bins
+
+        n_dims = X_scaled.shape[1]
+        axes = [self.grid_lo_[d] + (np.arange(self.grid_bins) + 0.5) * self.grid_width_[d] for d in range(n_dims)]
+        centers = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, n_dims)
+
+        _, idxs = self.nn_.kneighbors(centers, n_neighbors=self.n_neighbors)
+        self.grid_ = self._vote(idxs)
+
+    def _cell_index(self, X_scaled):
+        cells = np.floor((X_scaled - self.grid_lo_) / self.grid_width_).astype(np.intp)
+        np.clip(cells, 0, self.grid_bins - 1, out=cells)
+        return np.ravel_multi_index(cells.T, (self.grid_bins,) * cells.shape[1])
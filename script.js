@@ -287,8 +287,8 @@ function initializeDashboard() {
             refreshData();
         }, 100);
 
-        // Set up auto-refresh every 30 seconds
-        setInterval(refreshData, 30000);
+        // Live updates pushed by the API (falls back to refreshing every 30 seconds)
+        connectLiveFeed();
 
         console.log('Dashboard initialized successfully');
     } catch (error) {
@@ -760,12 +760,16 @@ async function sendSensorData() {
     showLoading();
 
     try {
+        // Tag the reading with the selected machine so the API keeps its rolling statistics
+        const machine = getCurrentMachine();
+        const payload = machine ? { ...sensorData, machine_id: String(machine.id) } : sensorData;
+
         const response = await fetch('http://localhost:8000/predict', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify(sensorData)
+            body: JSON.stringify(payload)
         });
 
         if (!response.ok) {
@@ -1005,7 +1009,7 @@ function addSensorAlert(sensorType, value, severity, title, message) {
         alert.title.includes(sensorType) &&
         alert.severity === severity &&
         new Date(alert.timestamp) > fiveMinutesAgo
-    );
+    ) || (sensorType === 'AI System Health' && alerts.find(alert => alert.live));
 
     if (recentAlert) {
         return; // Don't add duplicate alerts
@@ -1108,6 +1112,98 @@ async function refreshData() {
     addSystemCheckAlert();
 }
 
+// Live feed: the API pushes new predictions and alerts for the selected machine
+// over Server-Sent Events. Polling only runs while the feed is unavailable.
+let liveFeed = null;
+let pollTimer = null;
+
+function startPolling() {
+    if (!pollTimer) {
+        pollTimer = setInterval(refreshData, 30000);
+    }
+}
+
+function stopPolling() {
+    if (pollTimer) {
+        clearInterval(pollTimer);
+        pollTimer = null;
+    }
+}
+
+function connectLiveFeed() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    if (liveFeed) {
+        liveFeed.close();
+    }
+
+    const machine = getCurrentMachine();
+    const query = machine ? `?machine_id=${encodeURIComponent(String(machine.id))}` : '';
+    liveFeed = new EventSource(`http://localhost:8000/stream${query}`);
+
+    liveFeed.onopen = stopPolling;
+    // EventSource keeps reconnecting by itself; poll until it succeeds
+    liveFeed.onerror = startPolling;
+
+    liveFeed.addEventListener('prediction', (event) => {
+        const { sensor_data, prediction } = JSON.parse(event.data);
+        // this dashboard's own readings are already shown by sendSensorData
+        if (currentPrediction && currentPrediction.timestamp === prediction.timestamp) {
+            return;
+        }
+        currentPrediction = prediction;
+        updateOverview(prediction);
+        updatePredictions(prediction, generateIndividualSensorPredictions(sensor_data));
+    });
+
+    // event is "opened", "escalated", "updated" or "resolved"; later events
+    // carry the id of the alert they change
+    liveFeed.addEventListener('alert', (event) => {
+        const { event: change, ...alert } = JSON.parse(event.data);
+        const index = alerts.findIndex(a => a.id === alert.id);
+
+        if (change === 'resolved') {
+            // only open alerts are listed here
+            if (index === -1) {
+                return;
+            }
+            alerts.splice(index, 1);
+        } else if (index !== -1) {
+            alerts[index] = liveAlert(alert);
+        } else {
+            // a reading sent from this dashboard already raised a local system
+            // health alert: the API's alert takes its place, so the events that
+            // follow find it by id
+            if (currentPrediction && currentPrediction.timestamp === alert.last_seen) {
+                alerts = alerts.filter(a => a.live || !a.title.startsWith('AI System Health'));
+            }
+            alerts.unshift(liveAlert(alert));
+
+            // Keep only last 10 alerts
+            if (alerts.length > 10) {
+                alerts = alerts.slice(0, 10);
+            }
+        }
+
+        updateAlertsBadge();
+        loadAlerts();
+    });
+}
+
+function liveAlert(alert) {
+    return {
+        id: alert.id,
+        live: true,  // the API's alert, updated and resolved over the live feed
+        severity: alert.severity.toLowerCase(),
+        title: alert.message.split(' - ')[0],
+        message: alert.message,
+        timestamp: new Date(alert.timestamp).toLocaleString(),
+        sensorData: alert.sensor_data
+    };
+}
+
 function addSystemCheckAlert() {
     const healthStatus = currentPrediction ? currentPrediction.health_status : 'Unknown';
     const failureRisk = currentPrediction ? currentPrediction.failure_risk : 0;
@@ -1973,6 +2069,9 @@ function selectMachine(machineId) {
     // Set current machine
     localStorage.setItem('predixai_current_machine', machineId.toString());
 
+    // Follow the selected machine's live feed
+    connectLiveFeed();
+
     // Update UI
     const machines = JSON.parse(localStorage.getItem('predixai_machines') || '[]');
     const selectedMachine = machines.find(m => m.id == machineId);
@@ -0,0 +1,79 @@
+"""
+Fast response encoding for the hot endpoints (/predict, /predict/batch, /history).
+
+Their handlers already build plain, well-formed dicts, so instead of going
+through response_model validation and FastAPI's generic jsonable_encoder they
+encode the content once, straight into a Response: with orjson, or as
+MessagePack for clients that ask for it with Accept: application/msgpack.
+Both are in requirements.txt; without orjson responses fall back to stdlib
+json, and without msgpack MessagePack requests get 406.
+"""
+import json
+
+import numpy as np
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_TYPE = "application/json"
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+def _default(value):
+    """NumPy scalars and arrays as plain Python values"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def encode_json(content):
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def encode_msgpack(content):
+    if msgpack is None:
+        raise ImportError("MessagePack responses require msgpack (pip install msgpack)")
+    return msgpack.packb(content, default=_default, use_bin_type=True)
+
+
+def json_response(content, status_code=200):
+    return Response(encode_json(content), status_code=status_code, media_type=JSON_TYPE)
+
+
+def msgpack_response(content, status_code=200):
+    return Response(encode_msgpack(content), status_code=status_code, media_type=MSGPACK_TYPES[0])
+
+
+def negotiate(request):
+    """
+    The response builder (content -> Response) for the request's Accept
+    header: MessagePack if it accepts a MessagePack type, JSON otherwise.
+    Raises 406 if MessagePack is the only acceptable type and msgpack is
+    not installed. Call it before doing the work, so an unacceptable request
+    fails fast.
+    """
+    accepted = [part.split(";")[0].strip().lower() for part in request.headers.get("accept", "").split(",")]
+    if not any(media_type in MSGPACK_TYPES for media_type in accepted):
+        return json_response
+    if msgpack is not None:
+        return msgpack_response
+    if any(media_type in (JSON_TYPE, "application/*", "*/*") for media_type in accepted):
+        return json_response
+    raise HTTPException(
+        status_code=406,
+        detail="MessagePack responses are not available (msgpack is not installed); accept application/json"
+    )
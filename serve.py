@@ -0,0 +1,111 @@
+"""
+Pre-fork server: load (or train) the model once, then fork worker processes
+that serve the API from one shared listening socket.
+
+    python serve.py [--host 0.0.0.0] [--port 8000] [--workers 4]
+
+Running `uvicorn main:app --workers N` instead makes every worker import main
+and load the model on its own. Here the parent process loads it before
+forking, so the flat forest arrays, the scaler and the recommendation index
+are shared copy-on-write by all workers; nothing writes to them after
+loading. The artifact is also memory-mapped, so its pages live in the page
+cache rather than in any one process.
+
+Workers do not share prediction history: use STORAGE_BACKEND=sqlite for a
+history and alert log common to all of them. Alert ids are then unique across
+workers, but each worker keeps its own open-alert state (restored from the
+store when it starts), so readings of one machine spread over several workers
+can open an alert in each; once one worker resolves an alert, the others'
+updates to it are ignored.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import traceback
+
+import uvicorn
+
+import main
+
+
+def bind_socket(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock, log_level):
+    # the parent's handlers forward signals to workers; uvicorn installs its own
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(main.app, log_level=log_level))
+    server.run(sockets=[sock])
+
+
+def serve(host="0.0.0.0", port=8000, workers=4, log_level="info"):
+    """
+    Serve main.app from `workers` forked processes.
+    Uses main.model as it is if already trained, otherwise loads or trains it
+    first: unlike a single uvicorn process, the model is loaded before the
+    workers start, so that they share its memory.
+    """
+    if main.model is None or not main.model.is_trained:
+        main.model = main.load_model()
+
+    # Move everything allocated so far out of the collector's reach, so
+    # collections in the workers do not touch (and copy) the shared pages
+    gc.collect()
+    gc.freeze()
+
+    sock = bind_socket(host, port)
+    print(f"Serving on {host}:{port} with {workers} workers (parent pid {os.getpid()})")
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(sock, log_level)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        children.append(pid)
+
+    def forward(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, forward)
+    signal.signal(signal.SIGTERM, forward)
+
+    for pid in children:
+        while True:
+            try:
+                os.waitpid(pid, 0)
+                break
+            except InterruptedError:
+                continue
+            except ChildProcessError:
+                break
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the API from pre-forked workers sharing one model")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 4)))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.log_level)
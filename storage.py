@@ -0,0 +1,848 @@
+import collections
+import datetime
+import itertools
+import json
+import os
+import queue
+import sqlite3
+import threading
+
+import numpy as np
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+SENSOR_FIELDS = ("temperature", "vibration", "pressure", "rpm")
+
+
+def to_microseconds(timestamp):
+    """ISO string or naive datetime -> integer microseconds since the epoch."""
+    return int(np.datetime64(timestamp, "us").astype(np.int64))
+
+
+def from_microseconds(us):
+    """Integer microseconds since the epoch -> ISO string, as datetime.isoformat() writes it."""
+    return (EPOCH + datetime.timedelta(microseconds=us)).isoformat()
+
+
+def history_entry(timestamp, machine_id, sensor_data, prediction):
+    """One GET /history entry."""
+    return {
+        "timestamp": timestamp,
+        "machine_id": machine_id,
+        "sensor_data": sensor_data,
+        "prediction": prediction
+    }
+
+
+def downsample_mask(ts_us, start_us, end_us, max_points):
+    """
+    Keep the latest entry of each of max_points equal time buckets over [start, end].
+    ts_us must be sorted.
+    """
+    span = max(end_us - start_us, 1)
+    buckets = np.minimum((ts_us - start_us) * max_points // span, max_points - 1)
+    return np.r_[buckets[1:] != buckets[:-1], True]
+
+
+class StringTable:
+    """Interns a small vocabulary of repeated strings as integer codes (at most max_codes of them)."""
+
+    def __init__(self, max_codes=None):
+        self.values = []
+        self._codes = {}
+        self.max_codes = max_codes
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            if self.max_codes is not None and len(self.values) >= self.max_codes:
+                raise ValueError(f"More than {self.max_codes} distinct values to intern")
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value):
+        """Code of value, or -1 if it was never interned."""
+        return self._codes.get(value, -1)
+
+
+class CountedStringTable:
+    """
+    Interns an open-ended set of strings (e.g. machine ids) as integer codes,
+    counting the references to each: a value whose last reference is released
+    is dropped and its code reused, so the table only holds values still in use.
+    """
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+        self._refs = []
+        self._free = []
+
+    def acquire(self, value):
+        """Code of value, counting one more reference to it."""
+        code = self._codes.get(value)
+        if code is None:
+            if self._free:
+                code = self._free.pop()
+                self.values[code] = value
+            else:
+                code = len(self.values)
+                self.values.append(value)
+                self._refs.append(0)
+            self._codes[value] = code
+        self._refs[code] += 1
+        return code
+
+    def release(self, code):
+        self._refs[code] -= 1
+        if self._refs[code] == 0:
+            del self._codes[self.values[code]]
+            self.values[code] = None
+            self._free.append(code)
+
+    def lookup(self, value):
+        """Code of value, or -1 if it is not in use."""
+        return self._codes.get(value, -1)
+
+    def clear(self):
+        self.values.clear()
+        self._codes.clear()
+        self._refs.clear()
+        self._free.clear()
+
+
+class HistoryBuffer:
+    """
+    Fixed-capacity ring buffer of prediction history.
+
+    Entries live in one structured NumPy array (about 60 bytes each) instead of
+    nested dicts; repeated strings are stored as codes. Health status, root
+    cause and recommendation come from the model's small vocabulary; machine
+    ids are open-ended, so they have their own table, and an id is dropped
+    from it once the last entry of that machine is overwritten. Appending is
+    O(1) and latest(k) is O(k). Entries are turned back into the API's nested
+    dict format only when read.
+    """
+
+    DTYPE = np.dtype([
+        ("timestamp", "datetime64[us]"),
+        ("machine_id", "i4"),
+        ("temperature", "f8"),
+        ("vibration", "f8"),
+        ("pressure", "f8"),
+        ("rpm", "f8"),
+        ("health_status", "u2"),
+        ("failure_risk", "u1"),
+        ("anomaly_detected", "?"),
+        ("anomaly_probability", "f8"),
+        ("root_cause", "u2"),
+        ("recommendation", "u2"),
+        ("remaining_useful_life", "i4"),
+    ])
+
+    def __init__(self, capacity=1000):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=self.DTYPE)
+        self._strings = StringTable(max_codes=np.iinfo(self.DTYPE["health_status"]).max + 1)
+        self._machines = CountedStringTable()
+        self._next = 0  # total number of entries ever appended
+
+    def __len__(self):
+        return min(self._next, self.capacity)
+
+    def append(self, sensor_data, prediction, machine_id=None):
+        status = self._strings.code(prediction["health_status"])
+        cause = self._strings.code(prediction["root_cause"])
+        recommendation = self._strings.code(prediction["recommendation"])
+
+        row = self._data[self._next % self.capacity]
+        machine = self._machines.acquire(machine_id)
+        if self._next >= self.capacity:
+            self._machines.release(int(row["machine_id"]))  # the entry being overwritten
+        row["timestamp"] = np.datetime64(prediction["timestamp"], "us")
+        row["machine_id"] = machine
+        for field in SENSOR_FIELDS:
+            row[field] = sensor_data[field]
+        row["health_status"] = status
+        row["failure_risk"] = prediction["failure_risk"]
+        row["anomaly_detected"] = prediction["anomaly_detected"]
+        row["anomaly_probability"] = prediction["anomaly_probability"]
+        row["root_cause"] = cause
+        row["recommendation"] = recommendation
+        row["remaining_useful_life"] = prediction["remaining_useful_life"]
+        self._next += 1
+
+    def latest(self, limit=None):
+        """The newest `limit` entries (all if limit is falsy), oldest first."""
+        count = len(self)
+        if limit and limit > 0:
+            count = min(count, limit)
+        positions = np.arange(self._next - count, self._next) % self.capacity
+        return self._to_dicts(self._data[positions])
+
+    def query(self, limit=None, start=None, end=None, machine_id=None, max_points=None):
+        """
+        Entries between start and end (naive datetimes, inclusive) for one machine,
+        thinned to at most max_points time buckets, then the newest `limit` of those.
+        """
+        if start is None and end is None and machine_id is None and not max_points:
+            return self.latest(limit)
+
+        rows = self._data[np.arange(self._next - len(self), self._next) % self.capacity]
+        ts = rows["timestamp"].astype(np.int64)
+        # the ring is in arrival order, but a prediction is stamped before it is
+        # scored and appended after, so concurrent requests land out of order:
+        # sort by time first (stable, so equal stamps keep arrival order)
+        if np.any(ts[1:] < ts[:-1]):
+            order = np.argsort(ts, kind="stable")
+            rows, ts = rows[order], ts[order]
+        lo = 0 if start is None else np.searchsorted(ts, to_microseconds(start), side="left")
+        hi = len(rows) if end is None else np.searchsorted(ts, to_microseconds(end), side="right")
+        rows, ts = rows[lo:hi], ts[lo:hi]
+
+        if machine_id is not None:
+            keep = rows["machine_id"] == self._machines.lookup(machine_id)
+            rows, ts = rows[keep], ts[keep]
+
+        if max_points and len(rows) > max_points:
+            start_us = ts[0] if start is None else to_microseconds(start)
+            end_us = ts[-1] if end is None else to_microseconds(end)
+            rows = rows[downsample_mask(ts, start_us, end_us, max_points)]
+
+        if limit and limit > 0:
+            rows = rows[-limit:]
+        return self._to_dicts(rows)
+
+    def clear(self):
+        self._next = 0
+        self._machines.clear()
+
+    def _to_dicts(self, rows):
+        strings = self._strings.values
+        machines = self._machines.values
+        timestamps = [ts.isoformat() for ts in rows["timestamp"].astype(datetime.datetime)]
+        columns = zip(
+            timestamps, rows["machine_id"].tolist(),
+            rows["temperature"].tolist(), rows["vibration"].tolist(),
+            rows["pressure"].tolist(), rows["rpm"].tolist(),
+            rows["health_status"].tolist(), rows["failure_risk"].tolist(),
+            rows["anomaly_detected"].tolist(), rows["anomaly_probability"].tolist(),
+            rows["root_cause"].tolist(), rows["recommendation"].tolist(),
+            rows["remaining_useful_life"].tolist(),
+        )
+        return [
+            history_entry(
+                ts,
+                machines[machine],
+                {"temperature": temp, "vibration": vib, "pressure": press, "rpm": rpm},
+                {
+                    "health_status": strings[status],
+                    "failure_risk": risk,
+                    "anomaly_detected": anomaly,
+                    "anomaly_probability": anomaly_prob,
+                    "root_cause": strings[cause],
+                    "recommendation": strings[rec],
+                    "remaining_useful_life": rul,
+                    "timestamp": ts
+                }
+            )
+            for ts, machine, temp, vib, press, rpm, status, risk, anomaly, anomaly_prob, cause, rec, rul in columns
+        ]
+
+
+class AlertBuffer:
+    """
+    Alerts indexed by id and by severity: every open alert of a machine, plus
+    a ring of the newest `capacity` other ones.
+
+    A machine's open alert is never evicted (there is at most one per
+    machine), so it stays listed and keeps receiving updates until it is
+    resolved, however many machines are degraded at once. A resolved alert
+    joins the ring, evicting the oldest one there when full, and so do alerts
+    of readings without a machine id, which nothing updates or resolves.
+    Appending, looking up,
+    updating and deleting an alert are O(1), and by_severity() reads one
+    severity's alerts directly instead of scanning every alert. Listings are
+    in id order, i.e. the order the alerts were opened.
+    """
+
+    def __init__(self, capacity=50):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._tracked = {}
+        self._ring = collections.OrderedDict()  # oldest first
+        self._by_severity = collections.defaultdict(dict)
+
+    def __len__(self):
+        return len(self._tracked) + len(self._ring)
+
+    @staticmethod
+    def is_tracked(alert):
+        """An open alert of a machine, i.e. one the alert engine still updates"""
+        return alert.get("status", "open") == "open" and alert.get("machine_id") is not None
+
+    def append(self, alert):
+        self.delete(alert["id"])
+        self._add(alert)
+
+    def _add(self, alert):
+        if self.is_tracked(alert):
+            self._tracked[alert["id"]] = alert
+        else:
+            self._ring[alert["id"]] = alert
+            if len(self._ring) > self.capacity:
+                _, oldest = self._ring.popitem(last=False)
+                del self._by_severity[oldest["severity"].lower()][oldest["id"]]
+        self._by_severity[alert["severity"].lower()][alert["id"]] = alert
+
+    def get(self, alert_id):
+        alert = self._tracked.get(alert_id)
+        return alert if alert is not None else self._ring.get(alert_id)
+
+    def update(self, alert):
+        """Store the new state of an alert still in the buffer (evicted resolved alerts stay out)."""
+        alert_id = alert["id"]
+        if alert_id not in self._tracked and alert_id not in self._ring:
+            return
+        # the stored dict may be the one that changed, so its old severity is unknown
+        severity = alert["severity"].lower()
+        if alert_id not in self._by_severity[severity]:
+            for alerts in self._by_severity.values():
+                alerts.pop(alert_id, None)
+        self._by_severity[severity][alert_id] = alert
+
+        if alert_id in self._ring:
+            self._ring[alert_id] = alert  # keeps its place in the ring
+        elif not self.is_tracked(alert):
+            del self._tracked[alert_id]
+            self._add(alert)
+        else:
+            self._tracked[alert_id] = alert
+
+    def all(self):
+        return self._in_id_order([*self._tracked.values(), *self._ring.values()])
+
+    def by_severity(self, severity):
+        return self._in_id_order(self._by_severity.get(severity.lower(), {}).values())
+
+    def tracked(self):
+        return self._in_id_order(self._tracked.values())
+
+    @staticmethod
+    def _in_id_order(alerts):
+        return sorted(alerts, key=lambda alert: alert["id"])
+
+    def delete(self, alert_id):
+        """Remove the alert with this id; returns how many were removed."""
+        alert = self._tracked.pop(alert_id, None)
+        if alert is None:
+            alert = self._ring.pop(alert_id, None)
+        if alert is None:
+            return 0
+        for alerts in self._by_severity.values():
+            alerts.pop(alert_id, None)
+        return 1
+
+    def clear(self):
+        self._tracked.clear()
+        self._ring.clear()
+        self._by_severity.clear()
+
+
+# ----------------------------
+# Storage backends
+# ----------------------------
+class MemoryStore:
+    """
+    In-process storage backed by the ring buffers. Fast, bounded, and lost on restart.
+    """
+
+    def __init__(self, history_capacity=1000, alerts_capacity=50):
+        self.history_buffer = HistoryBuffer(capacity=history_capacity)
+        self.alert_buffer = AlertBuffer(capacity=alerts_capacity)
+        self._alert_ids = itertools.count(1)
+
+    def add_prediction(self, sensor_data, prediction, machine_id=None):
+        self.history_buffer.append(sensor_data, prediction, machine_id)
+
+    def history(self, limit=None, start=None, end=None, machine_id=None, max_points=None):
+        return self.history_buffer.query(limit, start, end, machine_id, max_points)
+
+    def history_count(self):
+        return len(self.history_buffer)
+
+    def add_alert(self, alert):
+        self.alert_buffer.append(alert)
+
+    def update_alert(self, alert):
+        self.alert_buffer.update(alert)
+
+    def acknowledge_alert(self, alert_id, timestamp):
+        alert = self.alert_buffer.get(alert_id)
+        if alert is not None:
+            alert.update(acknowledged=True, acknowledged_at=timestamp)
+
+    def get_alert(self, alert_id):
+        return self.alert_buffer.get(alert_id)
+
+    def alerts(self, severity=None, status=None):
+        alerts = self.alert_buffer.by_severity(severity) if severity else self.alert_buffer.all()
+        if status:
+            alerts = [a for a in alerts if a.get("status", "open") == status]
+        return alerts
+
+    def open_alerts(self):
+        return self.alert_buffer.tracked()
+
+    def alerts_count(self):
+        return len(self.alert_buffer)
+
+    def next_alert_id(self):
+        return next(self._alert_ids)
+
+    def delete_alert(self, alert_id):
+        return self.alert_buffer.delete(alert_id)
+
+    def clear(self):
+        self.history_buffer.clear()
+        self.alert_buffer.clear()
+
+    def close(self):
+        pass
+
+
+class StoreFullError(Exception):
+    """Raised when a store's write queue already holds its maximum of pending predictions."""
+
+
+class SQLiteStore:
+    """
+    Durable storage in an SQLite database in WAL mode.
+
+    Writes are queued and a background thread commits everything queued so far
+    in one transaction, so the request path only pays for a queue put. Writes
+    never wait: once max_queue predictions are pending, add_prediction() raises
+    StoreFullError (alert writes, at most one per prediction, are always queued).
+    Alert ids are reserved by the writer thread a block ahead of use, so
+    next_alert_id() does not wait for SQLite either.
+    History is indexed by (machine_id, ts) and ts, so time-range queries and
+    downsampling run in SQL without loading the table into memory. Reads wait
+    for queued writes first, so a prediction is visible as soon as it returns;
+    the counts (history_count(), alerts_count(), read by /health and /metrics
+    on the event loop) do not, and leave out writes still queued.
+    GET /alerts lists the same alerts as MemoryStore: every open alert of a
+    machine plus the newest alerts_capacity others. An alert's status has its own
+    (indexed) column; fields beyond those (counters, timestamps, ...) are kept
+    as JSON in the details column.
+    """
+
+    HISTORY_COLUMNS = (
+        "ts", "machine_id", "temperature", "vibration", "pressure", "rpm",
+        "health_status", "failure_risk", "anomaly_detected", "anomaly_probability",
+        "root_cause", "recommendation", "remaining_useful_life",
+    )
+
+    # stored in their own columns; any other alert fields go in details
+    ALERT_COLUMNS = ("id", "severity", "message", "timestamp", "sensor_data", "status")
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS history (
+            id INTEGER PRIMARY KEY,
+            ts INTEGER NOT NULL,
+            machine_id TEXT,
+            temperature REAL NOT NULL,
+            vibration REAL NOT NULL,
+            pressure REAL NOT NULL,
+            rpm REAL NOT NULL,
+            health_status TEXT NOT NULL,
+            failure_risk INTEGER NOT NULL,
+            anomaly_detected INTEGER NOT NULL,
+            anomaly_probability REAL NOT NULL,
+            root_cause TEXT NOT NULL,
+            recommendation TEXT NOT NULL,
+            remaining_useful_life INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS history_machine_ts ON history (machine_id, ts);
+        CREATE INDEX IF NOT EXISTS history_ts ON history (ts);
+        CREATE TABLE IF NOT EXISTS alerts (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id INTEGER NOT NULL,
+            severity TEXT NOT NULL,
+            message TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            sensor_data TEXT NOT NULL,
+            details TEXT,
+            status TEXT
+        );
+        CREATE INDEX IF NOT EXISTS alerts_id ON alerts (id);
+        CREATE TABLE IF NOT EXISTS alert_ids (next_id INTEGER NOT NULL);
+        INSERT INTO alert_ids SELECT coalesce(MAX(id), 0) + 1 FROM alerts
+            WHERE NOT EXISTS (SELECT 1 FROM alert_ids);
+    """
+
+    # alert ids a process reserves at once from alert_ids
+    ALERT_ID_BLOCK = 100
+
+    def __init__(self, path, alerts_capacity=50, batch_size=5000, max_queue=100000):
+        self.path = path
+        self.alerts_capacity = alerts_capacity
+        self.batch_size = batch_size
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        conn.executescript(self.SCHEMA)
+        # databases created before alert details / status were stored
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(alerts)")]
+        if "details" not in columns:
+            conn.execute("ALTER TABLE alerts ADD COLUMN details TEXT")
+        if "status" not in columns:
+            with conn:
+                conn.execute("ALTER TABLE alerts ADD COLUMN status TEXT")
+                conn.execute("UPDATE alerts SET status = json_extract(details, '$.status') WHERE details IS NOT NULL")
+        conn.execute("CREATE INDEX IF NOT EXISTS alerts_status ON alerts (status)")
+        conn.close()
+
+        self.max_queue = max_queue
+        self._closed = False
+        self._start()
+
+    def _start(self):
+        """Start the writer thread; runs again in a forked child, where threads do not survive."""
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        # this process's reserved alert ids; the first block is reserved right away
+        self._alert_ids = collections.deque()
+        self._alert_ids_lock = threading.Lock()
+        self._alert_ids_requested = True
+        self._queue.put(("reserve_alert_ids", self.ALERT_ID_BLOCK))
+        self._writer = threading.Thread(target=self._write_loop, name="sqlite-store-writer", daemon=True)
+        self._writer.start()
+
+    def _writes(self):
+        """The write queue of this process's writer thread."""
+        if self._pid != os.getpid():
+            self._start()
+        return self._queue
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self):
+        if self._pid != os.getpid():
+            self._start()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # ---- writes (queued) ----
+    def add_prediction(self, sensor_data, prediction, machine_id=None):
+        writes = self._writes()
+        if writes.qsize() >= self.max_queue:
+            raise StoreFullError(f"SQLite store has {self.max_queue} writes pending")
+        writes.put(("history", (
+            to_microseconds(prediction["timestamp"]), machine_id,
+            sensor_data["temperature"], sensor_data["vibration"],
+            sensor_data["pressure"], sensor_data["rpm"],
+            prediction["health_status"], prediction["failure_risk"],
+            int(prediction["anomaly_detected"]), prediction["anomaly_probability"],
+            prediction["root_cause"], prediction["recommendation"],
+            prediction["remaining_useful_life"],
+        )))
+
+    def add_alert(self, alert):
+        self._writes().put(("alert", (
+            alert["id"], alert["severity"], alert["message"], alert["timestamp"],
+            json.dumps(alert["sensor_data"]), self._details(alert), alert.get("status"),
+        )))
+
+    def update_alert(self, alert):
+        """Store the alert engine's new state of an alert; a resolved alert is never overwritten (or reopened)."""
+        self._writes().put(("update_alert", (
+            alert["severity"], alert["message"], json.dumps(alert["sensor_data"]), self._details(alert),
+            alert.get("status"), alert["id"],
+        )))
+
+    def acknowledge_alert(self, alert_id, timestamp):
+        self._writes().put(("acknowledge_alert", (timestamp, alert_id)))
+
+    @classmethod
+    def _details(cls, alert):
+        return json.dumps({k: v for k, v in alert.items() if k not in cls.ALERT_COLUMNS})
+
+    def delete_alert(self, alert_id):
+        self.flush()
+        deleted = self._reader().execute("SELECT COUNT(*) FROM alerts WHERE id = ?", (alert_id,)).fetchone()[0]
+        self._writes().put(("delete_alert", (alert_id,)))
+        self.flush()
+        return deleted
+
+    def clear(self):
+        self._writes().put(("clear", None))
+        self.flush()
+
+    def flush(self):
+        """Block until every queued write is committed."""
+        self._writes().join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._writes().put(None)
+        self._writer.join()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            # group commit: everything queued while the last batch was being
+            # written goes into the next transaction
+            batch = [self._queue.get()]
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is None
+            self._commit(conn, [op for op in batch if op is not None])
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                conn.close()
+                return
+
+    def _commit(self, conn, ops):
+        if not ops:
+            return
+        placeholders = ", ".join("?" * len(self.HISTORY_COLUMNS))
+        insert_history = f"INSERT INTO history ({', '.join(self.HISTORY_COLUMNS)}) VALUES ({placeholders})"
+        insert_alert = ("INSERT INTO alerts (id, severity, message, timestamp, sensor_data, details, status) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)")
+        # a stale worker (see AlertEngine) cannot overwrite an alert another one resolved
+        update_alert = ("UPDATE alerts SET severity = ?, message = ?, sensor_data = ?, details = ?, status = ? "
+                        "WHERE id = ? AND status IS NOT 'resolved'")
+        acknowledge_alert = ("UPDATE alerts SET details = json_set(coalesce(details, '{}'), "
+                             "'$.acknowledged', json('true'), '$.acknowledged_at', ?) WHERE id = ?")
+
+        reserved = []
+        conn.execute("BEGIN")
+        try:
+            i = 0
+            while i < len(ops):
+                kind = ops[i][0]
+                # consecutive ops of the same kind go in one executemany
+                j = i
+                while j < len(ops) and ops[j][0] == kind:
+                    j += 1
+                rows = [op[1] for op in ops[i:j]]
+                if kind == "history":
+                    conn.executemany(insert_history, rows)
+                elif kind == "alert":
+                    conn.executemany(insert_alert, rows)
+                elif kind == "update_alert":
+                    conn.executemany(update_alert, rows)
+                elif kind == "acknowledge_alert":
+                    conn.executemany(acknowledge_alert, rows)
+                elif kind == "delete_alert":
+                    conn.executemany("DELETE FROM alerts WHERE id = ?", rows)
+                elif kind == "clear":
+                    conn.execute("DELETE FROM history")
+                    conn.execute("DELETE FROM alerts")
+                elif kind == "reserve_alert_ids":
+                    reserved.extend(self._reserve_alert_ids(conn, count) for count in rows)
+                i = j
+            conn.execute("COMMIT")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            reserved = []
+            print(f"SQLite store failed to write {len(ops)} operations: {e}")
+        if any(op[0] == "reserve_alert_ids" for op in ops):
+            with self._alert_ids_lock:
+                for ids in reserved:
+                    self._alert_ids.extend(ids)
+                self._alert_ids_requested = False
+
+    @staticmethod
+    def _reserve_alert_ids(conn, count):
+        """Take the next count alert ids in the database (inside the caller's transaction)."""
+        conn.execute("UPDATE alert_ids SET next_id = next_id + ?", (count,))
+        last = conn.execute("SELECT next_id FROM alert_ids").fetchone()[0]
+        return range(last - count, last)
+
+    # ---- reads ----
+    def history(self, limit=None, start=None, end=None, machine_id=None, max_points=None):
+        self.flush()
+        conn = self._reader()
+
+        where, params = [], []
+        if machine_id is not None:
+            where.append("machine_id = ?")
+            params.append(machine_id)
+        if start is not None:
+            where.append("ts >= ?")
+            params.append(to_microseconds(start))
+        if end is not None:
+            where.append("ts <= ?")
+            params.append(to_microseconds(end))
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+        source = "history"
+        if max_points:
+            count, start_us, end_us = conn.execute(
+                f"SELECT COUNT(*), MIN(ts), MAX(ts) FROM history {where_sql}", params
+            ).fetchone()
+            if start is not None:
+                start_us = to_microseconds(start)
+            if end is not None:
+                end_us = to_microseconds(end)
+            if count > max_points:
+                # latest row (by ts, then arrival) of each of max_points equal
+                # time buckets, as downsample_mask() picks them: each bucket's
+                # latest ts, then the last row written at that ts
+                span = max(end_us - start_us, 1)
+                bucket = f"MIN((ts - {int(start_us)}) * {int(max_points)} / {int(span)}, {int(max_points) - 1})"
+                and_sql = "".join(f" AND {condition}" for condition in where)
+                source = (
+                    f"(SELECT * FROM history WHERE id IN ("
+                    f"SELECT MAX(id) FROM history WHERE ts IN (SELECT MAX(ts) FROM history {where_sql} "
+                    f"GROUP BY {bucket}){and_sql} GROUP BY ts))"
+                )
+                params = params * 2
+                where_sql = ""
+
+        sql = f"SELECT {', '.join(self.HISTORY_COLUMNS)} FROM {source} {where_sql} ORDER BY ts DESC, id DESC"
+        if limit and limit > 0:
+            sql += f" LIMIT {int(limit)}"
+        rows = conn.execute(sql, params).fetchall()
+        rows.reverse()
+
+        entries = []
+        for (ts, machine, temp, vib, press, rpm, status, risk, anomaly, anomaly_prob,
+             cause, rec, rul) in rows:
+            timestamp = from_microseconds(ts)
+            entries.append(history_entry(
+                timestamp,
+                machine,
+                {"temperature": temp, "vibration": vib, "pressure": press, "rpm": rpm},
+                {
+                    "health_status": status,
+                    "failure_risk": risk,
+                    "anomaly_detected": bool(anomaly),
+                    "anomaly_probability": anomaly_prob,
+                    "root_cause": cause,
+                    "recommendation": rec,
+                    "remaining_useful_life": rul,
+                    "timestamp": timestamp
+                }
+            ))
+        return entries
+
+    def history_count(self):
+        # history rows are only ever appended or all deleted, so their ids have
+        # no gaps and the count is two index lookups instead of a table scan
+        first, last = self._reader().execute(
+            "SELECT (SELECT MIN(id) FROM history), (SELECT MAX(id) FROM history)"
+        ).fetchone()
+        return 0 if first is None else last - first + 1
+
+    # AlertBuffer.is_tracked (alerts stored without a status are not open)
+    _TRACKED = "(status = 'open' AND json_extract(details, '$.machine_id') IS NOT NULL)"
+
+    # tracked alerts, and the newest alerts_capacity others
+    _LISTED = (f"({_TRACKED} OR seq IN (SELECT seq FROM alerts WHERE NOT coalesce({_TRACKED}, 0) "
+               "ORDER BY seq DESC LIMIT {capacity}))")
+
+    def alerts(self, severity=None, status=None):
+        self.flush()
+        sql = ("SELECT id, severity, message, timestamp, sensor_data, details, status FROM alerts WHERE "
+               + self._LISTED.format(capacity=int(self.alerts_capacity)))
+        params = []
+        if severity:
+            sql += " AND lower(severity) = ?"
+            params.append(severity.lower())
+        if status:
+            sql += " AND coalesce(status, 'open') = ?"
+            params.append(status)
+        sql += " ORDER BY id, seq"
+        return [self._alert(row) for row in self._reader().execute(sql, params)]
+
+    def get_alert(self, alert_id):
+        self.flush()
+        row = self._reader().execute(
+            "SELECT id, severity, message, timestamp, sensor_data, details, status FROM alerts WHERE id = ? "
+            "ORDER BY seq DESC LIMIT 1", (alert_id,)
+        ).fetchone()
+        return self._alert(row) if row else None
+
+    @staticmethod
+    def _alert(row):
+        alert_id, severity, message, timestamp, sensor_data, details, status = row
+        alert = {"id": alert_id, "severity": severity, "message": message, "timestamp": timestamp,
+                 "sensor_data": json.loads(sensor_data), **(json.loads(details) if details else {})}
+        if status is not None:
+            alert["status"] = status
+        return alert
+
+    def open_alerts(self):
+        self.flush()
+        rows = self._reader().execute(
+            "SELECT id, severity, message, timestamp, sensor_data, details, status FROM alerts "
+            f"WHERE {self._TRACKED} ORDER BY id, seq"
+        )
+        return [self._alert(row) for row in rows]
+
+    def next_alert_id(self):
+        """
+        A new alert id. Each process reserves ALERT_ID_BLOCK ids at a time in
+        the database, so forked workers sharing it never hand out the same id.
+        The writer thread reserves the next block once fewer than a block are
+        left; only a burst that uses them all up before it commits waits for
+        SQLite here.
+        """
+        writes = self._writes()  # starts this process's own reservations after a fork
+        with self._alert_ids_lock:
+            if not self._alert_ids:
+                conn = self._reader()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._alert_ids.extend(self._reserve_alert_ids(conn, self.ALERT_ID_BLOCK))
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            alert_id = self._alert_ids.popleft()
+            if len(self._alert_ids) < self.ALERT_ID_BLOCK and not self._alert_ids_requested:
+                self._alert_ids_requested = True
+                writes.put(("reserve_alert_ids", self.ALERT_ID_BLOCK))
+            return alert_id
+
+    def alerts_count(self):
+        return self._reader().execute(
+            f"SELECT (SELECT COUNT(*) FROM alerts WHERE {self._TRACKED}) + (SELECT COUNT(*) FROM "
+            f"(SELECT 1 FROM alerts WHERE NOT coalesce({self._TRACKED}, 0) "
+            f"ORDER BY seq DESC LIMIT {int(self.alerts_capacity)}))"
+        ).fetchone()[0]
+
+
+def create_store(backend="memory", history_capacity=1000, alerts_capacity=50, sqlite_path=None):
+    """Build the storage backend named by backend ("memory" or "sqlite")."""
+    if backend == "memory":
+        return MemoryStore(history_capacity=history_capacity, alerts_capacity=alerts_capacity)
+    if backend == "sqlite":
+        return SQLiteStore(sqlite_path, alerts_capacity=alerts_capacity)
+    raise ValueError(f"Unknown storage backend: {backend!r} (expected 'memory' or 'sqlite')")